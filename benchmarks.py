@@ -0,0 +1,359 @@
+"""
+Benchmarks for tuning the world's physics to a deployment
+
+Run this file to print the results of every benchmark
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import random
+import time
+
+from world import World, BROADPHASES, SLEEP_TIME_THRESHOLD, REDUCED_COLLISION_MATRIX
+from block import create_block
+from dropped_item import DroppedItem
+from item import BlockItem
+from mob import Bird
+from player import Player
+from scheduler import MobScheduler, MOB_UPDATE_BUDGET
+from population import MobPopulation
+from spawning import MobSpawner, MOB_POOL_SIZE
+from loot import SimpleLoot
+
+BLOCK_SIZE = 2 ** 5
+
+# (column, row) sizes of the worlds to benchmark
+BENCHMARK_GRID_SIZES = [(32, 16), (128, 32), (512, 64)]
+
+# Number of dropped items per column of the grid in benchmark worlds
+ITEMS_PER_COLUMN = 2
+
+# Number of dropped items per column of the grid in loot physics benchmark worlds
+LOOT_PER_COLUMN = 8
+
+# Number of birds per column of the grid in mob scheduling benchmark worlds
+MOBS_PER_COLUMN = 2
+
+
+def build_benchmark_world(grid_size, seed=0, items_per_column=ITEMS_PER_COLUMN, **kwargs):
+    """(World) Returns a world with the bottom half of its grid filled with blocks, and with
+    items & birds scattered above
+
+    Parameters:
+        grid_size (tuple<int, int>): The (column, row) size of the grid
+        seed (int): The seed for placing blocks, items & birds
+        items_per_column (int): The number of items per column of the grid
+        kwargs: Keyword arguments to be given to the World on creation
+    """
+    rng = random.Random(seed)
+
+    world = World(grid_size, BLOCK_SIZE, **kwargs)
+
+    columns, rows = grid_size
+    for column in range(columns):
+        for row in range(rows // 2, rows):
+            world.add_block_to_grid(create_block(rng.choice(('dirt', 'stone'))), column, row)
+
+    for _ in range(items_per_column * columns):
+        x = rng.uniform(0, columns * BLOCK_SIZE)
+        y = rng.uniform(0, rows * BLOCK_SIZE // 2 - BLOCK_SIZE)
+        world.add_item(DroppedItem(BlockItem('dirt')), x, y)
+
+    for _ in range(columns // 16):
+        x = rng.uniform(0, columns * BLOCK_SIZE)
+        world.add_mob(Bird("friendly_bird", (12, 12)), x, BLOCK_SIZE)
+
+    return world
+
+
+def time_steps(world, steps, time_step=1 / 60):
+    """(float) Returns the mean time taken (in seconds) by each of 'steps' steps of 'world'"""
+    start = time.perf_counter()
+
+    for _ in range(steps):
+        world.advance(time_step, None)
+
+    return (time.perf_counter() - start) / steps
+
+
+def benchmark_broadphases(grid_sizes=None, steps=120, mesh_tile_size=None):
+    """Compares the mean step time of each broadphase at different world sizes
+
+    Parameters:
+        grid_sizes (list<tuple<int, int>>): The sizes of world to compare at;
+                                            defaults to BENCHMARK_GRID_SIZES
+        steps (int): The number of steps to time for each world
+        mesh_tile_size (int): The terrain mesh tile size of each world (see World)
+
+    Return:
+        dict<tuple<tuple<int, int>, str>: float>:
+                Mapping of (grid size, broadphase) pairs to mean step time, in seconds
+    """
+    if grid_sizes is None:
+        grid_sizes = BENCHMARK_GRID_SIZES
+
+    results = {}
+
+    for grid_size in grid_sizes:
+        for broadphase in BROADPHASES:
+            world = build_benchmark_world(grid_size, broadphase=broadphase, mesh_tile_size=mesh_tile_size)
+
+            # let items settle, since resting contacts are the usual case
+            time_steps(world, 30)
+
+            results[grid_size, broadphase] = time_steps(world, steps)
+
+    return results
+
+
+def benchmark_world_load(grid_sizes=None, repeats=5, mesh_tile_size=None):
+    """Compares the mean time taken to fill the bottom half of a world's grid with blocks,
+    adding blocks one at a time versus in bulk
+
+    Parameters:
+        grid_sizes (list<tuple<int, int>>): The sizes of world to compare at;
+                                            defaults to BENCHMARK_GRID_SIZES
+        repeats (int): The number of worlds to fill for each case
+        mesh_tile_size (int): The terrain mesh tile size of each world (see World)
+
+    Return:
+        dict<tuple<tuple<int, int>, str>: float>:
+                Mapping of (grid size, method) pairs to mean load time, in seconds
+    """
+    if grid_sizes is None:
+        grid_sizes = BENCHMARK_GRID_SIZES
+
+    results = {}
+
+    for grid_size in grid_sizes:
+        columns, rows = grid_size
+        cells = [(column, row) for column in range(columns) for row in range(rows // 2, rows)]
+
+        for method in ("add_block_to_grid", "add_blocks"):
+            total = 0
+
+            for _ in range(repeats):
+                world = World(grid_size, BLOCK_SIZE, mesh_tile_size=mesh_tile_size)
+                blocks = [(create_block('dirt'), column, row) for column, row in cells]
+
+                start = time.perf_counter()
+
+                if method == "add_blocks":
+                    world.add_blocks(blocks)
+                else:
+                    for block, column, row in blocks:
+                        world.add_block_to_grid(block, column, row)
+
+                # meshing is deferred until the first step
+                world.advance(0, None)
+
+                total += time.perf_counter() - start
+
+            results[grid_size, method] = total / repeats
+
+    return results
+
+
+def benchmark_mob_scheduling(grid_sizes=None, steps=120):
+    """Compares the mean step time of worlds crowded with birds, with every mob stepped on
+    every step, with mobs scheduled by distance to a player at the left of the world, with
+    that schedule also limited by MOB_UPDATE_BUDGET, with every mob stepped at once by a
+    MobPopulation, and with the mobs scheduled by distance stepped at once by a MobPopulation
+
+    Parameters:
+        grid_sizes (list<tuple<int, int>>): The sizes of world to compare at;
+                                            defaults to BENCHMARK_GRID_SIZES
+        steps (int): The number of steps to time for each world
+
+    Return:
+        dict<tuple<tuple<int, int>, str>: float>:
+                Mapping of (grid size, scheduling) pairs to mean step time, in seconds
+    """
+    if grid_sizes is None:
+        grid_sizes = BENCHMARK_GRID_SIZES
+
+    results = {}
+
+    for grid_size in grid_sizes:
+        columns, rows = grid_size
+
+        for scheduling, scheduler in (("every step", None), ("distance", MobScheduler()),
+                                      ("budgeted", MobScheduler(budget=MOB_UPDATE_BUDGET)),
+                                      ("vectorised", MobPopulation()),
+                                      ("vectorised + distance",
+                                       MobPopulation(scheduler=MobScheduler()))):
+            world = World(grid_size, BLOCK_SIZE, mesh_tile_size=16, mob_scheduler=scheduler)
+            world.add_blocks((create_block('dirt'), column, row)
+                             for column in range(columns) for row in range(rows // 2, rows))
+            world.add_player(Player(), 4 * BLOCK_SIZE, BLOCK_SIZE)
+
+            rng = random.Random(0)
+            for _ in range(MOBS_PER_COLUMN * columns):
+                x = rng.uniform(0, columns * BLOCK_SIZE)
+                y = rng.uniform(0, rows * BLOCK_SIZE // 2 - BLOCK_SIZE)
+                world.add_mob(Bird("friendly_bird", (12, 12), rng=rng), x, y)
+
+            time_steps(world, 30)
+            results[grid_size, scheduling] = time_steps(world, steps)
+
+    return results
+
+
+def benchmark_mob_churn(grid_size=(512, 32), steps=1200, move_interval=120, density=1.):
+    """Compares the mean & longest step time of a world whose player jumps between its ends,
+    so that a spawner despawns every mob & spawns new ones, with & without reusing mobs
+
+    Parameters:
+        grid_size (tuple<int, int>): The size of world
+        steps (int): The number of steps to time
+        move_interval (int): The number of steps between moving the player to the other end
+        density (float): The target number of mobs per column around the player (see MobSpawner)
+
+    Return:
+        dict<tuple<str, str>: float>: Mapping of (pooling, statistic) pairs to step time, in seconds
+    """
+    columns, rows = grid_size
+    results = {}
+
+    for pooling, pool_size in (("pooled", MOB_POOL_SIZE), ("unpooled", 0)):
+        spawner = MobSpawner(rng=random.Random(0), density=density, pool_size=pool_size)
+        world = World(grid_size, BLOCK_SIZE, mesh_tile_size=16, mob_spawner=spawner)
+        world.add_blocks((create_block('dirt'), column, row)
+                         for column in range(columns) for row in range(rows // 2, rows))
+
+        player = Player()
+        world.add_player(player, BLOCK_SIZE, BLOCK_SIZE)
+
+        times = []
+        for step in range(steps):
+            if step % move_interval == 0:
+                column = columns // 8 if step // move_interval % 2 == 0 else columns - columns // 8
+                player.get_shape().body.position = world.grid_to_xy_centre(column, rows // 2 - 2)
+
+            start = time.perf_counter()
+            world.advance(1 / 60, None)
+            times.append(time.perf_counter() - start)
+
+        results[pooling, "mean"] = sum(times) / len(times)
+        results[pooling, "max"] = max(times)
+
+    return results
+
+
+def benchmark_resting_items(grid_sizes=None, steps=120, settle_steps=300):
+    """Compares the mean step time of worlds whose items have all come to rest, with & without
+    bodies sleeping
+
+    Parameters:
+        grid_sizes (list<tuple<int, int>>): The sizes of world to compare at;
+                                            defaults to BENCHMARK_GRID_SIZES
+        steps (int): The number of steps to time for each world
+        settle_steps (int): The number of steps for which to let the items settle first
+
+    Return:
+        dict<tuple<tuple<int, int>, str>: float>:
+                Mapping of (grid size, sleeping) pairs to mean step time, in seconds
+    """
+    if grid_sizes is None:
+        grid_sizes = BENCHMARK_GRID_SIZES
+
+    results = {}
+
+    for grid_size in grid_sizes:
+        for sleeping, threshold in (("sleeping", SLEEP_TIME_THRESHOLD), ("awake", None)):
+            world = build_benchmark_world(grid_size, mesh_tile_size=16, item_merge_radius=None,
+                                          sleep_time_threshold=threshold)
+
+            time_steps(world, settle_steps)
+            results[grid_size, sleeping] = time_steps(world, steps)
+
+    return results
+
+
+def benchmark_loot_physics(grid_sizes=None, steps=120):
+    """Compares the mean step time of worlds with many falling items, with items moved by
+    the physics engine & by simple loot physics
+
+    Parameters:
+        grid_sizes (list<tuple<int, int>>): The sizes of world to compare at;
+                                            defaults to BENCHMARK_GRID_SIZES
+        steps (int): The number of steps to time for each world, from when the items are dropped
+
+    Return:
+        dict<tuple<tuple<int, int>, str>: float>:
+                Mapping of (grid size, physics) pairs to mean step time, in seconds
+    """
+    if grid_sizes is None:
+        grid_sizes = BENCHMARK_GRID_SIZES
+
+    results = {}
+
+    for grid_size in grid_sizes:
+        for physics, loot in (("pymunk", None), ("simple loot", SimpleLoot)):
+            world = build_benchmark_world(grid_size, items_per_column=LOOT_PER_COLUMN, mesh_tile_size=16,
+                                          item_merge_radius=None, max_items=None,
+                                          loot_physics=loot() if loot is not None else None)
+
+            results[grid_size, physics] = time_steps(world, steps)
+
+    return results
+
+
+def benchmark_collision_matrix(grid_sizes=None, steps=120):
+    """Compares the mean step time of worlds with crowded, awake items, with every category
+    colliding with every other (the default) & with the reduced collision matrix
+
+    Parameters:
+        grid_sizes (list<tuple<int, int>>): The sizes of world to compare at;
+                                            defaults to BENCHMARK_GRID_SIZES
+        steps (int): The number of steps to time for each world
+
+    Return:
+        dict<tuple<tuple<int, int>, str>: float>:
+                Mapping of (grid size, collision matrix) pairs to mean step time, in seconds
+    """
+    if grid_sizes is None:
+        grid_sizes = BENCHMARK_GRID_SIZES
+
+    results = {}
+
+    for grid_size in grid_sizes:
+        for matrix, collision_matrix in (("every pair", None), ("reduced", REDUCED_COLLISION_MATRIX)):
+            world = build_benchmark_world(grid_size, items_per_column=LOOT_PER_COLUMN, mesh_tile_size=16,
+                                          item_merge_radius=None, max_items=None, sleep_time_threshold=None,
+                                          collision_matrix=collision_matrix)
+
+            results[grid_size, matrix] = time_steps(world, steps)
+
+    return results
+
+
+def print_results(title, results):
+    """Prints the results of a benchmark as a table
+
+    Parameters:
+        title (str): The title of the benchmark
+        results (dict<tuple<*, str>: float>): Mapping of (case, variant) pairs to time, in seconds
+    """
+    print(title)
+    for (case, variant), seconds in results.items():
+        print(f"  {str(case):<16}{variant:<16}{seconds * 1000:>10.3f} ms")
+
+
+def main():
+    print_results("Broadphase step time (per-block shapes)", benchmark_broadphases())
+    print_results("Broadphase step time (meshed terrain)", benchmark_broadphases(mesh_tile_size=16))
+    print_results("World load time (per-block shapes)", benchmark_world_load())
+    print_results("World load time (meshed terrain)", benchmark_world_load(mesh_tile_size=16))
+    print_results("Step time with crowded mobs", benchmark_mob_scheduling())
+    print_results("Step time with mob churn", benchmark_mob_churn())
+    print_results("Step time with resting items", benchmark_resting_items())
+    print_results("Step time with falling loot", benchmark_loot_physics())
+    print_results("Step time by collision matrix", benchmark_collision_matrix())
+
+
+if __name__ == '__main__':
+    main()
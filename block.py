@@ -64,6 +64,9 @@ class Block(PhysicalThing):
 
         self._hitpoints = self._max_hitpoints = hitpoints
 
+        # the active chunk holding this block, marked dirty whenever the block is damaged
+        self._chunk = None
+
         if self._id is None:
             raise NotImplementedError("A Block subclass must define an _id attribute")
 
@@ -74,10 +77,37 @@ class Block(PhysicalThing):
         """(str) Returns the unique id of this block"""
         return self._id
 
+    def get_block_id(self) -> tuple:
+        """(tuple<*>) Returns the N-length tuple that uniquely identifies this block, such that
+        create_block(*block_id) creates a new, unmined block of the same kind"""
+        return self._id,
+
     def get_hitpoints(self) -> float:
         """(float) Returns the block's remaining hitpoints"""
         return self._hitpoints
 
+    def get_max_hitpoints(self) -> float:
+        """(float) Returns the block's maximum hitpoints"""
+        return self._max_hitpoints
+
+    def set_hitpoints(self, hitpoints: float):
+        """Sets the block's remaining hitpoints to 'hitpoints (float)'"""
+        if hitpoints != self._hitpoints and self._chunk is not None:
+            self._chunk.set_dirty(True)
+
+        self._hitpoints = hitpoints
+
+    def get_chunk(self):
+        """(chunk.Chunk) Returns the active chunk holding this block, or None"""
+        return self._chunk
+
+    def set_chunk(self, chunk):
+        """Sets the active chunk holding this block
+
+        Called by the world with 'chunk (chunk.Chunk)' when it adds this block to an active chunk,
+        and with None once it has removed this block"""
+        self._chunk = chunk
+
     def get_position(self):
         """(float, float) Returns the (x, y) position of the block's centre"""
         x, y = self.get_shape().bb.center()
@@ -142,7 +172,7 @@ class Block(PhysicalThing):
         time, correct_item = self.get_damage_by_tool(effective_item)
 
         damage = 10 / time
-        self._hitpoints -= damage
+        self.set_hitpoints(self._hitpoints - damage)
 
         print(f"Did {damage} damage with {effective_item} (correct? {correct_item})")
 
@@ -174,6 +204,10 @@ class LeafBlock(Block):
         """Does nothing, since LeafBlocks cannot be used"""
         print("Kayn't nobudy use a leaf blahk foo")
 
+    def get_block_id(self):
+        """(tuple<str>) Returns ('leaf',), since leaf blocks are created by create_block('leaf')"""
+        return 'leaf',
+
     def get_drops(self, luck, correct_item_used):
         """Drops an apple 30% of the time if the wrong tool was used
 
@@ -252,8 +286,40 @@ class TrickCandleFlameBlock(Block):
 
     # The following methods have not been commented, and their comments
     # are inherited from Block
+    def get_block_id(self):
+        return self._id, self._i
+
     def use(self):
         pass
 
     def __repr__(self):
         return f"TrickCandleFlameBlock({self._i!r})"
+
+
+def create_block(*block_id):
+    """(Block) Creates a block (this function can be thought of as a block factory)
+
+    Parameters:
+        block_id (*tuple): N-length tuple to uniquely identify the block,
+        often comprised of strings, but not necessarily (arguments are grouped
+        into a single tuple)
+
+    Examples:
+        >>> create_block("leaf")
+        LeafBlock()
+        >>> create_block("stone")
+        ResourceBlock('stone')
+        >>> create_block("mayhem", 1)
+        TrickCandleFlameBlock(1)
+    """
+    if len(block_id) == 1:
+        block_id = block_id[0]
+        if block_id == "leaf":
+            return LeafBlock()
+        elif block_id in BREAK_TABLES:
+            return ResourceBlock(block_id, BREAK_TABLES[block_id])
+
+    elif block_id[0] == 'mayhem':
+        return TrickCandleFlameBlock(block_id[1])
+
+    raise KeyError(f"No block defined for {block_id}")
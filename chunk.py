@@ -0,0 +1,262 @@
+"""
+Classes to compactly store regions of the world grid that are not being simulated
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from array import array
+from typing import Iterable, Tuple
+
+
+class BlockPalette:
+    """Assigns each distinct block id a small integer code, so that the blocks in a region of
+    the grid can be stored as an array of codes rather than as Block instances
+
+    The code EMPTY (0) is reserved for a cell without a block"""
+
+    EMPTY = 0
+
+    def __init__(self, block_ids: Iterable[tuple] = ()):
+        """Constructor
+
+        Parameters:
+            block_ids (iterable<tuple<*>>): Block ids to encode up front, in order
+        """
+        self._block_ids = [None]
+        self._codes = {}
+
+        for block_id in block_ids:
+            self.encode(block_id)
+
+    def encode(self, block_id: tuple) -> int:
+        """(int) Returns the code for 'block_id', assigning it the next code if it is new
+
+        Parameters:
+            block_id (tuple<*>): The block's id, as per Block.get_block_id
+        """
+        code = self._codes.get(block_id)
+
+        if code is None:
+            code = self._codes[block_id] = len(self._block_ids)
+            self._block_ids.append(block_id)
+
+        return code
+
+    def decode(self, code: int) -> tuple:
+        """(tuple<*>) Returns the block id for 'code', or None if code is EMPTY"""
+        return self._block_ids[code]
+
+    def get_block_ids(self) -> [tuple]:
+        """(list<tuple<*>>) Returns every block id in this palette, in order of their codes"""
+        return self._block_ids[1:]
+
+    def __len__(self):
+        """(int) Returns the number of codes in this palette, including EMPTY"""
+        return len(self._block_ids)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.get_block_ids()!r})"
+
+
+class Chunk:
+    """A square region of the world grid
+
+    A chunk is either active, in which case its blocks & other things are in the world as
+    usual, or inactive, in which case they are stored in the chunk as compact data:
+        - each block as a code from a BlockPalette, with hitpoints only for damaged blocks
+        - each other thing with its category, position & velocity, but without a physical body
+
+    A chunk is dirty if its blocks have changed since it was last saved (see region.RegionStore),
+    and unloaded if its blocks are yet to be read from storage.
+    """
+
+    def __init__(self, column: int, row: int, size: int, loaded: bool = True):
+        """Constructor
+
+        Parameters:
+            column (int): The column of this chunk, in chunks
+            row (int): The row of this chunk, in chunks
+            size (int): The width/height of this chunk, in grid cells
+            loaded (bool): If False, this chunk's blocks are yet to be read from storage
+        """
+        self._position = column, row
+        self._size = size
+
+        self._active = False
+        self._dirty = False
+        self._loaded = loaded
+
+        # Row-major block code of each cell in this chunk
+        self._codes = array('H', bytes(2 * size * size))
+        # Map of index in _codes to remaining hitpoints, for damaged blocks only
+        self._hitpoints = {}
+        self._block_count = 0
+
+        self._things = []
+
+    def get_position(self) -> Tuple[int, int]:
+        """(tuple<int, int>) Returns the (column, row) of this chunk, in chunks"""
+        return self._position
+
+    def get_size(self) -> int:
+        """(int) Returns the width/height of this chunk, in grid cells"""
+        return self._size
+
+    def get_origin(self) -> Tuple[int, int]:
+        """(tuple<int, int>) Returns the (column, row) grid cell at the top-left of this chunk"""
+        column, row = self._position
+        return column * self._size, row * self._size
+
+    def is_active(self) -> bool:
+        """(bool) Returns True iff this chunk's contents are in the world"""
+        return self._active
+
+    def set_active(self, active: bool):
+        """Sets whether this chunk's contents are in the world"""
+        self._active = active
+
+    def is_dirty(self) -> bool:
+        """(bool) Returns True iff this chunk's blocks have changed since it was last saved"""
+        return self._dirty
+
+    def set_dirty(self, dirty: bool):
+        """Sets whether this chunk's blocks have changed since it was last saved"""
+        self._dirty = dirty
+
+    def is_loaded(self) -> bool:
+        """(bool) Returns True iff this chunk's blocks have been read from storage (or never needed to be)"""
+        return self._loaded
+
+    def set_loaded(self, loaded: bool):
+        """Sets whether this chunk's blocks have been read from storage"""
+        self._loaded = loaded
+
+    def _get_index(self, column: int, row: int) -> int:
+        """(int) Returns the index in _codes of the grid cell at ('column', 'row')"""
+        left, top = self.get_origin()
+        return (row - top) * self._size + column - left
+
+    def set_block(self, column: int, row: int, code: int, hitpoints: float = None):
+        """Stores a block in the grid cell at ('column', 'row')
+
+        Parameters:
+            column (int): The column of the grid cell
+            row (int): The row of the grid cell
+            code (int): The block's code in the world's palette, or EMPTY
+            hitpoints (float): The block's remaining hitpoints, or None if it is undamaged
+        """
+        index = self._get_index(column, row)
+
+        if self._codes[index] != BlockPalette.EMPTY:
+            self._block_count -= 1
+        if code != BlockPalette.EMPTY:
+            self._block_count += 1
+
+        self._codes[index] = code
+        self._dirty = True
+
+        if hitpoints is None:
+            self._hitpoints.pop(index, None)
+        else:
+            self._hitpoints[index] = hitpoints
+
+    def get_block(self, column: int, row: int) -> Tuple[int, float]:
+        """(tuple<int, float>) Returns the (code, hitpoints) of the block stored in the grid cell
+        at ('column', 'row'), where hitpoints is None for an undamaged block"""
+        index = self._get_index(column, row)
+        return self._codes[index], self._hitpoints.get(index)
+
+    def get_codes(self) -> array:
+        """(array<int>) Returns the row-major block code of each cell in this chunk
+
+        The array must not be modified; see set_codes"""
+        return self._codes
+
+    def set_codes(self, codes: array, hitpoints: dict = None):
+        """Replaces every block stored in this chunk
+
+        Parameters:
+            codes (array<int>): The row-major block code of each cell in this chunk;
+                                of type 'H' & length size * size
+            hitpoints (dict<int: float>): Map of index in codes to remaining hitpoints, for
+                                          damaged blocks only (None if every block is undamaged)
+        """
+        self._codes = codes
+        self._hitpoints = {} if hitpoints is None else hitpoints
+        self._block_count = len(codes) - codes.count(BlockPalette.EMPTY)
+        self._dirty = True
+        self._loaded = True
+
+    def get_damaged_blocks(self) -> [Tuple[int, int, float]]:
+        """(list<tuple<int, int, float>>) Returns the (column, row, hitpoints) of each damaged
+        block stored in this chunk"""
+        left, top = self.get_origin()
+        size = self._size
+
+        return [(left + index % size, top + index // size, hitpoints)
+                for index, hitpoints in self._hitpoints.items()]
+
+    def count_blocks(self) -> int:
+        """(int) Returns the number of blocks stored in this chunk"""
+        return self._block_count
+
+    def pop_blocks(self) -> [Tuple[int, int, int, float]]:
+        """Removes & returns every block stored in this chunk
+
+        Return:
+            list<tuple<int, int, int, float>>:
+                    The (column, row, code, hitpoints) of each block, where hitpoints is None
+                    for an undamaged block
+        """
+        left, top = self.get_origin()
+        size = self._size
+        hitpoints = self._hitpoints
+
+        blocks = [(left + index % size, top + index // size, code, hitpoints.get(index))
+                  for index, code in enumerate(self._codes) if code != BlockPalette.EMPTY]
+
+        self._codes = array('H', bytes(2 * size * size))
+        self._hitpoints = {}
+        self._block_count = 0
+
+        return blocks
+
+    def add_thing(self, thing, category: str, position: Tuple[float, float], velocity: Tuple[float, float]):
+        """Stores a (non-block) thing in this chunk
+
+        Parameters:
+            thing (PhysicalThing): The thing to store
+            category (str): The name of the thing's category (e.g. 'item')
+            position (tuple<float, float>): The (x, y) position of the thing
+            velocity (tuple<float, float>): The (x, y) velocity of the thing
+        """
+        self._things.append((thing, category, position, velocity))
+
+    def count_things(self) -> int:
+        """(int) Returns the number of (non-block) things stored in this chunk"""
+        return len(self._things)
+
+    def get_things(self):
+        """Returns every (non-block) thing stored in this chunk, without removing them
+
+        Return:
+            list<tuple<PhysicalThing, str, tuple<float, float>, tuple<float, float>>>:
+                    The (thing, category, position, velocity) of each thing
+        """
+        return list(self._things)
+
+    def pop_things(self):
+        """Removes & returns every (non-block) thing stored in this chunk
+
+        Return:
+            list<tuple<PhysicalThing, str, tuple<float, float>, tuple<float, float>>>:
+                    The (thing, category, position, velocity) of each thing
+        """
+        things, self._things = self._things, []
+        return things
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._position[0]!r}, {self._position[1]!r}, {self._size!r})"
@@ -0,0 +1,428 @@
+"""
+A tkinter client for a game server (see server.py)
+
+The client sends the player's inputs to the server & draws the state of the world that the
+server broadcasts. Since states arrive only every few ticks & some time after inputs are sent,
+the client:
+    - predicts the motion of its own player, by applying the velocity changes of inputs that
+      the server hasn't acknowledged yet to the player's last known state, and smoothly
+      corrects any difference when the server's state arrives (see PlayerPredictor)
+    - draws every other thing slightly in the past, interpolating between the two states on
+      either side of that time (see ThingInterpolator)
+
+Prediction ignores collisions & gravity, so it is only exact for the short time until the
+server's state catches up.
+
+Run this file to connect to a server
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import argparse
+import math
+import socket
+import time
+import tkinter as tk
+from collections import deque
+
+from app import BLOCK_COLOURS, ITEM_COLOURS
+from delta import DeltaDecoder
+from game import GameView
+from headless import MOVE_SPEED, JUMP_SPEED
+from network import (MESSAGE_WELCOME, MESSAGE_STATE, DEFAULT_PORT, decode_messages, decode_welcome,
+                     decode_state, encode_inputs_message)
+
+# Colour of blocks & items without a colour in app.py
+UNKNOWN_COLOUR = 'black'
+
+# Half the size of each kind of thing, as a fraction of a cell (players) or in pixels
+PLAYER_RADIUS = .4
+ITEM_RADIUS = 4
+MOB_RADIUS = 6
+
+# Milliseconds between frames
+CLIENT_FRAME_INTERVAL = 15
+
+# How far in the past other things are drawn, in states, so that there is usually a state on
+# either side of the time drawn
+INTERPOLATION_DELAY = 2
+
+# Longest time for which the player's motion is predicted past the server's last state, in seconds
+PREDICTION_MAX_TIME = .25
+
+# Fraction of the difference between a correction & the previous prediction that remains after
+# a second
+PREDICTION_SMOOTHING = .001
+
+
+def get_velocity_change(inputs):
+    """(tuple<float, float>) Returns the change in the player's velocity caused by 'inputs'
+    (see headless.PlayerController.move & jump)"""
+    dvx = dvy = 0.
+
+    for input_type, *args in inputs:
+        if input_type == 'move':
+            dx, dy = args
+            dvx += dx * MOVE_SPEED
+            dvy += dy * MOVE_SPEED
+        elif input_type == 'jump':
+            dvy -= JUMP_SPEED
+
+    return dvx, dvy
+
+
+class PlayerPredictor:
+    """Predicts the position of the client's own player from its last known state & the inputs
+    the server hasn't acknowledged yet"""
+
+    def __init__(self, max_time: float = PREDICTION_MAX_TIME, smoothing: float = PREDICTION_SMOOTHING):
+        """Constructor
+
+        Parameters:
+            max_time (float): The longest time for which to predict past the last known state
+            smoothing (float): The fraction of a correction's error that remains after a second
+        """
+        self._max_time = max_time
+        self._smoothing = smoothing
+
+        # (sequence number, time sent, (dvx, dvy)) of each unacknowledged input with an effect on motion
+        self._pending = deque()
+
+        # (x, y, vx, vy) of the last known state & the time it was received
+        self._state = None
+        self._received = None
+
+        # Offset from the prediction to where the player was drawn, decaying over time
+        self._error = 0., 0.
+        self._error_time = None
+
+    def add_inputs(self, sequence: int, inputs, now: float):
+        """Records inputs sent to the server at 'now'"""
+        change = get_velocity_change(inputs)
+
+        if change != (0., 0.):
+            self._pending.append((sequence, now, change))
+
+    def reconcile(self, sequence: int, state, now: float):
+        """Replaces the last known state with the server's
+
+        Parameters:
+            sequence (int): The sequence number of the last inputs applied by the server
+            state (tuple<float, float, float, float>): The (x, y, vx, vy) of the player
+            now (float): The time at which the state was received
+        """
+        previous = self.predict(now) if self._state is not None else None
+
+        while self._pending and self._pending[0][0] <= sequence:
+            self._pending.popleft()
+
+        self._state = state
+        self._received = now
+
+        if previous is not None:
+            x, y = self._predict(now)
+            self._error = previous[0] - x, previous[1] - y
+            self._error_time = now
+
+    def _predict(self, now: float):
+        """(tuple<float, float>) Returns the predicted position at 'now', without smoothing"""
+        x, y, vx, vy = self._state
+        elapsed = min(now - self._received, self._max_time)
+
+        x += vx * elapsed
+        y += vy * elapsed
+
+        for _, sent, (dvx, dvy) in self._pending:
+            since = min(now - max(sent, self._received), self._max_time)
+            x += dvx * since
+            y += dvy * since
+
+        return x, y
+
+    def predict(self, now: float):
+        """(tuple<float, float>) Returns the position at which to draw the player at 'now', or
+        None if the player's state isn't known yet"""
+        if self._state is None:
+            return None
+
+        x, y = self._predict(now)
+
+        if self._error_time is not None:
+            remaining = self._smoothing ** (now - self._error_time)
+            x += self._error[0] * remaining
+            y += self._error[1] * remaining
+
+        return x, y
+
+
+class ThingInterpolator:
+    """Interpolates the positions of things between the states in which they were received"""
+
+    def __init__(self, delay: float):
+        """Constructor
+
+        Parameters:
+            delay (float): How far in the past to draw things, in seconds
+        """
+        self._delay = delay
+
+        # (time received, positions of things by id) of each recent state, oldest first
+        self._states = deque()
+
+    def add_state(self, now: float, positions: dict):
+        """Records the positions of things ('dict<int: tuple<float, float>>') received at 'now'"""
+        self._states.append((now, positions))
+
+    def get_positions(self, now: float) -> dict:
+        """(dict<int: tuple<float, float>>) Returns the position of each thing at 'now', less the delay"""
+        if not self._states:
+            return {}
+
+        time_drawn = now - self._delay
+        states = self._states
+
+        # the oldest state needed is the latest at or before the time drawn
+        while len(states) > 1 and states[1][0] <= time_drawn:
+            states.popleft()
+
+        before_time, before = states[0]
+        if len(states) == 1 or time_drawn <= before_time:
+            return dict(before)
+
+        after_time, after = states[1]
+        fraction = (time_drawn - before_time) / (after_time - before_time)
+
+        positions = {}
+        for thing_id, (x1, y1) in after.items():
+            if thing_id in before:
+                x0, y0 = before[thing_id]
+                positions[thing_id] = x0 + (x1 - x0) * fraction, y0 + (y1 - y0) * fraction
+            else:
+                positions[thing_id] = x1, y1
+
+        return positions
+
+
+class ServerConnection:
+    """A connection to a game server, used without blocking once the server has welcomed the client"""
+
+    def __init__(self, host: str, port: int):
+        """Connects to a server & waits for its welcome
+
+        Raises:
+            ConnectionError if the connection is closed before the welcome
+        """
+        self._socket = socket.create_connection((host, port))
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self._buffer = bytearray()
+        self._sequence = 0
+        self._messages = []
+
+        while not self._messages:
+            self._receive(self._socket.recv(2 ** 16))
+
+        message_type, body = self._messages.pop(0)
+        if message_type != MESSAGE_WELCOME:
+            raise ConnectionError(f"Expected a welcome, but got message type {message_type}")
+
+        self._welcome = decode_welcome(body)
+        self._socket.setblocking(False)
+
+    def _receive(self, data: bytes):
+        """Adds received data to the buffer & decodes any complete messages"""
+        if not data:
+            raise ConnectionError("Connection closed by the server")
+
+        self._buffer += data
+        self._messages.extend(decode_messages(self._buffer))
+
+    def get_welcome(self) -> dict:
+        """(dict) Returns information about the game, as per network.encode_welcome"""
+        return self._welcome
+
+    def send_inputs(self, inputs) -> int:
+        """(int) Sends inputs to the server & returns their sequence number"""
+        self._sequence += 1
+        self._socket.sendall(encode_inputs_message(self._sequence, inputs))
+        return self._sequence
+
+    def receive(self) -> list:
+        """(list<tuple<int, bytes>>) Returns the (type, body) of each message received since the last call"""
+        while True:
+            try:
+                data = self._socket.recv(2 ** 16)
+            except BlockingIOError:
+                break
+
+            self._receive(data)
+
+        messages, self._messages = self._messages, []
+        return messages
+
+    def close(self):
+        """Closes the connection"""
+        self._socket.close()
+
+
+class NetworkClient:
+    """A tkinter view of a game served by a game server, controlling one player"""
+
+    def __init__(self, master, connection: ServerConnection):
+        """Constructor
+
+        Parameters:
+            master (tk.Tk | tk.Toplevel | tk.Frame): The tkinter master widget
+            connection (ServerConnection): The connection to the server
+        """
+        self._master = master
+        self._connection = connection
+
+        welcome = connection.get_welcome()
+        columns, rows = welcome['grid_size']
+        self._cell_expanse = welcome['cell_expanse']
+        state_interval = welcome['time_step'] * welcome['broadcast_interval']
+
+        self._decoder = DeltaDecoder()
+        self._predictor = PlayerPredictor()
+        self._interpolator = ThingInterpolator(INTERPOLATION_DELAY * state_interval)
+        self._player_id = 0
+
+        self._inputs = []
+        self._target_position = None
+        self._drawn_blocks = None
+
+        self._status = tk.StringVar()
+        tk.Label(master, textvariable=self._status).pack(side=tk.TOP)
+
+        self._view = GameView(master, (columns * self._cell_expanse, rows * self._cell_expanse), None)
+        self._view.pack()
+
+        self._view.bind("<Motion>", self._mouse_move)
+        self._view.bind("<Button-1>", lambda e: self._inputs.extend([('target', e.x, e.y), ('mine',)]))
+        self._view.bind("<Button-3>", lambda e: self._inputs.extend([('target', e.x, e.y), ('use',)]))
+
+        self._master.bind("<space>", lambda e: self._inputs.append(('jump',)))
+
+        for keys, (dx, dy) in ((("a", "<Left>"), (-1, 0)), (("d", "<Right>"), (1, 0)), (("s", "<Down>"), (0, 1))):
+            for key in keys:
+                self._master.bind(key, lambda e, dx=dx, dy=dy: self._inputs.append(('move', dx, dy)))
+
+        for i in range(10):
+            self._master.bind(str(i), lambda e, i=i: self._inputs.append(('select', (i - 1) % 10)))
+
+        self.step()
+
+    def _mouse_move(self, event):
+        self._target_position = event.x, event.y
+        self._inputs.append(('target', event.x, event.y))
+
+    def step(self):
+        now = time.perf_counter()
+
+        try:
+            if self._inputs:
+                sequence = self._connection.send_inputs(self._inputs)
+                self._predictor.add_inputs(sequence, self._inputs, now)
+                self._inputs = []
+
+            for message_type, body in self._connection.receive():
+                if message_type == MESSAGE_STATE:
+                    self._receive_state(body, now)
+        except ConnectionError as error:
+            self._status.set(f"Disconnected: {error}")
+            return
+
+        self.redraw(now)
+
+        self._master.after(CLIENT_FRAME_INTERVAL, self.step)
+
+    def _receive_state(self, body: bytes, now: float):
+        """Applies a state received from the server at 'now'"""
+        sequence, player_id, frame = decode_state(body)
+
+        if not self._decoder.apply(frame):
+            return
+
+        self._player_id = player_id
+        things = self._decoder.get_things()
+
+        self._interpolator.add_state(now, {thing_id: (thing.x, thing.y) for thing_id, thing in things.items()
+                                           if thing_id != player_id})
+
+        player = things.get(player_id)
+        if player is not None:
+            self._predictor.reconcile(sequence, (player.x, player.y, player.vx, player.vy), now)
+            self._status.set(f"Health: {player.health:g}  Food: {player.food:g}")
+
+    def redraw(self, now: float):
+        view = self._view
+        half = self._cell_expanse / 2
+
+        blocks = self._decoder.get_blocks()
+        if blocks != self._drawn_blocks:
+            self._drawn_blocks = dict(blocks)
+            view.delete('block')
+
+            for (column, row), block_id in blocks.items():
+                x, y = column * self._cell_expanse, row * self._cell_expanse
+                view.create_rectangle(x, y, x + self._cell_expanse, y + self._cell_expanse,
+                                      fill=BLOCK_COLOURS.get(block_id[0], UNKNOWN_COLOUR), tags='block')
+
+        view.delete('thing')
+        view.hide_target()
+
+        things = self._decoder.get_things()
+        positions = self._interpolator.get_positions(now)
+
+        for thing_id, (x, y) in positions.items():
+            thing = things.get(thing_id)
+            if thing is None:
+                continue
+
+            category, *kind = thing.kind
+            if category == "player":
+                radius = PLAYER_RADIUS * self._cell_expanse
+                view.create_oval(x - radius, y - radius, x + radius, y + radius, fill='orange', tags='thing')
+            elif category == "item":
+                colour = ITEM_COLOURS.get(kind[0] if kind else None, UNKNOWN_COLOUR)
+                view.create_rectangle(x - ITEM_RADIUS, y - ITEM_RADIUS, x + ITEM_RADIUS, y + ITEM_RADIUS,
+                                      fill=colour, tags='thing')
+            else:
+                view.create_polygon((x, y - MOB_RADIUS), (x + MOB_RADIUS, y), (x, y + MOB_RADIUS),
+                                    (x - MOB_RADIUS, y), fill='#87CEEB', tags='thing')
+
+        player_position = self._predictor.predict(now)
+        if player_position is not None:
+            x, y = player_position
+            radius = PLAYER_RADIUS * self._cell_expanse
+            view.create_oval(x - radius, y - radius, x + radius, y + radius, fill='red', tags='thing')
+
+            if self._target_position is not None:
+                tx, ty = self._target_position
+                column, row = math.floor(tx / self._cell_expanse), math.floor(ty / self._cell_expanse)
+                target = column * self._cell_expanse + half, row * self._cell_expanse + half
+                view.show_target(player_position, target, self._target_position)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays a game served by a game server")
+    parser.add_argument('--host', default='127.0.0.1', help="the address of the server")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="the port of the server")
+    args = parser.parse_args()
+
+    connection = ServerConnection(args.host, args.port)
+
+    root = tk.Tk()
+    root.title('Ninedraft')
+    NetworkClient(root, connection)
+    root.mainloop()
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
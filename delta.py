@@ -0,0 +1,360 @@
+"""
+Delta-encoded streams of a world's state, for spectators & remote clients
+
+Each call to DeltaEncoder.encode produces a frame, which is either a keyframe holding the
+entire state of the world (as seen by a spectator), or a delta holding only what changed since
+the previous frame:
+    - names: the block id or thing kind for each new name code
+    - block adds: the (column, row, name code) of each block added (or replaced)
+    - block removes: the (column, row) of each block removed
+    - spawns: the (id, name code) of each dynamic thing that appeared
+    - despawns: the id of each dynamic thing that disappeared
+    - motion: the quantised position & velocity of each dynamic thing whose quantised
+              position or velocity changed
+    - stats: the health & food of each dynamic thing whose health or food changed
+
+A frame is FRAME_HEADER, followed by each section that isn't empty, in the order above, as a
+uint32 count & an array of the section's dtype; FRAME_HEADER's flags indicate which sections
+are present. The state of a world at rest (e.g. every item settled) therefore costs a few
+bytes per frame, however large the world is.
+
+Only blocks & things that are simulated are streamed; when a chunk is activated or deactivated,
+its blocks & things are streamed as added or removed.
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import json
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from dropped_item import DroppedItem
+from mob import Mob
+
+# (frame type, flags of sections present, tick)
+FRAME_HEADER = struct.Struct('<BBI')
+FRAME_DELTA = 0
+FRAME_KEYFRAME = 1
+
+COUNT = struct.Struct('<I')
+
+# Name codes are followed by their name, as length-prefixed UTF-8 JSON
+NAME_DTYPE = np.dtype([('code', '<u2'), ('length', '<u2')])
+BLOCK_DTYPE = np.dtype([('column', '<u2'), ('row', '<u2'), ('name', '<u2')])
+CELL_DTYPE = np.dtype([('column', '<u2'), ('row', '<u2')])
+SPAWN_DTYPE = np.dtype([('id', '<u4'), ('name', '<u2')])
+ID_DTYPE = np.dtype('<u4')
+MOTION_DTYPE = np.dtype([('id', '<u4'), ('x', '<i4'), ('y', '<i4'), ('vx', '<i4'), ('vy', '<i4')])
+STATS_DTYPE = np.dtype([('id', '<u4'), ('health', '<f4'), ('food', '<f4')])
+
+# Sections, in order, by (name, dtype); the flag of a section is 1 << its index
+SECTIONS = [
+    ('names', NAME_DTYPE),
+    ('block_adds', BLOCK_DTYPE),
+    ('block_removes', CELL_DTYPE),
+    ('spawns', SPAWN_DTYPE),
+    ('despawns', ID_DTYPE),
+    ('motion', MOTION_DTYPE),
+    ('stats', STATS_DTYPE),
+]
+
+# Positions & velocities are sent in units of 1 / scale pixels (per second)
+POSITION_SCALE = 8
+VELOCITY_SCALE = 8
+
+# Number of frames between keyframes
+DELTA_KEYFRAME_INTERVAL = 300
+
+# Categories of things that are streamed with an id
+DYNAMIC_CATEGORIES = ("player", "item", "mob")
+
+# The state of a dynamic thing, as decoded by DeltaDecoder
+ThingState = namedtuple('ThingState', ['kind', 'x', 'y', 'vx', 'vy', 'health', 'food'])
+
+
+def get_thing_kind(thing, category: str) -> tuple:
+    """(tuple<str, ...>) Returns the kind of a dynamic thing in 'category', as streamed"""
+    if category == "item" and isinstance(thing, DroppedItem):
+        return category, thing.get_item().get_id()
+    if category == "mob" and isinstance(thing, Mob):
+        return category, thing.get_id()
+    return category,
+
+
+class DeltaEncoder:
+    """Encodes the state of a world as a stream of frames (see module docstring)"""
+
+    def __init__(self, world, keyframe_interval: int = DELTA_KEYFRAME_INTERVAL):
+        """Constructor
+
+        Parameters:
+            world (World): The world to encode
+            keyframe_interval (int): The number of frames between keyframes, or None to only send
+                                     keyframes first & when requested (see request_keyframe)
+        """
+        self._world = world
+        self._keyframe_interval = keyframe_interval
+        self._frames_since_keyframe = None
+
+        # Cells whose blocks have changed since the last frame
+        self._changed_cells = set()
+        world.add_block_listener(self._handle_blocks_changed)
+
+        # Code of each name (block id or thing kind), and the names not yet sent
+        self._names = {}
+        self._new_names = []
+
+        # Id of each dynamic thing that has been sent, and its last sent motion & stats
+        self._ids = {}
+        self._next_id = 1
+        self._motion = {}
+        self._stats = {}
+
+    def _handle_blocks_changed(self, added, removed):
+        """Records the cells of blocks added to & removed from the world"""
+        self._changed_cells.update(added)
+        self._changed_cells.update(removed)
+
+    def _encode_name(self, name: tuple) -> int:
+        """(int) Returns the code of 'name', assigning it the next code if it is new"""
+        code = self._names.get(name)
+
+        if code is None:
+            code = self._names[name] = len(self._names)
+            self._new_names.append(name)
+
+        return code
+
+    def get_thing_id(self, thing) -> int:
+        """(int) Returns the id with which 'thing' is streamed, or None if it hasn't been sent yet"""
+        return self._ids.get(thing)
+
+    def request_keyframe(self):
+        """Makes the next frame a keyframe (e.g. for a viewer that has just joined)"""
+        self._frames_since_keyframe = None
+
+    def close(self):
+        """Stops following the world"""
+        self._world.remove_block_listener(self._handle_blocks_changed)
+
+    def encode(self, tick: int) -> bytes:
+        """(bytes) Returns the frame for the current state of the world at 'tick'"""
+        keyframe = (self._frames_since_keyframe is None
+                    or (self._keyframe_interval is not None
+                        and self._frames_since_keyframe + 1 >= self._keyframe_interval))
+
+        if keyframe:
+            self._frames_since_keyframe = 0
+            self._new_names = list(self._names)
+            self._motion = {}
+            self._stats = {}
+            self._changed_cells.clear()
+
+            block_adds = self._encode_all_blocks()
+            block_removes = []
+            previous_ids = set()
+        else:
+            self._frames_since_keyframe += 1
+
+            block_adds, block_removes = self._encode_changed_blocks()
+            previous_ids = set(self._motion)
+
+        spawns = []
+        motion = []
+        stats = []
+        current_ids = set()
+
+        for category in DYNAMIC_CATEGORIES:
+            for thing in self._world.get_things_in_categories(category):
+                thing_id = self._ids.get(thing)
+                if thing_id is None:
+                    thing_id = self._ids[thing] = self._next_id
+                    self._next_id += 1
+
+                current_ids.add(thing_id)
+                if thing_id not in previous_ids:
+                    spawns.append((thing_id, self._encode_name(get_thing_kind(thing, category))))
+
+                x, y = thing.get_position()
+                velocity = thing.get_velocity()
+                quantised = (round(x * POSITION_SCALE), round(y * POSITION_SCALE),
+                             round(velocity.x * VELOCITY_SCALE), round(velocity.y * VELOCITY_SCALE))
+
+                if self._motion.get(thing_id) != quantised:
+                    self._motion[thing_id] = quantised
+                    motion.append((thing_id, *quantised))
+
+                thing_stats = (thing.get_health(), thing.get_food() if category == "player" else 0)
+                if self._stats.get(thing_id) != thing_stats:
+                    self._stats[thing_id] = thing_stats
+                    stats.append((thing_id, *thing_stats))
+
+        despawns = sorted(previous_ids - current_ids)
+        for thing_id in despawns:
+            del self._motion[thing_id]
+            del self._stats[thing_id]
+
+        if keyframe or despawns:
+            self._ids = {thing: thing_id for thing, thing_id in self._ids.items() if thing_id in current_ids}
+
+        names, self._new_names = self._new_names, []
+
+        return self._pack(FRAME_KEYFRAME if keyframe else FRAME_DELTA, tick, {
+            'names': names,
+            'block_adds': block_adds,
+            'block_removes': block_removes,
+            'spawns': spawns,
+            'despawns': despawns,
+            'motion': motion,
+            'stats': stats,
+        })
+
+    def _encode_all_blocks(self):
+        """(list<tuple<int, int, int>>) Returns the (column, row, name code) of every block in the world"""
+        world = self._world
+        return [(*world.get_block_cell(block), self._encode_name(block.get_block_id()))
+                for block in world.get_things_in_categories("block")]
+
+    def _encode_changed_blocks(self):
+        """Returns the blocks in cells that have changed since the last frame
+
+        Return:
+            tuple<list<tuple<int, int, int>>, list<tuple<int, int>>>:
+                    The (column, row, name code) of each block added & the (column, row) of
+                    each cell that was emptied
+        """
+        adds = []
+        removes = []
+
+        for column, row in sorted(self._changed_cells):
+            block = self._world.get_block_at_cell(column, row)
+
+            if block is None:
+                removes.append((column, row))
+            else:
+                adds.append((column, row, self._encode_name(block.get_block_id())))
+
+        self._changed_cells.clear()
+
+        return adds, removes
+
+    def _pack(self, frame_type: int, tick: int, sections: dict) -> bytes:
+        """(bytes) Returns a frame containing 'sections', as per the module docstring"""
+        flags = 0
+        parts = []
+
+        for index, (section, dtype) in enumerate(SECTIONS):
+            records = sections[section]
+            if not records:
+                continue
+
+            flags |= 1 << index
+            parts.append(COUNT.pack(len(records)))
+
+            if section == 'names':
+                for name in records:
+                    data = json.dumps(name).encode('utf-8')
+                    parts.append(np.array([(self._names[name], len(data))], dtype=dtype).tobytes())
+                    parts.append(data)
+            else:
+                parts.append(np.array(records, dtype=dtype).tobytes())
+
+        return FRAME_HEADER.pack(frame_type, flags, tick) + b''.join(parts)
+
+
+class DeltaDecoder:
+    """Follows the state of a world from a stream of frames encoded by a DeltaEncoder
+
+    Frames before the first keyframe are ignored"""
+
+    def __init__(self):
+        self._names = {}
+        self._blocks = {}
+        self._things = {}
+        self._tick = None
+
+    def get_tick(self) -> int:
+        """(int) Returns the tick of the last frame applied, or None if no keyframe has been applied"""
+        return self._tick
+
+    def get_block(self, column: int, row: int) -> tuple:
+        """(tuple<*>) Returns the block id of the block at ('column', 'row'), or None if there is none"""
+        return self._blocks.get((column, row))
+
+    def get_blocks(self) -> dict:
+        """(dict<tuple<int, int>: tuple<*>>) Returns the block id of every block, by its (column, row) cell"""
+        return self._blocks
+
+    def get_things(self) -> dict:
+        """(dict<int: ThingState>) Returns the state of every dynamic thing, by its id"""
+        return self._things
+
+    def apply(self, frame: bytes) -> bool:
+        """Applies a frame to the state
+
+        Parameters:
+            frame (bytes): The frame, as per DeltaEncoder.encode
+
+        Return:
+            bool: True iff the frame was applied (i.e. not a delta before the first keyframe)
+        """
+        frame_type, flags, tick = FRAME_HEADER.unpack_from(frame)
+
+        if frame_type == FRAME_KEYFRAME:
+            self._names = {}
+            self._blocks = {}
+            self._things = {}
+        elif self._tick is None:
+            return False
+
+        self._tick = tick
+
+        offset = FRAME_HEADER.size
+        sections = {}
+
+        for index, (section, dtype) in enumerate(SECTIONS):
+            if not flags & (1 << index):
+                continue
+
+            count, = COUNT.unpack_from(frame, offset)
+            offset += COUNT.size
+
+            if section == 'names':
+                for _ in range(count):
+                    code, length = np.frombuffer(frame, dtype=dtype, count=1, offset=offset)[0].tolist()
+                    offset += dtype.itemsize
+                    self._names[code] = tuple(json.loads(frame[offset:offset + length].decode('utf-8')))
+                    offset += length
+            else:
+                sections[section] = np.frombuffer(frame, dtype=dtype, count=count, offset=offset).tolist()
+                offset += count * dtype.itemsize
+
+        names = self._names
+
+        for column, row, name in sections.get('block_adds', ()):
+            self._blocks[column, row] = names[name]
+
+        for column, row in sections.get('block_removes', ()):
+            self._blocks.pop((column, row), None)
+
+        things = self._things
+
+        for thing_id, name in sections.get('spawns', ()):
+            things[thing_id] = ThingState(names[name], 0., 0., 0., 0., 0., 0.)
+
+        for thing_id in sections.get('despawns', ()):
+            things.pop(thing_id, None)
+
+        for thing_id, x, y, vx, vy in sections.get('motion', ()):
+            things[thing_id] = things[thing_id]._replace(x=x / POSITION_SCALE, y=y / POSITION_SCALE,
+                                                         vx=vx / VELOCITY_SCALE, vy=vy / VELOCITY_SCALE)
+
+        for thing_id, health, food in sections.get('stats', ()):
+            things[thing_id] = things[thing_id]._replace(health=health, food=food)
+
+        return True
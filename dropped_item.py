@@ -1,5 +1,6 @@
 from physical_thing import DynamicThing
 from item import Item
+from inventory import Stack
 
 __author__ = "Benjamin Martin and Paul Haley"
 __version__ = "1.1.0"
@@ -8,26 +9,70 @@ __copyright__ = "The University of Queensland, 2019"
 
 
 class DroppedItem(DynamicThing):
-    """A physical representation of an Item"""
+    """A physical representation of a stack of an Item
 
-    def __init__(self, item: Item):
+    Identical items dropped together are a single DroppedItem, with a quantity"""
+
+    def __init__(self, item: Item, quantity: int = 1):
         """Constructor
 
         Parameters:
             item (Item): The conceptual item that this DroppedItem represents physically
+            quantity (int): The number of the item in this pile, at most its maximum stack size
         """
         super().__init__()
 
-        self._item = item
+        self._stack = Stack(item, quantity)
+
+        # The simple loot physics moving this item instead of a body, if any
+        self._loot = None
 
     def get_item(self) -> Item:
         """(Item) Returns the conceptual Item this DroppedItem represents"""
-        return self._item
+        return self._stack.get_item()
+
+    def get_stack(self) -> Stack:
+        """(Stack) Returns the stack of items this DroppedItem represents"""
+        return self._stack
+
+    def get_quantity(self) -> int:
+        """(int) Returns the number of items this DroppedItem represents"""
+        return self._stack.get_quantity()
+
+    def get_loot(self):
+        """(loot.SimpleLoot) Returns the simple loot physics moving this item, or None if it has a body"""
+        return self._loot
+
+    def set_loot(self, loot):
+        """Sets the simple loot physics moving this item
+
+        Called by 'loot (loot.SimpleLoot)' when it takes this item into its arrays, & with None
+        when it frees this item's slot"""
+        self._loot = loot
+
+    def get_position(self):
+        """(tuple<float, float>) Returns the (x, y) position of this item in the world"""
+        if self._loot is not None:
+            return self._loot.get_position(self)
+        return super().get_position()
+
+    def get_velocity(self):
+        """(pymunk.Vec2d) Returns the (x, y) velocity of this item"""
+        if self._loot is not None:
+            return self._loot.get_velocity(self)
+        return super().get_velocity()
+
+    def set_velocity(self, velocity):
+        """Sets the velocity of this item to 'velocity', as an (x, y) pair"""
+        if self._loot is not None:
+            self._loot.set_velocity(self, velocity)
+        else:
+            super().set_velocity(velocity)
 
     # The following methods do not require documentation as their purpose is
     # obvious/defined in the super class
     def __repr__(self):
-        return f"{self.__class__.__name__}({self._item!r})"
+        return f"{self.__class__.__name__}({self.get_item()!r}, {self.get_quantity()})"
 
     def use(self):
         pass
@@ -160,7 +160,10 @@ class WorldViewRouter(InstanceRouter):
                                       fill=instance.colours[instance._i], tags='block')]
 
     def _draw_physical_item(self, instance, shape, view):
-        return [view.create_rectangle(shape.bb.left, shape.bb.top, shape.bb.right, shape.bb.bottom,
+        # items moved by loot physics have no shape
+        bb = shape.bb if shape is not None else instance.get_loot().get_bb(instance)
+
+        return [view.create_rectangle(bb.left, bb.top, bb.right, bb.bottom,
                                       fill=self._item_colours[instance.get_item().get_id()],
                                       tags='physical_item')]
 
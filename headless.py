@@ -0,0 +1,862 @@
+"""
+Ninedraft's game logic, without any user interface
+
+Runs the game world, the player & their hot bar/inventory from an explicit stream of inputs,
+so that the game can run without tkinter (i.e. on a server, in benchmarks or in tests)
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import math
+import random
+from collections import namedtuple
+from numbers import Real
+
+import pymunk
+
+from block import create_block
+from inventory import Stack, Grid, SelectableGrid
+from item import Item, create_item
+from player import Player
+from dropped_item import DroppedItem
+from world import World
+from core import positions_in_range
+from mob import create_mob
+from terrain import TerrainGenerator, load_terrain, get_surface_rows
+from scheduler import MobScheduler
+from spawning import MobSpawner
+from snapshot import save_snapshot, load_snapshot, restore_world, restore_player, restore_stacks
+
+BLOCK_SIZE = 2 ** 5
+GRID_WIDTH = 2 ** 5
+GRID_HEIGHT = 2 ** 4
+
+# Physics is advanced in fixed time steps (in seconds), each split into sub-steps, so that
+# a slow frame can't produce a single huge step
+PHYSICS_TIME_STEP = 1 / 60
+PHYSICS_SUB_STEPS = 2
+PHYSICS_MAX_STEPS_PER_FRAME = 5
+
+# Collision hulls of blocks are merged within square tiles of this many cells
+TERRAIN_MESH_TILE_SIZE = 16
+
+# Number of item bodies & shapes built when the game starts, so that mining doesn't build them
+ITEM_POOL_RESERVE = 32
+
+# Column above which the player starts in a generated world
+SPAWN_COLUMN = 7
+
+# Position at which the player starts in the simple world
+SIMPLE_WORLD_SPAWN = (250, 150)
+
+# Change in the player's velocity per move & jump input, in pixels per second
+MOVE_SPEED = 80
+JUMP_SPEED = 160
+
+# Task 3/Post-grad only:
+# Class to hold game data that is passed to each thing's step function
+# Normally, this class would be defined in a separate file
+# so that type hinting could be used on PhysicalThing & its
+# subclasses, but since it will likely need to be extended
+# for these tasks, we have defined it here
+GameData = namedtuple('GameData', ['world', 'player'])
+
+# Each input is a tuple of (input_type, *arguments); the input types, their arguments and
+# the method that handles them are:
+#   - ('move', dx, dy): Accelerates the player in the direction (dx, dy)
+#   - ('jump',): Makes the player jump
+#   - ('target', x, y): Moves the target (i.e. the cursor) to the point (x, y)
+#   - ('mine',): Mines the targeted block, if it is in range (i.e. left click)
+#   - ('use',): Uses the targeted thing, else places the selected item (i.e. right click)
+#   - ('select', column): Toggles selection of the hot bar cell in column (i.e. number keys)
+#   - ('effect', effect): Runs an effect, such as ('crafting', 'basic')
+INPUT_HANDLERS = {
+    'move': 'move',
+    'jump': 'jump',
+    'target': 'set_target',
+    'mine': 'mine_target',
+    'use': 'use_target',
+    'select': 'select_hot_bar',
+    'effect': 'run_effect',
+}
+
+# Input types that clients (e.g. of a server or a runner) may send, and the number of arguments of each; effects can't be
+# sent, since they are the results of using things in the world
+CLIENT_INPUTS = {
+    'move': 2,
+    'jump': 0,
+    'target': 2,
+    'mine': 0,
+    'use': 0,
+    'select': 1,
+}
+
+STARTING_HOT_BAR = [
+    Stack(create_item("dirt"), 20),
+    Stack(create_item("apple"), 4)
+]
+
+STARTING_INVENTORY = [
+    ((1, 5), Stack(Item('dirt'), 10)),
+    ((0, 2), Stack(Item('wood'), 10)),
+]
+
+
+def load_simple_world(world, rng=random):
+    """Loads blocks into a world
+
+    Parameters:
+        world (World): The game world to load with blocks
+        rng (random.Random): The source of randomness; defaults to the random module
+    """
+    block_weights = [
+        (100, 'dirt'),
+        (30, 'stone'),
+    ]
+
+    cells = {}
+
+    ground = []
+
+    width, height = world.get_grid_size()
+
+    for x in range(width):
+        for y in range(height):
+            if x < 22:
+                if y <= 8:
+                    continue
+            else:
+                if x + y < 30:
+                    continue
+
+            ground.append((x, y))
+
+    weights, blocks = zip(*block_weights)
+    kinds = rng.choices(blocks, weights=weights, k=len(ground))
+
+    for cell, block_id in zip(ground, kinds):
+        cells[cell] = create_block(block_id)
+
+    trunks = [(3, 8), (3, 7), (3, 6), (3, 5)]
+
+    for trunk in trunks:
+        cells[trunk] = create_block('wood')
+
+    leaves = [(4, 3), (3, 3), (2, 3), (4, 2), (3, 2), (2, 2), (4, 4), (3, 4), (2, 4)]
+
+    for leaf in leaves:
+        cells[leaf] = create_block('leaf')
+
+    cells[14, 8] = create_block("mayhem", 0)
+
+    world.add_blocks((block, i, j) for (i, j), block in cells.items())
+
+    world.add_mob(create_mob("friendly_bird", rng=rng), 400, 100)
+
+
+def _is_cell_stored(world, column: int, row: int) -> bool:
+    """(bool) Returns True iff the chunk containing the grid cell at ('column', 'row') is held by
+    the world's chunk store, in which case its blocks come from there rather than from generation"""
+    store = world.get_chunk_store()
+    if store is None:
+        return False
+
+    return store.has_chunk(*world.get_chunk_at_cell(column, row).get_position())
+
+
+def load_generated_world(world, seed, rng=random):
+    """Loads procedurally generated terrain into a world, along with a trick candle & a bird
+
+    Chunks that the world's chunk store already holds keep their stored blocks (see
+    terrain.load_terrain), so that edits saved to the store survive a new game
+
+    Parameters:
+        world (World): The game world to load with blocks
+        seed (int): The seed from which to generate terrain
+        rng (random.Random): The source of randomness for the bird; defaults to the random module
+
+    Return:
+        tuple<int, int>: The (x, y) position above the ground at which to add the player
+    """
+    generator = TerrainGenerator(seed)
+    codes = generator.generate(world.get_grid_size())
+    load_terrain(world, codes, generator.get_block_ids())
+
+    surface = get_surface_rows(codes)
+    columns, rows = world.get_grid_size()
+
+    mayhem_column = min(14, columns - 1)
+    mayhem_row = int(surface[mayhem_column]) - 1
+    if mayhem_row >= 0 and not _is_cell_stored(world, mayhem_column, mayhem_row):
+        world.add_block_to_grid(create_block("mayhem", 0), mayhem_column, mayhem_row)
+
+    world.add_mob(create_mob("friendly_bird", rng=rng), 400, 100)
+
+    spawn_column = min(SPAWN_COLUMN, columns - 1)
+    return world.grid_to_xy_centre(spawn_column, max(0, int(surface[spawn_column]) - 2))
+
+
+def is_valid_input(game_input, pixel_size=None) -> bool:
+    """Returns True iff 'game_input' may be sent by a client (e.g. of a server or a runner)
+
+    Parameters:
+        game_input (tuple<str, *>): The input sent
+        pixel_size (tuple<float, float>): The (width, height) of the world in pixels, within
+                                          which targets must be; or None to allow any target
+
+    Return:
+        bool: True iff the input is valid
+    """
+    if not isinstance(game_input, tuple) or not game_input or not isinstance(game_input[0], str):
+        return False
+
+    input_type, *args = game_input
+
+    if CLIENT_INPUTS.get(input_type) != len(args):
+        return False
+
+    if input_type == 'move':
+        return all(isinstance(arg, int) and -1 <= arg <= 1 for arg in args)
+    elif input_type == 'target':
+        if not all(isinstance(arg, Real) and math.isfinite(arg) for arg in args):
+            return False
+
+        return pixel_size is None or all(0 <= arg < size for arg, size in zip(args, pixel_size))
+    elif input_type == 'select':
+        return isinstance(args[0], int) and 0 <= args[0] < 10
+
+    return True
+
+
+class PlayerController:
+    """A player in a headless game, along with their hot bar, inventory & target, controlled by
+    explicit inputs (see INPUT_HANDLERS)"""
+
+    def __init__(self, game, player: Player, on_craft=None):
+        """Constructor
+
+        Parameters:
+            game (HeadlessGame): The game that the player is in
+            player (Player): The player to control, which must already be in the game's world
+            on_craft (callable<str>): Called with the craft type whenever a crafting effect is run,
+                                      or None to ignore crafting
+        """
+        self._game = game
+        self._world = game.get_world()
+        self._player = player
+        self._on_craft = on_craft
+
+        self._hot_bar = SelectableGrid(rows=1, columns=10)
+        self._hot_bar.select((0, 0))
+
+        for i, stack in enumerate(STARTING_HOT_BAR):
+            self._hot_bar[0, i] = stack.copy()
+
+        self._hands = create_item('hands')
+
+        self._inventory = Grid(rows=3, columns=10)
+        for position, stack in STARTING_INVENTORY:
+            self._inventory[position] = stack.copy()
+
+        self._target_in_range = False
+        self._target_position = 0, 0
+
+    def _log(self, message):
+        """Prints 'message (str)' iff the game is verbose"""
+        self._game._log(message)
+
+    def get_player(self) -> Player:
+        """(Player) Returns the player"""
+        return self._player
+
+    def get_hot_bar(self) -> SelectableGrid:
+        """(SelectableGrid) Returns the player's hot bar"""
+        return self._hot_bar
+
+    def get_inventory(self) -> Grid:
+        """(Grid) Returns the player's inventory"""
+        return self._inventory
+
+    def get_target_position(self):
+        """(tuple<float, float>) Returns the (x, y) position of the target"""
+        return self._target_position
+
+    def is_target_in_range(self) -> bool:
+        """(bool) Returns True iff the target is within range of the player's held item"""
+        return self._target_in_range
+
+    def apply_inputs(self, inputs):
+        """Applies inputs to the player, in order
+
+        Parameters:
+            inputs (iterable<tuple<str, *>>): The inputs to apply; see INPUT_HANDLERS
+        """
+        for input_type, *args in inputs:
+            if input_type not in INPUT_HANDLERS:
+                raise KeyError(f"No input defined for {input_type!r}")
+
+            getattr(self, INPUT_HANDLERS[input_type])(*args)
+
+    def select_hot_bar(self, column):
+        """Selects the hot bar cell in 'column (int)', or deselects it if it is already selected"""
+        selected = self._hot_bar.get_selected()
+        if selected is None:
+            self._hot_bar.select((0, column))
+        elif selected[1] == column:
+            self._hot_bar.deselect()
+        else:
+            self._hot_bar.select((0, column))
+
+    def move(self, dx, dy):
+        """Accelerates the player in the direction ('dx', 'dy')"""
+        velocity = self._player.get_velocity()
+        self._player.set_velocity((velocity.x + dx * MOVE_SPEED, velocity.y + dy * MOVE_SPEED))
+
+    def jump(self):
+        """Makes the player jump"""
+        velocity = self._player.get_velocity()
+        # Task 1.2: Update the player's velocity here
+        self._player.set_velocity((velocity.x, velocity.y - JUMP_SPEED))
+
+    def set_target(self, x, y):
+        """Moves the target to the point ('x', 'y')"""
+        self._target_position = x, y
+        self.check_target()
+
+    def mine_target(self):
+        """Mines the targeted block, if it is in range"""
+        x, y = self._target_position
+
+        if self._target_in_range:
+            block = self._world.get_block(x, y)
+            if block:
+                self.mine_block(block, x, y)
+
+    def mine_block(self, block, x, y):
+        rng = self._game.get_rng()
+        luck = rng.random()
+
+        active_item, effective_item = self.get_holding()
+
+        was_item_suitable, was_attack_successful = block.mine(effective_item, active_item, luck)
+
+        effective_item.attack(was_attack_successful)
+
+        if block.is_mined():
+            # Task 1.2 Mouse Controls: Reduce the player's food/health appropriately
+            if self._player.get_food() > 0:
+                self._player.change_food(-0.5)
+            elif self._player.get_health() > 0:
+                self._player.change_health(-0.5)
+
+            # Task 1.2 Mouse Controls: Remove the block from the world & get its drops
+            self._world.remove_block(block)
+            drops = block.get_drops(luck, was_item_suitable)
+
+            if not drops:
+                return
+
+            x0, y0 = block.get_position()
+
+            # identical drops are grouped into a single pile (as a stack), in order of first drop
+            piles = {}
+            for drop in drops:
+                piles[drop] = piles.get(drop, 0) + 1
+
+            i = 0
+            for (drop_category, drop_types), quantity in piles.items():
+                self._log(f'Dropped {quantity} {drop_category}, {drop_types}')
+
+                if drop_category == "item":
+                    # more than a full stack is dropped as several piles
+                    while quantity > 0:
+                        item = create_item(*drop_types)
+                        physical = DroppedItem(item, min(quantity, item.get_max_stack_size()))
+                        quantity -= physical.get_quantity()
+
+                        # this is so bleh
+                        x = x0 - BLOCK_SIZE // 2 + 5 + (i % 3) * 11 + rng.randint(0, 2)
+                        y = y0 - BLOCK_SIZE // 2 + 5 + ((i // 3) % 3) * 11 + rng.randint(0, 2)
+                        i += 1
+
+                        self._world.add_item(physical, x, y)
+                elif drop_category == "block":
+                    self._world.add_block(create_block(*drop_types), x, y)
+                else:
+                    raise KeyError(f"Unknown drop category {drop_category}")
+
+    def get_holding(self):
+        active_stack = self._hot_bar.get_selected_value()
+        active_item = active_stack.get_item() if active_stack else self._hands
+
+        effective_item = active_item if active_item.can_attack() else self._hands
+
+        return active_item, effective_item
+
+    def check_target(self):
+        # select target block, if possible
+        active_item, effective_item = self.get_holding()
+
+        pixel_range = active_item.get_attack_range() * self._world.get_cell_expanse()
+
+        self._target_in_range = positions_in_range(self._player.get_position(),
+                                                   self._target_position,
+                                                   pixel_range)
+
+    def run_effect(self, effect):
+        if len(effect) == 2:
+            if effect[0] == "crafting":
+                craft_type = effect[1]
+
+                if craft_type == "basic":
+                    self._log("Can't craft much on a 2x2 grid :/")
+
+                elif craft_type == "crafting_table":
+                    self._log("Let's get our kraft® on! King of the brands")
+
+                if self._on_craft:
+                    self._on_craft(craft_type)
+                return
+            elif effect[0] in ("food", "health"):
+                stat, strength = effect
+                self._log(f"Gaining {strength} {stat}!")
+                getattr(self._player, f"change_{stat}")(strength)
+                return
+
+        raise KeyError(f"No effect defined for {effect}")
+
+    def use_target(self):
+        """Uses the targeted thing, if there is one, otherwise places the selected item at the
+        target; does nothing if the target is off the grid, or if a block would be placed in a
+        cell that is already full"""
+        x, y = self._target_position
+        if not self._world.is_cell_on_grid(*self._world.xy_to_grid(x, y)):
+            return
+
+        target = self._world.get_thing(x, y)
+
+        if target:
+            # use this thing
+            self._log(f'using {target}')
+            effect = target.use()
+            self._log(f'used {target} and got {effect}')
+
+            if effect:
+                self.run_effect(effect)
+
+        else:
+            # place active item
+            selected = self._hot_bar.get_selected()
+
+            if not selected:
+                return
+
+            stack = self._hot_bar[selected]
+            if not stack:
+                return
+
+            drops = stack.get_item().place()
+
+            # handling multiple drops would be somewhat finicky, so prevent it
+            if drops and len(drops) > 1:
+                raise NotImplementedError("Cannot handle dropping more than 1 thing")
+
+            if drops and drops[0][0] == "block" and self._world.get_block(x, y):
+                # the target cell is full, so the block can't be placed & the item isn't used up
+                return
+
+            stack.subtract(1)
+            if stack.get_quantity() == 0:
+                # remove from hotbar
+                self._hot_bar[selected] = None
+
+            if not drops:
+                return
+
+            drop_category, drop_types = drops[0]
+
+            if drop_category == "block":
+                self._world.add_block(create_block(drop_types[0]), x, y)
+
+            elif drop_category == "effect":
+                self.run_effect(drop_types)
+
+            else:
+                raise KeyError(f"Unknown drop category {drop_category}")
+
+    def pick_up(self, dropped_item: DroppedItem) -> bool:
+        """Picks up as many of a (dropped) pile of items that the player collided with as fit in
+        their hot bar & inventory, removing it from the game world once all have been picked up
+
+        Return:
+            bool: True iff the whole pile was picked up
+        """
+        item = dropped_item.get_item()
+        stack = dropped_item.get_stack()
+
+        for name, grid in (("hotbar", self._hot_bar), ("inventory", self._inventory)):
+            quantity = stack.get_quantity()
+            if not quantity:
+                break
+
+            grid.add_items(stack)
+            if stack.get_quantity() < quantity:
+                self._log(f"Added {quantity - stack.get_quantity()} {item!r} to the {name}")
+
+        if not stack.is_empty():
+            self._log(f"Found {stack.get_quantity()} {item!r}, but both hotbar & inventory are full")
+            return False
+
+        self._world.remove_item(dropped_item)
+        return True
+
+
+class HeadlessGame:
+    """The game logic of Ninedraft, driven by explicit inputs (see INPUT_HANDLERS)
+
+    Each call to tick applies some inputs, then advances the world by exactly one fixed time
+    step, independently of real time. Alternatively, step advances the world by the real time
+    that has passed, for use by an interactive view.
+
+    The inputs given to tick & step control the game's (main) player; more players can join the
+    same world with add_player, each with their own PlayerController (e.g. on a server).
+
+    All of the game's randomness comes from a random.Random seeded with the game's seed, so a
+    game ticked with the same inputs always plays out the same (see replay.py).
+    """
+
+    def __init__(self, seed=None, grid_size=(GRID_WIDTH, GRID_HEIGHT), on_craft=None, verbose=False,
+                 snapshot: bytes = None, spawn_player=True, generated=True, **world_options):
+        """Constructor
+
+        Parameters:
+            seed (int): The seed from which to generate the world, or None for a random seed
+            grid_size (tuple<int, int>): The (column, row) size of the world's grid
+            on_craft (callable<str>): Called with the craft type whenever a crafting effect is run
+                                      (e.g. to show a crafting window), or None to ignore crafting
+            verbose (bool): If True, prints messages about what happens in the game
+            snapshot (bytes): If not None, a snapshot (see save) from which to restore the game,
+                              instead of generating a new world; seed, grid_size & generated
+                              are ignored
+            spawn_player (bool): If False, the game has no main player, and players can only join
+                                 with add_player (e.g. on a dedicated server)
+            generated (bool): If True, the world is generated from the seed (see
+                              load_generated_world) & mobs are spawned around players (see
+                              spawning.MobSpawner), otherwise it is the simple, hand-built world
+                              (see load_simple_world), with no mobs but its own
+            world_options: Keyword arguments to be given to the World on creation, overriding
+                           the default physics & terrain meshing
+        """
+        if snapshot is not None:
+            snapshot = load_snapshot(snapshot)
+            seed = snapshot.metadata['seed']
+            grid_size = snapshot.grid_size
+            generated = snapshot.metadata.get('generated', True)
+
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self._seed = seed
+
+        self._rng = random.Random(seed)
+        if snapshot is not None:
+            version, state, gauss = snapshot.metadata['rng']
+            self._rng.setstate((version, tuple(state), gauss))
+
+        self._recorder = None
+        self._generated = generated
+
+        self._verbose = verbose
+
+        options = {
+            'time_step': PHYSICS_TIME_STEP,
+            'sub_steps': PHYSICS_SUB_STEPS,
+            'max_steps_per_frame': PHYSICS_MAX_STEPS_PER_FRAME,
+            'mesh_tile_size': TERRAIN_MESH_TILE_SIZE,
+            'mob_scheduler': MobScheduler(),
+        }
+        if generated:
+            # the simple world keeps only its own bird, as it always has
+            options['mob_spawner'] = MobSpawner(rng=self._rng)
+        options.update(world_options)
+        self._world_options = world_options
+
+        self._world = World(grid_size, BLOCK_SIZE, **options)
+        self._world.fill_item_pool(ITEM_POOL_RESERVE)
+
+        if snapshot is None and generated:
+            self._spawn_position = load_generated_world(self._world, seed, rng=self._rng)
+        elif snapshot is None:
+            load_simple_world(self._world, rng=self._rng)
+            self._spawn_position = SIMPLE_WORLD_SPAWN
+        else:
+            restore_world(self._world, snapshot, rng=self._rng)
+            self._spawn_position = tuple(snapshot.metadata.get('spawn', self._world.grid_to_xy_centre(
+                min(SPAWN_COLUMN, grid_size[0] - 1), 0)))
+
+        self._world.add_collision_handler("player", "item", on_begin=self._handle_player_collide_item)
+
+        # Controller of each player in the world, by their player
+        self._controllers = {}
+        self._controller = None
+
+        if spawn_player:
+            player = Player()
+
+            if snapshot is None or snapshot.player is None:
+                self._world.add_player(player, *self._spawn_position)
+            else:
+                restore_player(self._world, player, snapshot)
+
+            self._controller = self._controllers[player] = PlayerController(self, player, on_craft=on_craft)
+
+        self._ticks = 0
+
+        if snapshot is not None:
+            self._ticks = snapshot.metadata['ticks']
+
+            if self._controller is not None and snapshot.player is not None:
+                hot_bar = self._controller.get_hot_bar()
+                restore_stacks([hot_bar, self._controller.get_inventory()], snapshot)
+
+                selected = snapshot.metadata['selected']
+                if selected is None:
+                    hot_bar.deselect()
+                else:
+                    hot_bar.select(tuple(selected))
+
+                self.set_target(*snapshot.metadata['target'])
+
+    def save(self) -> bytes:
+        """(bytes) Returns a snapshot of this game, from which it can be restored (see snapshot.py)
+
+        Only the main player is saved; players that joined with add_player are not"""
+        metadata = {
+            'seed': self._seed,
+            'ticks': self._ticks,
+            'spawn': self._spawn_position,
+            'generated': self._generated,
+            'rng': self._rng.getstate(),
+        }
+
+        if self._controller is None:
+            return save_snapshot(self._world, metadata=metadata)
+
+        hot_bar = self._controller.get_hot_bar()
+        metadata['selected'] = hot_bar.get_selected()
+        metadata['target'] = self._controller.get_target_position()
+
+        return save_snapshot(self._world, self._controller.get_player(),
+                             [hot_bar, self._controller.get_inventory()], metadata=metadata)
+
+    def _log(self, message):
+        """Prints 'message (str)' iff this game is verbose"""
+        if self._verbose:
+            print(message)
+
+    def get_seed(self) -> int:
+        """(int) Returns the seed from which the world was generated"""
+        return self._seed
+
+    def is_generated(self) -> bool:
+        """(bool) Returns True iff the world was generated from the seed, rather than being the
+        simple, hand-built world"""
+        return self._generated
+
+    def get_world_options(self) -> dict:
+        """(dict) Returns the keyword arguments given to the World on creation, beyond the defaults"""
+        return self._world_options
+
+    def get_rng(self) -> random.Random:
+        """(random.Random) Returns the source of all of the game's randomness"""
+        return self._rng
+
+    def set_recorder(self, recorder):
+        """Sets the recorder to be given every input applied to this game
+
+        Parameters:
+            recorder (replay.InputRecorder): The recorder, or None to stop recording
+        """
+        self._recorder = recorder
+
+    def get_world(self) -> World:
+        """(World) Returns the game world"""
+        return self._world
+
+    def get_spawn_position(self):
+        """(tuple<float, float>) Returns the (x, y) position at which players join the world"""
+        return self._spawn_position
+
+    def add_player(self, on_craft=None) -> PlayerController:
+        """Adds a new player to the world at the spawn position
+
+        Parameters:
+            on_craft (callable<str>): Called with the craft type whenever the player runs a
+                                      crafting effect, or None to ignore crafting
+
+        Return:
+            PlayerController: The controller of the new player, to which their inputs are applied
+        """
+        player = Player()
+        self._world.add_player(player, *self._spawn_position)
+
+        controller = self._controllers[player] = PlayerController(self, player, on_craft=on_craft)
+        controller.check_target()
+
+        return controller
+
+    def remove_player(self, controller: PlayerController):
+        """Removes a player added with add_player from the world"""
+        player = controller.get_player()
+
+        del self._controllers[player]
+        self._world.remove_player(player)
+
+    def get_controllers(self):
+        """(list<PlayerController>) Returns the controllers of every player, main player first"""
+        return list(self._controllers.values())
+
+    def get_controller(self) -> PlayerController:
+        """(PlayerController) Returns the controller of the main player, or None if there is none"""
+        return self._controller
+
+    def get_player(self) -> Player:
+        """(Player) Returns the player"""
+        return self._controller.get_player()
+
+    def get_hot_bar(self) -> SelectableGrid:
+        """(SelectableGrid) Returns the player's hot bar"""
+        return self._controller.get_hot_bar()
+
+    def get_inventory(self) -> Grid:
+        """(Grid) Returns the player's inventory"""
+        return self._controller.get_inventory()
+
+    def get_ticks(self) -> int:
+        """(int) Returns the number of ticks that have passed"""
+        return self._ticks
+
+    def get_game_data(self) -> GameData:
+        """(GameData) Returns the data passed to each thing when it is stepped"""
+        return GameData(self._world, None if self._controller is None else self._controller.get_player())
+
+    def get_target_position(self):
+        """(tuple<float, float>) Returns the (x, y) position of the target"""
+        return self._controller.get_target_position()
+
+    def is_target_in_range(self) -> bool:
+        """(bool) Returns True iff the target is within range of the player's held item"""
+        return self._controller.is_target_in_range()
+
+    def is_over(self) -> bool:
+        """(bool) Returns True iff the game is over, since the main player has died"""
+        return self._controller is not None and self._controller.get_player().get_health() == 0
+
+    def apply_inputs(self, inputs):
+        """Applies inputs to the game's main player, in order
+
+        Parameters:
+            inputs (iterable<tuple<str, *>>): The inputs to apply; see INPUT_HANDLERS
+
+        Raises:
+            ValueError if there are inputs, but no main player
+        """
+        inputs = list(inputs)
+
+        if self._recorder is not None:
+            self._recorder.record(self, inputs)
+
+        if self._controller is not None:
+            self._controller.apply_inputs(inputs)
+        elif inputs:
+            raise ValueError("Cannot apply inputs to a game without a main player")
+
+    def tick(self, inputs=()):
+        """Applies inputs, then advances the game by exactly one fixed time step
+
+        Parameters:
+            inputs (iterable<tuple<str, *>>): The inputs to apply; see INPUT_HANDLERS
+        """
+        self.apply_inputs(inputs)
+
+        self._world.advance(self._world.get_time_step(), self.get_game_data())
+        self._ticks += 1
+
+        self.check_target()
+
+    def step(self, inputs=()):
+        """Applies inputs, then advances the game by the real time passed since the last step
+
+        Parameters:
+            inputs (iterable<tuple<str, *>>): The inputs to apply; see INPUT_HANDLERS
+        """
+        self.apply_inputs(inputs)
+
+        self._ticks += self._world.step(self.get_game_data())
+
+        self.check_target()
+
+    def select_hot_bar(self, column):
+        """Selects the hot bar cell in 'column (int)', or deselects it if it is already selected"""
+        self._controller.select_hot_bar(column)
+
+    def move(self, dx, dy):
+        """Accelerates the player in the direction ('dx', 'dy')"""
+        self._controller.move(dx, dy)
+
+    def jump(self):
+        """Makes the player jump"""
+        self._controller.jump()
+
+    def set_target(self, x, y):
+        """Moves the target to the point ('x', 'y')"""
+        self._controller.set_target(x, y)
+
+    def mine_target(self):
+        """Mines the targeted block, if it is in range"""
+        self._controller.mine_target()
+
+    def mine_block(self, block, x, y):
+        self._controller.mine_block(block, x, y)
+
+    def get_holding(self):
+        return self._controller.get_holding()
+
+    def check_target(self):
+        """Updates whether each player's target is in range"""
+        for controller in self._controllers.values():
+            controller.check_target()
+
+    def run_effect(self, effect):
+        self._controller.run_effect(effect)
+
+    def use_target(self):
+        """Uses the targeted thing, if there is one, otherwise places the selected item at the target"""
+        self._controller.use_target()
+
+    def _handle_player_collide_item(self, player: Player, dropped_item: DroppedItem, data,
+                                    arbiter: pymunk.Arbiter):
+        """Callback to handle collision between the player and a (dropped) item. If the player has sufficient space in
+        their to pick up the item, the item will be removed from the game world.
+
+        Parameters:
+            player (Player): The player that was involved in the collision
+            dropped_item (DroppedItem): The (dropped) item that the player collided with
+            data (dict): data that was added with this collision handler (see data parameter in
+                         World.add_collision_handler)
+            arbiter (pymunk.Arbiter): Data about a collision
+                                      (see http://www.pymunk.org/en/latest/pymunk.html#pymunk.Arbiter)
+                                      NOTE: you probably won't need this
+        Return:
+             bool: False (always ignore this type of collision)
+                   (more generally, collision callbacks return True iff the collision should be considered valid; i.e.
+                   returning False makes the world ignore the collision)
+        """
+        controller = self._controllers.get(player)
+
+        if controller is None or not controller.pick_up(dropped_item):
+            return True
+
+        return False
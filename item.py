@@ -164,6 +164,64 @@ class BlockItem(Item):
         pass
 
 
+class FoodItem(Item):
+
+    def __init__(self, item_id: str, strength: float):
+        super(FoodItem, self).__init__(item_id)
+        self._strength = strength
+
+    def get_strength(self):
+        return self._strength
+
+    def can_attack(self) -> bool:
+        return False
+
+    def place(self):
+        return [('effect', ('food', self._strength))]
+
+    def get_durability(self):
+        pass
+
+    def get_max_durability(self):
+        pass
+
+    def attack(self, successful):
+        pass
+
+
+class ToolItem(Item):
+
+    def __init__(self, item_id: str, tool_type: str, durability: float):
+        super(ToolItem, self).__init__(item_id)
+        self._tool_type = tool_type
+        self._durability = durability
+
+    def get_type(self):
+        return self._tool_type
+
+    def can_attack(self) -> bool:
+        if self._durability > 0:
+            return True
+        return False
+
+    def place(self):
+        pass
+
+    def get_durability(self):
+        return self._durability
+
+    def get_max_durability(self):
+        for tool, duration in TOOL_DURABILITIES:
+            if tool == self._tool_type:
+                return duration
+
+    def attack(self, successful):
+        if successful:
+            return True
+        else:
+            self._durability -= 1
+
+
 # Default mapping of resource to durability for tools crafted from a given resource
 TOOL_DURABILITIES = {
     "wood": 60,
@@ -175,3 +233,54 @@ TOOL_DURABILITIES = {
 
 # Types of tools that can be made from a resource (material)
 MATERIAL_TOOL_TYPES = {"axe", "shovel", "hoe", "pickaxe", "sword"}
+
+
+def create_item(*item_id):
+    """(Item) Creates an item (this function can be thought of as a item factory)
+
+    Parameters:
+        item_id (*tuple): N-length tuple to uniquely identify the item,
+        often comprised of strings, but not necessarily (arguments are grouped
+        into a single tuple)
+
+    Examples:
+        >>> create_item("dirt")
+        BlockItem('dirt')
+        >>> create_item("hands")
+        HandItem('hands')
+        >>> create_item("pickaxe", "stone")  # *without* Task 2.1.2 implemented
+        Traceback (most recent call last):
+        ...
+        NotImplementedError: "Tool creation is not yet handled"
+        >>> create_item("pickaxe", "stone")  # *with* Task 2.1.2 implemented
+        ToolItem('stone_pickaxe')
+    """
+    if len(item_id) == 2:
+
+        if item_id[0] in MATERIAL_TOOL_TYPES and item_id[1] in TOOL_DURABILITIES:
+            raise NotImplementedError("Tool creation is not yet handled")
+
+    elif len(item_id) == 1:
+
+        item_type = item_id[0]
+
+        if item_type == "hands":
+            return HandItem("hands")
+
+        elif item_type == "dirt":
+            return BlockItem(item_type)
+
+        # Task 1.4 Basic Items: Create wood & stone here
+        elif item_type == "wood" or item_type == "stone":
+            return BlockItem(item_type)
+
+        elif item_type == "apple":
+            return FoodItem(item_type, 2)
+
+        elif item_type == "crafting_table":
+            return BlockItem(item_type)
+
+        elif item_type == "stick":
+            return SimpleItem(item_type)
+
+    raise KeyError(f"No item defined for {item_id}")
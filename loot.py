@@ -0,0 +1,381 @@
+"""
+Simple, grid-aligned physics for dropped items, integrated in bulk outside of the physics engine
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import time
+from collections import deque
+
+import numpy as np
+import pymunk
+
+# Number of slots initially allocated in the arrays; doubled whenever they are full
+LOOT_CAPACITY = 256
+
+# Furthest an item can move along each axis in a single step, as a fraction of the cell expanse,
+# so that items can't pass through a block
+LOOT_MAX_STEP = .5
+
+# Tolerance (in pixels) by which an item's edges may touch a neighbouring cell without
+# overlapping it (e.g. the block an item is resting on)
+LOOT_EDGE_TOLERANCE = 1e-3
+
+# Number of recent ticks over which step times are averaged
+LOOT_TIME_HISTORY = 60
+
+
+class SimpleLoot:
+    """Moves dropped items without bodies or shapes, holding their positions & velocities in
+    arrays, one slot per item
+
+    Used as the loot physics of a World (see World's loot_physics parameter), which then adds
+    items to this rather than to the physical space, and steps it once per tick. Each tick,
+    for the items that aren't resting, together:
+        - gravity is applied to their velocities
+        - they are moved along each axis in turn, and stopped at the edge of any solid grid cell
+          they would move into (found by looking up the cells at their leading edges); cells
+          off the grid are solid
+        - those that land on a block are brought to rest, and not moved again until a block is
+          added or removed in or next to their cell, or their velocity is set
+        - those inside a block (e.g. one placed on them) are pushed up out of its cell
+
+    Items must be no larger than a grid cell. They don't collide with each other, with mobs
+    or with players. Instead, items overlapping a player are found by a proximity check and, if
+    players & items collide (see World.collides), the world's ("player", "item") collision
+    handler (see World.add_collision_handler) is called with the player, the item, the
+    handler's data & None (for the arbiter): on_begin when they first overlap, and on_separate
+    once they no longer do.
+    """
+
+    def __init__(self, capacity: int = LOOT_CAPACITY):
+        """Constructor
+
+        Parameters:
+            capacity (int): The number of slots to allocate initially
+        """
+        # Item in each slot, & the slot of each item
+        self._items = []
+        self._slots = {}
+
+        self._positions = np.zeros((capacity, 2))
+        self._velocities = np.zeros((capacity, 2))
+        # Half of the (width, height) of each item
+        self._halves = np.zeros((capacity, 2))
+        self._resting = np.zeros(capacity, dtype=bool)
+
+        self._cell_expanse = 1
+        # Whether each grid cell has a block, indexed by [column + 1][row + 1], with a border of
+        # solid cells around the grid
+        self._solid = np.ones((2, 2), dtype=bool)
+
+        # Items overlapping each player, as an ordered set
+        self._contacts = {}
+
+        self._moved = 0
+        self._landed = 0
+        self._times = deque(maxlen=LOOT_TIME_HISTORY)
+
+    def attach(self, world):
+        """Starts following the blocks of 'world'
+
+        Called by 'world (World)' on creation; a SimpleLoot can only be used by one world"""
+        self._cell_expanse = world.get_cell_expanse()
+
+        columns, rows = world.get_grid_size()
+        self._solid = np.ones((columns + 2, rows + 2), dtype=bool)
+        self._solid[1:-1, 1:-1] = False
+
+        for column in range(columns):
+            for row in range(rows):
+                if world.get_block_at_cell(column, row) is not None:
+                    self._solid[column + 1, row + 1] = True
+
+        world.add_block_listener(self._handle_blocks_changed)
+
+    def _handle_blocks_changed(self, added_cells, removed_cells):
+        """Updates the solid cells, and wakes the items resting in or next to any changed cell"""
+        for column, row in added_cells:
+            self._solid[column + 1, row + 1] = True
+
+        for column, row in removed_cells:
+            self._solid[column + 1, row + 1] = False
+
+        cells = added_cells + removed_cells
+        count = len(self._items)
+        if not count:
+            return
+
+        columns, rows = zip(*cells)
+        expanse = self._cell_expanse
+
+        # one check around all of the cells, since waking a few more items is harmless
+        positions = self._positions[:count]
+        nearby = ((positions[:, 0] >= (min(columns) - 1) * expanse)
+                  & (positions[:, 0] < (max(columns) + 2) * expanse)
+                  & (positions[:, 1] >= (min(rows) - 1) * expanse)
+                  & (positions[:, 1] < (max(rows) + 2) * expanse))
+
+        self._resting[:count][nearby] = False
+
+    def _grow(self):
+        """Doubles the number of slots in the arrays"""
+        self._positions = np.concatenate((self._positions, np.zeros_like(self._positions)))
+        self._velocities = np.concatenate((self._velocities, np.zeros_like(self._velocities)))
+        self._halves = np.concatenate((self._halves, np.zeros_like(self._halves)))
+        self._resting = np.concatenate((self._resting, np.zeros_like(self._resting)))
+
+    def add_item(self, item, x: float, y: float, size):
+        """Takes an item that has been added to the world into the arrays, centred at ('x', 'y'),
+        with no velocity
+
+        Parameters:
+            item (DroppedItem): The item to add
+            x (float): The x-coordinate of the item's centre
+            y (float): The y-coordinate of the item's centre
+            size (tuple<float, float>): The (width, height) of the item
+        """
+        slot = len(self._items)
+        if slot == len(self._resting):
+            self._grow()
+
+        width, height = size
+        self._positions[slot] = x, y
+        self._velocities[slot] = 0, 0
+        self._halves[slot] = width / 2, height / 2
+        self._resting[slot] = False
+
+        self._items.append(item)
+        self._slots[item] = slot
+
+        item.set_loot(self)
+
+    def remove_item(self, item):
+        """Frees the slot of an item that has been removed from the world by moving the item in
+        the last slot into it"""
+        slot = self._slots.pop(item)
+
+        last = len(self._items) - 1
+        if slot != last:
+            moved = self._items[last]
+            self._items[slot] = moved
+            self._slots[moved] = slot
+
+            for array in (self._positions, self._velocities, self._halves, self._resting):
+                array[slot] = array[last]
+
+        self._items.pop()
+
+        item.set_loot(None)
+
+    def has_item(self, item) -> bool:
+        """(bool) Returns True iff 'item' is moved by this"""
+        return item in self._slots
+
+    def get_position(self, item):
+        """(tuple<float, float>) Returns the (x, y) position of the centre of 'item'"""
+        x, y = self._positions[self._slots[item]].tolist()
+        return x, y
+
+    def get_velocity(self, item) -> pymunk.Vec2d:
+        """(pymunk.Vec2d) Returns the velocity of 'item'"""
+        return pymunk.Vec2d(*self._velocities[self._slots[item]].tolist())
+
+    def set_velocity(self, item, velocity):
+        """Sets the (x, y) velocity of 'item', waking it if it is moving"""
+        slot = self._slots[item]
+        self._velocities[slot] = velocity
+
+        if velocity[0] or velocity[1]:
+            self._resting[slot] = False
+
+    def count_items(self) -> int:
+        """(int) Returns the number of items moved by this"""
+        return len(self._items)
+
+    def is_resting(self, item) -> bool:
+        """(bool) Returns True iff 'item' has landed & is no longer moved"""
+        return bool(self._resting[self._slots[item]])
+
+    def count_resting(self) -> int:
+        """(int) Returns the number of items that have landed & are no longer moved"""
+        return int(np.count_nonzero(self._resting[:len(self._items)]))
+
+    def get_bb(self, item) -> pymunk.BB:
+        """(pymunk.BB) Returns the bounding box of 'item'"""
+        slot = self._slots[item]
+        (x, y), (half_width, half_height) = self._positions[slot].tolist(), self._halves[slot].tolist()
+        return pymunk.BB(x - half_width, y - half_height, x + half_width, y + half_height)
+
+    def query(self, x: float, y: float, max_distance: float) -> list:
+        """(list<DroppedItem>) Returns all items within 'max_distance' of the point ('x', 'y'),
+        in slot order"""
+        count = len(self._items)
+        gaps = np.maximum(np.abs(self._positions[:count] - (x, y)) - self._halves[:count], 0)
+        found = np.flatnonzero((gaps ** 2).sum(axis=1) <= max_distance ** 2)
+
+        return [self._items[slot] for slot in found.tolist()]
+
+    def _is_solid(self, columns, rows):
+        """(np.ndarray<bool>) Returns whether each of the cells at ('columns', 'rows') is solid"""
+        solid = self._solid
+        return solid[np.clip(columns + 1, 0, solid.shape[0] - 1), np.clip(rows + 1, 0, solid.shape[1] - 1)]
+
+    def _move(self, positions, halves, displacements, axis: int):
+        """Moves items along 'axis' (0 for x, 1 for y) by 'displacements', stopping them at the
+        edge of the first solid cell at their leading edge
+
+        Parameters:
+            positions (np.ndarray): The (x, y) positions of the items, updated in place
+            halves (np.ndarray): Half of the (width, height) of the items
+            displacements (np.ndarray): The distance to move each item along the axis
+
+        Return:
+            np.ndarray<bool>: Whether each item was stopped
+        """
+        expanse = self._cell_expanse
+        other = 1 - axis
+
+        moved = positions[:, axis] + displacements
+        forward = displacements > 0
+        edges = np.where(forward, moved + halves[:, axis], moved - halves[:, axis])
+        lines = np.floor(edges / expanse).astype(int)
+
+        # the cells spanned by each item across the axis
+        first = np.floor((positions[:, other] - halves[:, other] + LOOT_EDGE_TOLERANCE) / expanse).astype(int)
+        last = np.floor((positions[:, other] + halves[:, other] - LOOT_EDGE_TOLERANCE) / expanse).astype(int)
+
+        if axis == 0:
+            blocked = self._is_solid(lines, first) | self._is_solid(lines, last)
+        else:
+            blocked = self._is_solid(first, lines) | self._is_solid(last, lines)
+
+        blocked &= displacements != 0
+
+        stops = np.where(forward, lines * expanse - halves[:, axis], (lines + 1) * expanse + halves[:, axis])
+        positions[:, axis] = np.where(blocked, stops, moved)
+
+        return blocked
+
+    def step(self, world, time_delta: float):
+        """Moves every item that isn't resting by one time step, then finds which items overlap
+        each player
+
+        Called by 'world (World)' on each time step, after the physical space is stepped"""
+        started = time.perf_counter()
+
+        count = len(self._items)
+        awake = np.flatnonzero(~self._resting[:count])
+        self._moved = len(awake)
+        self._landed = 0
+
+        if len(awake):
+            expanse = self._cell_expanse
+            positions = self._positions[awake]
+            velocities = self._velocities[awake]
+            halves = self._halves[awake]
+
+            # items inside a block are pushed up out of its cell
+            columns = np.floor(positions[:, 0] / expanse).astype(int)
+            rows = np.floor(positions[:, 1] / expanse).astype(int)
+            embedded = self._is_solid(columns, rows)
+            if embedded.any():
+                positions[embedded, 1] = rows[embedded] * expanse - halves[embedded, 1]
+                velocities[embedded] = 0
+
+            gravity = world.get_gravity()
+            velocities += np.multiply(gravity, time_delta)
+
+            limit = LOOT_MAX_STEP * expanse
+            displacements = np.clip(velocities * time_delta, -limit, limit)
+
+            # x is resolved first, then y from the new x
+            stopped_x = self._move(positions, halves, displacements[:, 0], 0)
+            velocities[stopped_x, 0] = 0
+
+            stopped_y = self._move(positions, halves, displacements[:, 1], 1)
+            landed = stopped_y & (displacements[:, 1] * gravity[1] > 0)
+            velocities[stopped_y, 1] = 0
+
+            # landing stops an item outright, as friction would
+            velocities[landed] = 0
+
+            self._positions[awake] = positions
+            self._velocities[awake] = velocities
+            self._resting[awake[landed]] = True
+            self._landed = int(np.count_nonzero(landed))
+
+        self._update_contacts(world)
+
+        self._times.append(time.perf_counter() - started)
+
+    def _update_contacts(self, world):
+        """Calls the world's ("player", "item") collision handler for the items that have started
+        or stopped overlapping each player since the last step"""
+        handler = world.get_collision_handler("player", "item")
+        if handler is None or not world.collides("player", "item"):
+            return
+
+        data, callbacks = handler
+        on_begin = callbacks.get('begin')
+        on_separate = callbacks.get('separate')
+
+        count = len(self._items)
+        lows = self._positions[:count] - self._halves[:count]
+        highs = self._positions[:count] + self._halves[:count]
+
+        contacts = {}
+        for player in world.get_things_in_categories("player"):
+            bb = player.get_shape().bb
+            overlapping = np.flatnonzero((highs[:, 0] >= bb.left) & (lows[:, 0] <= bb.right)
+                                         & (highs[:, 1] >= bb.bottom) & (lows[:, 1] <= bb.top))
+
+            contacts[player] = {self._items[slot]: None for slot in overlapping.tolist()}
+
+        previous = self._contacts
+        self._contacts = contacts
+
+        for player, items in contacts.items():
+            touching = previous.get(player, {})
+
+            for item in items:
+                # may have been removed by an earlier callback (e.g. picked up)
+                if on_begin and item not in touching and item in self._slots:
+                    on_begin(player, item, data, None)
+
+        if on_separate:
+            for player, items in previous.items():
+                touching = contacts.get(player, {})
+
+                for item in items:
+                    if item not in touching:
+                        on_separate(player, item, data, None)
+
+    def get_stats(self) -> dict:
+        """Returns statistics about the items moved by this
+
+        Return:
+            dict<str: *>: Mapping of:
+                - 'items': the number of items
+                - 'resting': the number of items that have landed & are no longer moved
+                - 'moved': the number of items moved on the last tick
+                - 'landed': the number of items that landed on the last tick
+                - 'capacity': the number of slots allocated
+                - 'last_time', 'mean_time', 'max_time': the time spent stepping items on the
+                                                        last tick & over recent ticks, in seconds
+        """
+        times = self._times or [0.]
+
+        return {
+            'items': len(self._items),
+            'resting': self.count_resting(),
+            'moved': self._moved,
+            'landed': self._landed,
+            'capacity': len(self._resting),
+            'last_time': times[-1],
+            'mean_time': sum(times) / len(times),
+            'max_time': max(times),
+        }
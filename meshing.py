@@ -0,0 +1,62 @@
+"""
+Greedy meshing of solid grid cells into larger rectangles
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from typing import Callable, List, Tuple
+
+# A rectangle of grid cells, as (column, row, width, height), where (column, row) is the
+# top-left cell of the rectangle
+CellRectangle = Tuple[int, int, int, int]
+
+
+def greedy_mesh(is_solid: Callable[[int, int], bool], left: int, top: int,
+                right: int, bottom: int) -> List[CellRectangle]:
+    """Covers every solid cell in a region of the grid with as few rectangles as is
+    (greedily) possible, such that no rectangle covers an empty cell & no two rectangles overlap
+
+    Rectangles are grown from the top-left-most uncovered solid cell, first rightwards for as
+    long as the run of solid cells continues, then downwards for as long as the whole run is
+    solid beneath.
+
+    Parameters:
+        is_solid (callable<int, int -> bool>):
+                Returns True iff the cell at (column, row) is solid
+        left (int): The first column of the region
+        top (int): The first row of the region
+        right (int): The column after the last column of the region
+        bottom (int): The row after the last row of the region
+
+    Return:
+        list<tuple<int, int, int, int>>: The (column, row, width, height) of each rectangle
+    """
+    covered = set()
+    rectangles = []
+
+    def is_free(column, row):
+        return (column, row) not in covered and is_solid(column, row)
+
+    for row in range(top, bottom):
+        for column in range(left, right):
+            if not is_free(column, row):
+                continue
+
+            width = 1
+            while column + width < right and is_free(column + width, row):
+                width += 1
+
+            height = 1
+            while row + height < bottom and all(is_free(column + i, row + height) for i in range(width)):
+                height += 1
+
+            for j in range(row, row + height):
+                for i in range(column, column + width):
+                    covered.add((i, j))
+
+            rectangles.append((column, row, width, height))
+
+    return rectangles
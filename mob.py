@@ -18,6 +18,9 @@ MOB_DEFAULT_TEMPO = 40
 BIRD_GRAVITY_FACTOR = 150
 BIRD_X_SCALE = 1.61803
 
+# Seconds between each flap of a bird's wings
+BIRD_FLAP_INTERVAL = 1 / 3
+
 
 class Mob(DynamicThing):
     """An abstract representation of a creature in the sandbox game
@@ -26,7 +29,7 @@ class Mob(DynamicThing):
 
     Should not be instantiated directly"""
 
-    def __init__(self, mob_id, size, tempo=MOB_DEFAULT_TEMPO, max_health=20):
+    def __init__(self, mob_id, size, tempo=MOB_DEFAULT_TEMPO, max_health=20, rng=None):
         """Constructor
 
         Parameters:
@@ -39,14 +42,21 @@ class Mob(DynamicThing):
                       - further from zero means faster movement
                       - negative is reversed
             max_health (float): The maximum & starting health for this mob
+            rng (random.Random): The source of randomness for this mob's movement;
+                                 defaults to the random module
         """
         super().__init__(max_health=max_health)
 
         self._id = mob_id
         self._size = size
         self._tempo = tempo
+        self._rng = random if rng is None else rng
 
         self._steps = 0
+        self._age = 0.
+
+        # The population whose arrays hold this mob's health, steps & age, if any
+        self._population = None
 
     def get_id(self):
         """(str) Returns the unique id for this type of mob"""
@@ -56,13 +66,90 @@ class Mob(DynamicThing):
         """(str) Returns the physical (x, y) size of this mob"""
         return self._size
 
+    def get_tempo(self):
+        """(float) Returns the movement tempo of this mob"""
+        return self._tempo
+
+    def get_rng(self):
+        """(random.Random) Returns the source of randomness for this mob's movement"""
+        return self._rng
+
+    def get_population(self):
+        """(population.MobPopulation) Returns the population holding this mob's state, or None"""
+        return self._population
+
+    def set_population(self, population):
+        """Sets the population holding this mob's state
+
+        Called by 'population (population.MobPopulation)' when it takes this mob's state into
+        its arrays, and with None once it has written the state back to this mob"""
+        self._population = population
+
+    def get_steps(self):
+        """(int) Returns the number of steps this mob has taken"""
+        if self._population is not None:
+            return self._population.get_state(self, 'steps')
+        return self._steps
+
+    def set_steps(self, steps):
+        """Sets the number of steps this mob has taken to 'steps (int)'"""
+        if self._population is not None:
+            self._population.set_state(self, 'steps', steps)
+        else:
+            self._steps = steps
+
+    def get_age(self):
+        """(float) Returns the time this mob has been stepped for, in seconds"""
+        if self._population is not None:
+            return self._population.get_state(self, 'age')
+        return self._age
+
+    def set_age(self, age):
+        """Sets the time this mob has been stepped for to 'age (float)' seconds"""
+        if self._population is not None:
+            self._population.set_state(self, 'age', age)
+        else:
+            self._age = age
+
+    def get_health(self):
+        """(float) Returns the mob's health"""
+        if self._population is not None:
+            return self._population.get_state(self, 'health')
+        return self._health
+
+    def set_health(self, health):
+        """Sets the mob's health to 'health (float)', within [0, max health]"""
+        health = min(max(health, 0), self._max_health)
+
+        if self._population is not None:
+            self._population.set_state(self, 'health', health)
+        else:
+            self._health = health
+
+    def change_health(self, change):
+        """Increases the mob's health by 'change (float)'"""
+        self.set_health(self.get_health() + change)
+
+    def is_dead(self):
+        """(bool) Returns True iff this mob is dead"""
+        return self.get_health() <= 0
+
+    def reset(self):
+        """Restores this mob to full health, as if it had never been stepped (e.g. so that a
+        despawned mob can be spawned again; see spawning.MobSpawner)"""
+        self.set_health(self._max_health)
+        self.set_steps(0)
+        self.set_age(0.)
+
     def step(self, time_delta, game_data):
         """Advance this mob by one time step
 
+        Mobs may be stepped less often than every time step (see scheduler.MobScheduler), in
+        which case time_delta is the time since this mob was last stepped
+
         See PhysicalThing.step for parameters & return"""
-        # Track time via time_delta would be more precise, but a step counter is simpler
-        # and works reasonably well, assuming time steps occur at roughly constant time deltas
         self._steps += 1
+        self._age += time_delta
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self._id!r})"
@@ -75,12 +162,13 @@ class Bird(Mob):
         """Advance this bird by one time step
 
         See PhysicalThing.step for parameters & return"""
-        # Every 20 steps; could track time_delta instead to be more precise
-        if self._steps % 20 == 0:
+        # Once per flap interval; a long step (at a reduced update rate) still flaps only once
+        age = self._age
+        if age == 0 or (age + time_delta) // BIRD_FLAP_INTERVAL > age // BIRD_FLAP_INTERVAL:
             # a random point on a movement circle (radius=tempo), scaled by the percentage
             # of health remaining
             health_percentage = self._health / self._max_health
-            z = cmath.rect(self._tempo * health_percentage, random.uniform(0, 2 * cmath.pi))
+            z = cmath.rect(self._tempo * health_percentage, self._rng.uniform(0, 2 * cmath.pi))
 
             # stretch that random point onto an ellipse that is wider on the x-axis
             dx, dy = z.real * BIRD_X_SCALE, z.imag
@@ -94,3 +182,20 @@ class Bird(Mob):
 
     def use(self):
         pass
+
+
+def create_mob(mob_id, rng=None):
+    """(Mob) Creates a mob (this function can be thought of as a mob factory)
+
+    Parameters:
+        mob_id (str): The unique id of the type of mob
+        rng (random.Random): The source of randomness for the mob's movement (see Mob)
+
+    Examples:
+        >>> create_mob("friendly_bird")
+        Bird('friendly_bird')
+    """
+    if mob_id == "friendly_bird":
+        return Bird(mob_id, (12, 12), rng=rng)
+
+    raise KeyError(f"No mob defined for {mob_id}")
@@ -0,0 +1,160 @@
+"""
+Messages exchanged between a game server & its clients over TCP (see server.py & client.py)
+
+Each message is MESSAGE_HEADER (the length of its body & its type), followed by its body:
+    - MESSAGE_WELCOME (server to client): UTF-8 JSON of the world's grid size, cell expanse &
+      time step, and the number of ticks between states
+    - MESSAGE_STATE (server to client): STATE_HEADER (the sequence number of the last inputs
+      applied & the id of the client's player in the stream, or 0 if it hasn't been streamed
+      yet), followed by a frame encoded by a delta.DeltaEncoder
+    - MESSAGE_INPUTS (client to server): inputs as a record encoded by replay.encode_inputs,
+      whose tick is the sequence number of the inputs
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import json
+import struct
+
+from replay import encode_inputs, decode_inputs, RECORD_INPUTS
+
+# (length of body, message type)
+MESSAGE_HEADER = struct.Struct('<IB')
+
+MESSAGE_WELCOME = 0
+MESSAGE_STATE = 1
+MESSAGE_INPUTS = 2
+
+# (sequence number of the last inputs applied, id of the client's player)
+STATE_HEADER = struct.Struct('<II')
+
+# Largest message body that is accepted, in bytes
+MAX_MESSAGE_SIZE = 2 ** 24
+
+# Port on which servers listen by default
+DEFAULT_PORT = 7341
+
+
+class ProtocolError(Exception):
+    """Raised when a malformed message is received"""
+    pass
+
+
+def encode_message(message_type: int, body: bytes) -> bytes:
+    """(bytes) Returns a message of 'message_type' with 'body'"""
+    return MESSAGE_HEADER.pack(len(body), message_type) + body
+
+
+def decode_messages(buffer: bytearray, max_size: int = MAX_MESSAGE_SIZE) -> list:
+    """Removes every complete message from the start of a buffer of received data
+
+    Parameters:
+        buffer (bytearray): The data received so far, which is left with any incomplete message
+        max_size (int): The largest message body to accept
+
+    Return:
+        list<tuple<int, bytes>>: The (type, body) of each complete message, in order
+
+    Raises:
+        ProtocolError if a message's body is too large
+    """
+    messages = []
+    offset = 0
+
+    while len(buffer) - offset >= MESSAGE_HEADER.size:
+        length, message_type = MESSAGE_HEADER.unpack_from(buffer, offset)
+        if length > max_size:
+            raise ProtocolError(f"Message of {length} bytes is too large")
+
+        end = offset + MESSAGE_HEADER.size + length
+        if len(buffer) < end:
+            break
+
+        messages.append((message_type, bytes(buffer[offset + MESSAGE_HEADER.size:end])))
+        offset = end
+
+    del buffer[:offset]
+    return messages
+
+
+async def read_message(reader, max_size: int = MAX_MESSAGE_SIZE):
+    """Reads the next message from a stream
+
+    Parameters:
+        reader (asyncio.StreamReader): The stream from which to read
+        max_size (int): The largest message body to accept
+
+    Return:
+        tuple<int, bytes>: The (type, body) of the message
+
+    Raises:
+        asyncio.IncompleteReadError if the stream ends first
+        ProtocolError if the message's body is too large
+    """
+    length, message_type = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+    if length > max_size:
+        raise ProtocolError(f"Message of {length} bytes is too large")
+
+    return message_type, await reader.readexactly(length)
+
+
+def encode_welcome(world, broadcast_interval: int) -> bytes:
+    """(bytes) Returns the welcome message for a client joining a game of 'world'"""
+    return encode_message(MESSAGE_WELCOME, json.dumps({
+        'grid_size': world.get_grid_size(),
+        'cell_expanse': world.get_cell_expanse(),
+        'time_step': world.get_time_step(),
+        'broadcast_interval': broadcast_interval,
+    }).encode('utf-8'))
+
+
+def decode_welcome(body: bytes) -> dict:
+    """(dict) Returns the game information in the body of a welcome message"""
+    return json.loads(body.decode('utf-8'))
+
+
+def encode_state(sequence: int, player_id: int, frame: bytes) -> bytes:
+    """(bytes) Returns a state message, acknowledging inputs up to 'sequence'"""
+    return encode_message(MESSAGE_STATE, STATE_HEADER.pack(sequence, player_id) + frame)
+
+
+def decode_state(body: bytes):
+    """Decodes the body of a state message
+
+    Return:
+        tuple<int, int, bytes>: The sequence number of the last inputs applied, the id of the
+                                client's player (or 0) & the frame
+    """
+    sequence, player_id = STATE_HEADER.unpack_from(body)
+    return sequence, player_id, body[STATE_HEADER.size:]
+
+
+def encode_inputs_message(sequence: int, inputs) -> bytes:
+    """(bytes) Returns a message of 'inputs', numbered 'sequence'"""
+    return encode_message(MESSAGE_INPUTS, encode_inputs(sequence, inputs))
+
+
+def decode_inputs_message(body: bytes):
+    """Decodes the body of an inputs message
+
+    Return:
+        tuple<int, list<tuple<str, *>>>: The sequence number & inputs
+
+    Raises:
+        ProtocolError if the body is malformed
+    """
+    if body[:1] != RECORD_INPUTS:
+        raise ProtocolError("Inputs message has no inputs record")
+
+    try:
+        sequence, inputs, offset = decode_inputs(body, 1)
+    except (struct.error, IndexError, ValueError, UnicodeDecodeError) as error:
+        raise ProtocolError(f"Malformed inputs: {error}") from error
+
+    if offset != len(body):
+        raise ProtocolError("Inputs message has trailing data")
+
+    return sequence, inputs
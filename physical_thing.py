@@ -89,6 +89,14 @@ class DynamicThing(PhysicalThing):
         """(float) Returns the dynamic thing's health"""
         return self._health
 
+    def get_max_health(self):
+        """(float) Returns the dynamic thing's maximum health"""
+        return self._max_health
+
+    def set_health(self, health):
+        """Sets the dynamic thing's health to 'health (float)', within [0, max health]"""
+        self._health = min(max(health, 0), self._max_health)
+
     def is_dead(self):
         """(bool) Returns True iff this thing is dead"""
         return self._health <= 0
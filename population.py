@@ -0,0 +1,289 @@
+"""
+Struct-of-arrays storage of mobs, with their AI computed in vectorised passes
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from mob import Bird, BIRD_FLAP_INTERVAL, BIRD_GRAVITY_FACTOR, BIRD_X_SCALE
+
+# Mob classes whose step is computed by MobPopulation; instances of subclasses are not, since
+# they may step differently
+VECTORISED_MOBS = (Bird,)
+
+# Number of slots initially allocated in a population's arrays; doubled whenever it is full
+POPULATION_CAPACITY = 64
+
+# Number of recent ticks over which step times are averaged
+POPULATION_TIME_HISTORY = 60
+
+# Fields of the state of each mob held in a population's arrays, & their dtype
+POPULATION_FIELDS = {
+    'health': np.float64,
+    'max_health': np.float64,
+    'tempo': np.float64,
+    'steps': np.uint32,
+    'age': np.float64,
+    # whether the mob's body was asleep when last checked
+    'asleep': np.bool_,
+}
+
+
+class MobPopulation:
+    """Holds the state of mobs in arrays, one slot per mob, and steps them all at once
+
+    Used as the mob scheduler of a World (see World's mob_scheduler parameter), which then
+    steps mobs only through this population, once per tick. Each bird's health, maximum health,
+    tempo, steps, age & whether it is asleep are held in arrays while it is in the world (see
+    Mob.get_population), and each tick:
+        - the birds that flap are found in one pass over the arrays
+        - their random angles are drawn together, & their target velocities computed together,
+          as in Bird.step
+        - the velocities are read from & written back to the bodies of only those birds, since
+          pymunk has no way to read or write the velocities of many bodies at once
+
+    Sleeping birds are neither stepped nor steered, as in World.step. A bird's body is only
+    checked for sleep when it is due to flap, or while it is known to be asleep, so a bird that
+    falls asleep between flaps is stepped until its next flap.
+
+    Other mobs (i.e. not in VECTORISED_MOBS) are stepped individually, as usual.
+
+    Given a scheduler.MobScheduler, the population steps only the mobs it finds are due on each
+    tick, at their level of detail, each with the time since it was last stepped; this way the
+    two compose, rather than one replacing the other as the world's mob scheduler. The
+    scheduler can't have a budget, since the birds it finds due are stepped together.
+
+    Random angles are drawn from the population's own random source, in slot order, so a game
+    that uses a population is repeatable given its seed, though it differs from one that doesn't.
+    """
+
+    def __init__(self, capacity: int = POPULATION_CAPACITY, seed: int = None, scheduler=None):
+        """Constructor
+
+        Parameters:
+            capacity (int): The number of slots to allocate initially
+            seed (int): The seed of the random source for the birds' movement, or None for a
+                        random seed
+            scheduler (scheduler.MobScheduler): If not None, mobs are stepped only when this
+                                                finds them due; it must not have a budget
+
+        Raises:
+            ValueError if the scheduler has a budget
+        """
+        if scheduler is not None and scheduler.get_budget() is not None:
+            raise ValueError("A population steps the mobs a scheduler finds due together, so "
+                             "can't keep to the scheduler's budget")
+
+        self._scheduler = scheduler
+        self._rng = np.random.default_rng(seed)
+
+        # Mob & body in each slot, & the slot of each mob
+        self._mobs = []
+        self._bodies = []
+        self._slots = {}
+
+        self._arrays = {field: np.zeros(capacity, dtype=dtype) for field, dtype in POPULATION_FIELDS.items()}
+        # Velocity each bird was last steered to, as (x, y)
+        self._targets = np.zeros((capacity, 2))
+
+        # Mobs that are stepped individually, as an ordered set
+        self._others = {}
+
+        self._flapped = 0
+        self._times = deque(maxlen=POPULATION_TIME_HISTORY)
+
+    def _grow(self):
+        """Doubles the number of slots in the arrays"""
+        for field, array in self._arrays.items():
+            self._arrays[field] = np.concatenate((array, np.zeros_like(array)))
+
+        self._targets = np.concatenate((self._targets, np.zeros_like(self._targets)))
+
+    def add_mob(self, mob):
+        """Takes the state of a mob that has been added to the world into the arrays"""
+        if self._scheduler is not None:
+            self._scheduler.add_mob(mob)
+
+        if type(mob) not in VECTORISED_MOBS:
+            self._others[mob] = None
+            return
+
+        slot = len(self._mobs)
+        if slot == len(self._targets):
+            self._grow()
+
+        arrays = self._arrays
+        arrays['health'][slot] = mob.get_health()
+        arrays['max_health'][slot] = mob.get_max_health()
+        arrays['tempo'][slot] = mob.get_tempo()
+        arrays['steps'][slot] = mob.get_steps()
+        arrays['age'][slot] = mob.get_age()
+        arrays['asleep'][slot] = mob.get_shape().body.is_sleeping
+        self._targets[slot] = mob.get_velocity()
+
+        self._mobs.append(mob)
+        self._bodies.append(mob.get_shape().body)
+        self._slots[mob] = slot
+
+        mob.set_population(self)
+
+    def remove_mob(self, mob):
+        """Writes the state of a mob that has been removed from the world back to the mob, and
+        frees its slot by moving the mob in the last slot into it"""
+        if self._scheduler is not None:
+            self._scheduler.remove_mob(mob)
+
+        if mob in self._others:
+            del self._others[mob]
+            return
+
+        slot = self._slots.get(mob)
+        if slot is None:
+            return
+
+        health, steps, age = (self.get_state(mob, field) for field in ('health', 'steps', 'age'))
+
+        last = len(self._mobs) - 1
+        if slot != last:
+            moved = self._mobs[last]
+            self._mobs[slot] = moved
+            self._bodies[slot] = self._bodies[last]
+            self._slots[moved] = slot
+
+            for array in self._arrays.values():
+                array[slot] = array[last]
+            self._targets[slot] = self._targets[last]
+
+        self._mobs.pop()
+        self._bodies.pop()
+        del self._slots[mob]
+
+        mob.set_population(None)
+        mob.set_health(health)
+        mob.set_steps(steps)
+        mob.set_age(age)
+
+    def get_state(self, mob, field: str):
+        """Returns the value of 'field' (one of POPULATION_FIELDS) in the slot of 'mob'"""
+        return self._arrays[field][self._slots[mob]].item()
+
+    def set_state(self, mob, field: str, value):
+        """Sets the value of 'field' (one of POPULATION_FIELDS) in the slot of 'mob' to 'value'"""
+        self._arrays[field][self._slots[mob]] = value
+
+    def get_targets(self):
+        """(np.ndarray) Returns the velocity each bird was last steered to, by slot, as an (n, 2) array"""
+        return self._targets[:len(self._mobs)]
+
+    def get_scheduler(self):
+        """(scheduler.MobScheduler) Returns the scheduler that finds which mobs are due, or None"""
+        return self._scheduler
+
+    def step(self, world, time_delta: float, game_data):
+        """Steps every mob that is due by one time step
+
+        Called by 'world (World)' on each time step, with the world's time_delta & game_data
+        (see World.advance)"""
+        started = time.perf_counter()
+
+        if self._scheduler is None:
+            # copied, since mobs may add/remove things when stepped
+            for mob in list(self._others):
+                if not mob.get_shape().body.is_sleeping:
+                    mob.step(time_delta, game_data)
+
+            count = len(self._mobs)
+            self._step_birds(np.arange(count), np.full(count, time_delta), check_sleep=True)
+        else:
+            # the scheduler has already skipped sleeping mobs
+            due = list(self._scheduler.take_due_mobs(world, time_delta, started))
+
+            birds = []
+            for mob, mob_time_delta in due:
+                if mob in self._others:
+                    mob.step(mob_time_delta, game_data)
+                else:
+                    birds.append((mob, mob_time_delta))
+
+            # found after the other mobs are stepped, since they may remove birds
+            birds = [(self._slots[mob], mob_time_delta) for mob, mob_time_delta in birds
+                     if mob in self._slots]
+            slots = np.array([slot for slot, _ in birds], dtype=np.intp)
+            time_deltas = np.array([mob_time_delta for _, mob_time_delta in birds], dtype=np.float64)
+            self._step_birds(slots, time_deltas, check_sleep=False)
+
+        self._times.append(time.perf_counter() - started)
+
+    def _step_birds(self, slots: np.ndarray, time_deltas: np.ndarray, check_sleep: bool):
+        """Steps the birds in 'slots' together, each by its time in 'time_deltas', steering those
+        that flap (see Bird.step); if 'check_sleep', sleeping birds are skipped"""
+        arrays = self._arrays
+        age = arrays['age'][slots]
+
+        # see Bird.step
+        due = (age == 0) | ((age + time_deltas) // BIRD_FLAP_INTERVAL > age // BIRD_FLAP_INTERVAL)
+
+        if check_sleep:
+            asleep = arrays['asleep'][slots]
+
+            # only birds that would flap, or that were asleep, need their bodies checked
+            checked = slots[due | asleep]
+            if len(checked):
+                bodies = self._bodies
+                arrays['asleep'][checked] = [bodies[slot].is_sleeping for slot in checked.tolist()]
+                asleep = arrays['asleep'][slots]
+
+            awake = ~asleep
+            slots, time_deltas, due = slots[awake], time_deltas[awake], due[awake]
+
+        flaps = slots[due]
+        self._flapped = len(flaps)
+
+        if len(flaps):
+            bodies = [self._bodies[slot] for slot in flaps.tolist()]
+
+            angles = self._rng.uniform(0, 2 * math.pi, len(flaps))
+            radii = arrays['tempo'][flaps] * arrays['health'][flaps] / arrays['max_health'][flaps]
+
+            targets = np.array([tuple(body.velocity) for body in bodies])
+            targets[:, 0] += radii * np.cos(angles) * BIRD_X_SCALE
+            targets[:, 1] += radii * np.sin(angles) - BIRD_GRAVITY_FACTOR
+            self._targets[flaps] = targets
+
+            for body, velocity in zip(bodies, targets.tolist()):
+                body.velocity = velocity
+
+        arrays['steps'][slots] += 1
+        arrays['age'][slots] += time_deltas
+
+    def get_stats(self) -> dict:
+        """Returns statistics about the mobs in this population
+
+        Return:
+            dict<str: *>: Mapping of:
+                - 'mobs': the number of mobs
+                - 'vectorised': the number of mobs held in the arrays
+                - 'flapped': the number of birds steered on the last tick
+                - 'capacity': the number of slots allocated
+                - 'last_time', 'mean_time', 'max_time': the time spent stepping mobs on the
+                                                        last tick & over recent ticks, in seconds
+        """
+        times = self._times or [0.]
+
+        return {
+            'mobs': len(self._mobs) + len(self._others),
+            'vectorised': len(self._mobs),
+            'flapped': self._flapped,
+            'capacity': len(self._targets),
+            'last_time': times[-1],
+            'mean_time': sum(times) / len(times),
+            'max_time': max(times),
+        }
@@ -0,0 +1,417 @@
+"""
+On-disk storage of the world's chunks in region files
+
+Each region file holds the blocks of a square region of REGION_SIZE x REGION_SIZE chunks:
+    - a header of REGION_HEADER, followed by a table of the (offset, length) of each chunk's
+      payload in the file (zero for a chunk that has never been written), padded to a sector
+    - each chunk's payload, zlib compressed, starting on a sector boundary
+
+A payload holds the chunk's row-major codes as little-endian uint16, followed by the
+remaining hitpoints of its damaged blocks as an array of HITPOINTS_DTYPE. Codes are those of
+the store's own palette, which is saved alongside the region files.
+
+A chunk is read by seeking straight to its payload, and is rewritten in place if its new
+payload fits in the sectors it already occupies, otherwise appended to the end of the file.
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import json
+import os
+import struct
+import threading
+import zlib
+from array import array
+
+import numpy as np
+
+from chunk import BlockPalette
+
+REGION_MAGIC = b'NDRG'
+REGION_VERSION = 1
+
+# Width/height of a region, in chunks
+REGION_SIZE = 32
+
+# Payloads are aligned to, and occupy a whole number of, sectors (in bytes)
+SECTOR_SIZE = 512
+
+# (magic, version, region size, chunk size)
+REGION_HEADER = struct.Struct('<4sHHH')
+
+# (offset, length) of each chunk's payload, in bytes
+REGION_TABLE_ENTRY = struct.Struct('<II')
+
+# Index of a damaged block in its chunk's codes, and its remaining hitpoints
+HITPOINTS_DTYPE = np.dtype([('index', '<u4'), ('hitpoints', '<f8')])
+
+PALETTE_FILE_NAME = "palette.json"
+
+ZLIB_LEVEL = 6
+
+
+def _count_sectors(length: int) -> int:
+    """(int) Returns the number of sectors needed to hold 'length' bytes"""
+    return (length + SECTOR_SIZE - 1) // SECTOR_SIZE
+
+
+class RegionFile:
+    """A file holding the compressed blocks of a square region of chunks, with random access to
+    each chunk"""
+
+    def __init__(self, path: str, chunk_size: int, region_size: int = REGION_SIZE):
+        """Opens a region file, creating it if it does not exist
+
+        Parameters:
+            path (str): The path of the file
+            chunk_size (int): The width/height of each chunk, in grid cells
+            region_size (int): The width/height of the region, in chunks
+
+        Raises:
+            ValueError if an existing file is not a region file with the same sizes
+        """
+        self._path = path
+        self._chunk_size = chunk_size
+        self._region_size = region_size
+
+        table_size = REGION_TABLE_ENTRY.size * region_size * region_size
+        self._data_start = _count_sectors(REGION_HEADER.size + table_size) * SECTOR_SIZE
+
+        if os.path.exists(path):
+            self._file = open(path, 'r+b')
+
+            magic, version, file_region_size, file_chunk_size = REGION_HEADER.unpack(
+                self._file.read(REGION_HEADER.size))
+
+            if magic != REGION_MAGIC or version != REGION_VERSION:
+                raise ValueError(f"{path} is not a region file of version {REGION_VERSION}")
+            if (file_region_size, file_chunk_size) != (region_size, chunk_size):
+                raise ValueError(f"{path} has regions of {file_region_size} chunks of {file_chunk_size} "
+                                 f"cells, not {region_size} chunks of {chunk_size} cells")
+
+            self._table = array('I', self._file.read(table_size))
+        else:
+            self._file = open(path, 'w+b')
+
+            self._table = array('I', bytes(table_size))
+            self._file.write(REGION_HEADER.pack(REGION_MAGIC, REGION_VERSION, region_size, chunk_size))
+            self._file.write(self._table.tobytes())
+            self._file.truncate(self._data_start)
+
+        self._end = max(self._data_start, self._file.seek(0, os.SEEK_END))
+
+    def get_path(self) -> str:
+        """(str) Returns the path of this region file"""
+        return self._path
+
+    def _get_entry(self, column: int, row: int) -> int:
+        """(int) Returns the index in the table of the chunk at ('column', 'row'), relative to the region"""
+        return 2 * (row * self._region_size + column)
+
+    def has_chunk(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the chunk at ('column', 'row'), relative to the region, has been written"""
+        return self._table[self._get_entry(column, row) + 1] != 0
+
+    def count_chunks(self) -> int:
+        """(int) Returns the number of chunks that have been written to this region"""
+        return sum(1 for length in self._table[1::2] if length)
+
+    def read(self, column: int, row: int) -> bytes:
+        """(bytes) Returns the decompressed payload of the chunk at ('column', 'row'), relative to
+        the region, or None if it has never been written"""
+        entry = self._get_entry(column, row)
+        offset, length = self._table[entry], self._table[entry + 1]
+
+        if not length:
+            return None
+
+        self._file.seek(offset)
+        return zlib.decompress(self._file.read(length))
+
+    def write(self, column: int, row: int, payload: bytes):
+        """Compresses & writes the payload of the chunk at ('column', 'row'), relative to the region
+
+        The payload replaces the chunk's previous payload in place if it fits in the same sectors,
+        otherwise it is appended to the end of the file
+        """
+        data = zlib.compress(payload, ZLIB_LEVEL)
+
+        entry = self._get_entry(column, row)
+        offset, length = self._table[entry], self._table[entry + 1]
+
+        if not length or _count_sectors(len(data)) > _count_sectors(length):
+            offset = self._end
+            self._end += _count_sectors(len(data)) * SECTOR_SIZE
+
+        self._file.seek(offset)
+        self._file.write(data)
+
+        self._table[entry], self._table[entry + 1] = offset, len(data)
+
+        self._file.seek(REGION_HEADER.size + entry * self._table.itemsize)
+        self._file.write(REGION_TABLE_ENTRY.pack(offset, len(data)))
+
+    def flush(self):
+        """Flushes written chunks to disk"""
+        self._file.flush()
+
+    def close(self):
+        """Closes this region file"""
+        self._file.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._path!r}, {self._chunk_size!r}, {self._region_size!r})"
+
+
+class RegionStore:
+    """Stores the blocks of a world's chunks in a directory of region files
+
+    Region files are opened as they are needed, so reading or writing a chunk only touches the
+    file of the region containing it. Reading chunk data (see read_chunk_data) is thread safe,
+    so that chunks can be read in the background (see streaming.ChunkStreamer); everything else
+    must happen on the thread that owns the world.
+
+    A chunk store is used by World through read_chunk & prefetch"""
+
+    def __init__(self, directory: str, chunk_size: int, region_size: int = REGION_SIZE):
+        """Constructor
+
+        Parameters:
+            directory (str): The directory in which to store region files; created if it does not exist
+            chunk_size (int): The width/height of each chunk, in grid cells
+            region_size (int): The width/height of each region, in chunks
+        """
+        self._directory = directory
+        self._chunk_size = chunk_size
+        self._region_size = region_size
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._regions = {}
+        # Guards the region files, which may be read by a background thread
+        self._lock = threading.Lock()
+
+        # Block ids are stored as codes of this palette, so that stored chunks don't depend on
+        # the order in which a world's palette happened to encode them
+        self._palette = BlockPalette()
+        self._palette_path = os.path.join(directory, PALETTE_FILE_NAME)
+
+        if os.path.exists(self._palette_path):
+            with open(self._palette_path) as file:
+                for block_id in json.load(file):
+                    self._palette.encode(tuple(block_id))
+
+        self._saved_palette_size = len(self._palette)
+
+    def get_chunk_size(self) -> int:
+        """(int) Returns the width/height of each chunk, in grid cells"""
+        return self._chunk_size
+
+    def _get_region(self, column: int, row: int) -> RegionFile:
+        """(RegionFile) Returns the region file containing the chunk at ('column', 'row'), in chunks,
+        opening it if necessary"""
+        position = column // self._region_size, row // self._region_size
+        region = self._regions.get(position)
+
+        if region is None:
+            path = os.path.join(self._directory, "r.{}.{}.region".format(*position))
+            region = self._regions[position] = RegionFile(path, self._chunk_size, self._region_size)
+
+        return region
+
+    def _get_lookup(self, source: BlockPalette, target: BlockPalette) -> np.ndarray:
+        """(np.ndarray<uint16>) Returns the array mapping each code of 'source' to the code of
+        the same block id in 'target'"""
+        lookup = np.zeros(len(source), dtype=np.uint16)
+
+        for code, block_id in enumerate(source.get_block_ids(), 1):
+            lookup[code] = target.encode(block_id)
+
+        return lookup
+
+    def has_chunk(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the chunk at ('column', 'row'), in chunks, has been stored"""
+        with self._lock:
+            region = self._get_region(column, row)
+            return region.has_chunk(column % self._region_size, row % self._region_size)
+
+    def read_chunk_data(self, column: int, row: int):
+        """Reads & decodes the stored blocks of the chunk at ('column', 'row'), in chunks
+
+        Thread safe; the data can later be put into a chunk by apply_chunk_data
+
+        Return:
+            tuple<np.ndarray<uint16>, dict<int: float>>:
+                    The row-major code of each cell's block, in this store's palette, & the
+                    remaining hitpoints of each damaged block by its index in codes; or None if
+                    the chunk has never been stored
+        """
+        with self._lock:
+            region = self._get_region(column, row)
+            payload = region.read(column % self._region_size, row % self._region_size)
+
+        if payload is None:
+            return None
+
+        cells = self._chunk_size * self._chunk_size
+        codes = np.frombuffer(payload, dtype='<u2', count=cells)
+        damaged = np.frombuffer(payload, dtype=HITPOINTS_DTYPE, offset=2 * cells)
+
+        return codes, dict(damaged.tolist())
+
+    def apply_chunk_data(self, chunk, data, palette: BlockPalette) -> bool:
+        """Replaces the blocks of an inactive chunk with data from read_chunk_data
+
+        Parameters:
+            chunk (Chunk): The chunk to read into
+            data (tuple<np.ndarray<uint16>, dict<int: float>>): The chunk's data, or None
+            palette (BlockPalette): The palette of the world that the chunk is in
+
+        Return:
+            bool: True iff there was data; otherwise the chunk is left unchanged
+        """
+        if data is None:
+            return False
+
+        codes, damaged = data
+        codes = self._get_lookup(self._palette, palette)[codes]
+
+        chunk.set_codes(array('H', codes.tobytes()), damaged or None)
+        chunk.set_dirty(False)
+
+        return True
+
+    def read_chunk(self, chunk, palette: BlockPalette) -> bool:
+        """Replaces the blocks of an inactive chunk with those stored for it
+
+        Parameters:
+            chunk (Chunk): The chunk to read into
+            palette (BlockPalette): The palette of the world that the chunk is in
+
+        Return:
+            bool: True iff the chunk had been stored; otherwise it is left unchanged
+        """
+        return self.apply_chunk_data(chunk, self.read_chunk_data(*chunk.get_position()), palette)
+
+    def prefetch(self, world):
+        """Does nothing, since this store reads chunks only when they are needed
+
+        Called by 'world (World)' before it updates its active chunks"""
+
+    def write_chunk(self, column: int, row: int, codes: np.ndarray, damaged, palette: BlockPalette):
+        """Stores the blocks of a chunk
+
+        Parameters:
+            column (int): The column of the chunk, in chunks
+            row (int): The row of the chunk, in chunks
+            codes (np.ndarray<uint16>): The row-major code of each cell's block in the chunk
+            damaged (list<tuple<int, float>>): The (index in codes, remaining hitpoints) of
+                                               each damaged block in the chunk
+            palette (BlockPalette): The palette of 'codes'
+        """
+        codes = self._get_lookup(palette, self._palette)[codes].astype('<u2')
+        damaged = np.array(damaged, dtype=HITPOINTS_DTYPE)
+
+        with self._lock:
+            region = self._get_region(column, row)
+            region.write(column % self._region_size, row % self._region_size, codes.tobytes() + damaged.tobytes())
+
+    def save(self, world) -> int:
+        """Stores every chunk of a world that has changed since it was last stored
+
+        Only dirty chunks are stored, active or not, since the world marks a chunk dirty whenever
+        one of its blocks is added, removed or damaged. The cost depends only on the number of
+        chunks edited since the last save, not on the size of the world or its active area.
+
+        Parameters:
+            world (World): The world whose chunks to store; must have the same chunk size
+
+        Return:
+            int: The number of chunks stored
+
+        Raises:
+            ValueError if the world's chunk size is not the same as this store's
+        """
+        if world.get_chunk_size() != self._chunk_size:
+            raise ValueError(f"Cannot store chunks of {world.get_chunk_size()} cells in a store "
+                             f"of chunks of {self._chunk_size} cells")
+
+        palette = world.get_block_palette()
+        size = self._chunk_size
+        stored = 0
+
+        for chunk in world.get_chunks():
+            if not chunk.is_dirty():
+                continue
+
+            if chunk.is_active():
+                codes, damaged = self._encode_active_chunk(world, chunk)
+            else:
+                codes = np.frombuffer(chunk.get_codes(), dtype=np.uint16)
+
+                left, top = chunk.get_origin()
+                damaged = [((row - top) * size + column - left, hitpoints)
+                           for column, row, hitpoints in chunk.get_damaged_blocks()]
+
+            self.write_chunk(*chunk.get_position(), codes, damaged, palette)
+            chunk.set_dirty(False)
+            stored += 1
+
+        self.flush()
+
+        return stored
+
+    def _encode_active_chunk(self, world, chunk):
+        """Encodes the blocks in an active chunk from the world
+
+        Return:
+            tuple<np.ndarray<uint16>, list<tuple<int, float>>>:
+                    The row-major code of each cell's block & the (index, hitpoints) of each
+                    damaged block, as per write_chunk
+        """
+        palette = world.get_block_palette()
+        size = self._chunk_size
+        left, top = chunk.get_origin()
+
+        codes = np.zeros(size * size, dtype=np.uint16)
+        damaged = []
+
+        cells = [(column, row) for row in range(top, top + size) for column in range(left, left + size)]
+
+        for index, block in enumerate(world.get_blocks_at_cells(cells)):
+            if block is None:
+                continue
+
+            codes[index] = palette.encode(block.get_block_id())
+
+            hitpoints = block.get_hitpoints()
+            if hitpoints != block.get_max_hitpoints():
+                damaged.append((index, hitpoints))
+
+        return codes, damaged
+
+    def flush(self):
+        """Flushes every open region file & the palette to disk"""
+        with self._lock:
+            for region in self._regions.values():
+                region.flush()
+
+        if len(self._palette) != self._saved_palette_size:
+            with open(self._palette_path, 'w') as file:
+                json.dump(self._palette.get_block_ids(), file)
+            self._saved_palette_size = len(self._palette)
+
+    def close(self):
+        """Flushes & closes every open region file"""
+        self.flush()
+
+        with self._lock:
+            for region in self._regions.values():
+                region.close()
+            self._regions = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._directory!r}, {self._chunk_size!r}, {self._region_size!r})"
@@ -0,0 +1,397 @@
+"""
+Deterministic recording & replay of headless games
+
+A recording (see InputRecorder) consists of:
+    - a header of RECORDING_HEADER, giving the length of the metadata that follows
+    - metadata, as UTF-8 JSON: the seed, grid size & world options of the game
+    - records, each starting with one of the following record types:
+        - RECORD_INPUTS, then (tick, count) as INPUTS_HEADER & count encoded inputs
+        - RECORD_KEYFRAME, then (tick, length) as KEYFRAME_HEADER & a zlib compressed snapshot
+        - RECORD_END, then the final tick as END_HEADER
+
+Since a game's randomness comes only from its seed (see HeadlessGame), ticking a game with the
+recorded inputs reproduces the recorded game exactly. Keyframes allow a replay to seek to a
+tick without simulating from the start; from a keyframe, the game's state is restored
+exactly, but the physics engine's internal contact caches are not part of a snapshot, so
+later ticks may differ from the recording in the last bits of positions & velocities.
+
+Run this file to replay a recording at maximum speed
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import argparse
+import bisect
+import json
+import struct
+import time
+import zlib
+
+from headless import HeadlessGame, INPUT_HANDLERS
+
+RECORDING_MAGIC = b'NDRP'
+RECORDING_VERSION = 1
+
+# (magic, version, length of metadata)
+RECORDING_HEADER = struct.Struct('<4sHI')
+
+RECORD_INPUTS = b'I'
+RECORD_KEYFRAME = b'K'
+RECORD_END = b'E'
+
+INPUTS_HEADER = struct.Struct('<IB')
+KEYFRAME_HEADER = struct.Struct('<II')
+END_HEADER = struct.Struct('<I')
+
+# Number of ticks between keyframes
+KEYFRAME_INTERVAL = 600
+
+# Each input type is encoded by its index in this list
+INPUT_TYPES = list(INPUT_HANDLERS)
+
+# Input arguments are encoded as a tag, followed by the value in the tag's format:
+#   - b'b': a small int, as int8
+#   - b'i': any other int, as int64
+#   - b'd': a float, as float64
+#   - b's': a str, as a uint16 length & UTF-8
+#   - b't': a tuple, as a uint8 length & encoded values
+SMALL_INT = struct.Struct('<b')
+INT = struct.Struct('<q')
+FLOAT = struct.Struct('<d')
+LENGTH = struct.Struct('<H')
+COUNT = struct.Struct('<B')
+
+
+def _encode_value(value, parts: list):
+    """Appends the encoding of 'value' to 'parts (list<bytes>)'
+
+    Raises:
+        TypeError if value is not an int, float, str or tuple of those
+    """
+    if isinstance(value, int):
+        if -128 <= value < 128:
+            parts.append(b'b' + SMALL_INT.pack(value))
+        else:
+            parts.append(b'i' + INT.pack(value))
+    elif isinstance(value, float):
+        parts.append(b'd' + FLOAT.pack(value))
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        parts.append(b's' + LENGTH.pack(len(data)) + data)
+    elif isinstance(value, tuple):
+        parts.append(b't' + COUNT.pack(len(value)))
+        for item in value:
+            _encode_value(item, parts)
+    else:
+        raise TypeError(f"Cannot record input argument {value!r}")
+
+
+def _decode_value(data: bytes, offset: int):
+    """Decodes a value encoded by _encode_value
+
+    Return:
+        tuple<*, int>: The value & the offset just after it
+    """
+    tag = data[offset:offset + 1]
+    offset += 1
+
+    if tag == b'b':
+        return SMALL_INT.unpack_from(data, offset)[0], offset + SMALL_INT.size
+    elif tag == b'i':
+        return INT.unpack_from(data, offset)[0], offset + INT.size
+    elif tag == b'd':
+        return FLOAT.unpack_from(data, offset)[0], offset + FLOAT.size
+    elif tag == b's':
+        length, = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        return data[offset:offset + length].decode('utf-8'), offset + length
+    elif tag == b't':
+        count, = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        items = []
+        for _ in range(count):
+            item, offset = _decode_value(data, offset)
+            items.append(item)
+        return tuple(items), offset
+
+    raise ValueError(f"Unknown value tag {tag!r} at offset {offset - 1}")
+
+
+def encode_inputs(tick: int, inputs) -> bytes:
+    """(bytes) Returns the record of 'inputs' applied before 'tick'"""
+    parts = [RECORD_INPUTS, INPUTS_HEADER.pack(tick, len(inputs))]
+
+    for input_type, *args in inputs:
+        parts.append(COUNT.pack(INPUT_TYPES.index(input_type)) + COUNT.pack(len(args)))
+        for arg in args:
+            _encode_value(arg, parts)
+
+    return b''.join(parts)
+
+
+def decode_inputs(data: bytes, offset: int):
+    """Decodes the inputs of a record encoded by encode_inputs
+
+    Parameters:
+        data (bytes): The data containing the record
+        offset (int): The offset of the record in data, just after its record type
+
+    Return:
+        tuple<int, list<tuple<str, *>>, int>: The tick, the inputs & the offset just after the record
+
+    Raises:
+        ValueError if the record contains an unknown input type or value tag
+    """
+    tick, count = INPUTS_HEADER.unpack_from(data, offset)
+    offset += INPUTS_HEADER.size
+
+    inputs = []
+    for _ in range(count):
+        input_type, arg_count = data[offset], data[offset + 1]
+        offset += 2
+
+        if input_type >= len(INPUT_TYPES):
+            raise ValueError(f"Unknown input type {input_type} at offset {offset - 2}")
+
+        args = []
+        for _ in range(arg_count):
+            arg, offset = _decode_value(data, offset)
+            args.append(arg)
+
+        inputs.append((INPUT_TYPES[input_type], *args))
+
+    return tick, inputs, offset
+
+
+class InputRecorder:
+    """Records the inputs applied to a headless game, with periodic keyframes, to a binary stream"""
+
+    def __init__(self, stream, keyframe_interval: int = KEYFRAME_INTERVAL):
+        """Constructor
+
+        Parameters:
+            stream (io.BufferedIOBase): The binary stream to write the recording to
+            keyframe_interval (int): The number of ticks between keyframes
+        """
+        self._stream = stream
+        self._keyframe_interval = keyframe_interval
+        self._next_keyframe = None
+
+    def start(self, game: HeadlessGame):
+        """Starts recording a game
+
+        If the game has already been ticked, the recording starts with a keyframe, otherwise it
+        starts from the game's seed
+
+        Parameters:
+            game (HeadlessGame): The game to record; its world options must be JSON serialisable
+        """
+        start = game.get_ticks()
+
+        header = json.dumps({
+            'seed': game.get_seed(),
+            'grid_size': game.get_world().get_grid_size(),
+            'generated': game.is_generated(),
+            'world_options': game.get_world_options(),
+            'start': start,
+            'keyframe_interval': self._keyframe_interval,
+        }).encode('utf-8')
+
+        self._stream.write(RECORDING_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION, len(header)))
+        self._stream.write(header)
+
+        self._next_keyframe = start if start else self._keyframe_interval
+
+        game.set_recorder(self)
+
+    def record(self, game: HeadlessGame, inputs):
+        """Records inputs about to be applied to a game before its next tick, preceded by a
+        keyframe if one is due
+
+        Called by the game (see HeadlessGame.set_recorder)"""
+        tick = game.get_ticks()
+
+        if tick >= self._next_keyframe:
+            data = zlib.compress(game.save())
+            self._stream.write(RECORD_KEYFRAME + KEYFRAME_HEADER.pack(tick, len(data)) + data)
+            self._next_keyframe = tick + self._keyframe_interval
+
+        if inputs:
+            self._stream.write(encode_inputs(tick, inputs))
+
+    def stop(self, game: HeadlessGame):
+        """Stops recording a game, marking the end of the recording at its current tick"""
+        game.set_recorder(None)
+
+        self._stream.write(RECORD_END + END_HEADER.pack(game.get_ticks()))
+        self._stream.flush()
+
+
+class Replay:
+    """A recording of a headless game, from which the game can be replayed from its start or
+    from any tick"""
+
+    def __init__(self, data: bytes):
+        """Reads a recording
+
+        Parameters:
+            data (bytes): The recording, as written by an InputRecorder
+
+        Raises:
+            ValueError if data is not a recording of a supported version, or is incomplete
+        """
+        magic, version, length = RECORDING_HEADER.unpack_from(data)
+
+        if magic != RECORDING_MAGIC:
+            raise ValueError("Data is not a recording")
+        if version != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version {version}")
+
+        offset = RECORDING_HEADER.size
+        self._metadata = json.loads(data[offset:offset + length].decode('utf-8'))
+        offset += length
+
+        self._data = data
+
+        # Inputs applied before each tick, by tick
+        self._inputs = {}
+        # Tick & (offset, length) in data of each keyframe, in order of tick
+        self._keyframe_ticks = []
+        self._keyframes = []
+        self._end = None
+
+        while offset < len(data):
+            record_type = data[offset:offset + 1]
+            offset += 1
+
+            if record_type == RECORD_INPUTS:
+                tick, inputs, offset = decode_inputs(data, offset)
+                self._inputs.setdefault(tick, []).extend(inputs)
+
+            elif record_type == RECORD_KEYFRAME:
+                tick, length = KEYFRAME_HEADER.unpack_from(data, offset)
+                offset += KEYFRAME_HEADER.size
+
+                self._keyframe_ticks.append(tick)
+                self._keyframes.append((offset, length))
+                offset += length
+
+            elif record_type == RECORD_END:
+                self._end, = END_HEADER.unpack_from(data, offset)
+                offset += END_HEADER.size
+
+            else:
+                raise ValueError(f"Unknown record type {record_type!r} at offset {offset - 1}")
+
+        if self._end is None:
+            raise ValueError("Recording is incomplete")
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        """(Replay) Reads the recording in the file at 'path'"""
+        with open(path, 'rb') as file:
+            return cls(file.read())
+
+    def get_seed(self) -> int:
+        """(int) Returns the seed of the recorded game"""
+        return self._metadata['seed']
+
+    def get_start_tick(self) -> int:
+        """(int) Returns the tick at which the recording starts"""
+        return self._metadata['start']
+
+    def get_end_tick(self) -> int:
+        """(int) Returns the tick at which the recording ends"""
+        return self._end
+
+    def get_keyframe_ticks(self) -> [int]:
+        """(list<int>) Returns the tick of each keyframe, in order"""
+        return list(self._keyframe_ticks)
+
+    def get_inputs(self, tick: int) -> list:
+        """(list<tuple<str, *>>) Returns the inputs applied before 'tick'"""
+        return self._inputs.get(tick, [])
+
+    def create_game(self, tick: int = None, **game_options) -> HeadlessGame:
+        """Creates the game at the latest possible point at or before a tick, without simulating
+
+        The game is created from the latest keyframe at or before the tick, or from the seed if
+        there is no such keyframe & the recording starts from the seed
+
+        Parameters:
+            tick (int): The tick to create the game at or before; defaults to the start
+            game_options: Keyword arguments to be given to the HeadlessGame on creation
+
+        Raises:
+            ValueError if the tick is before the start of the recording
+        """
+        if tick is None:
+            tick = self.get_start_tick()
+
+        if tick < self.get_start_tick():
+            raise ValueError(f"Tick {tick} is before the start of the recording at {self.get_start_tick()}")
+
+        options = dict(self._metadata['world_options'], **game_options)
+
+        index = bisect.bisect_right(self._keyframe_ticks, tick) - 1
+
+        if index < 0:
+            return HeadlessGame(self.get_seed(), grid_size=tuple(self._metadata['grid_size']),
+                                generated=self._metadata.get('generated', True), **options)
+
+        offset, length = self._keyframes[index]
+        snapshot = zlib.decompress(self._data[offset:offset + length])
+
+        return HeadlessGame(snapshot=snapshot, **options)
+
+    def play(self, game: HeadlessGame, until: int = None):
+        """Ticks a game with the recorded inputs, as fast as possible
+
+        Parameters:
+            game (HeadlessGame): The game to tick, as created by create_game
+            until (int): The tick to stop at; defaults to the end of the recording
+        """
+        if until is None:
+            until = self._end
+
+        inputs = self._inputs
+        no_inputs = ()
+
+        for tick in range(game.get_ticks(), until):
+            game.tick(inputs.get(tick, no_inputs))
+
+    def seek(self, tick: int, **game_options) -> HeadlessGame:
+        """(HeadlessGame) Returns the game at 'tick', simulated from the nearest keyframe before it
+
+        See create_game for parameters"""
+        game = self.create_game(tick, **game_options)
+        self.play(game, tick)
+        return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a recording of a game at maximum speed")
+    parser.add_argument('path', help="the recording to replay")
+    parser.add_argument('--seek', type=int, default=None, help="the tick to start replaying from")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+
+    start = time.perf_counter()
+    game = replay.seek(args.seek) if args.seek is not None else replay.create_game()
+    loaded = time.perf_counter()
+    ticks = replay.get_end_tick() - game.get_ticks()
+    replay.play(game)
+    end = time.perf_counter()
+
+    player = game.get_player()
+    print(f"Replayed {ticks} ticks in {end - loaded:.3f} s ({ticks / (end - loaded):.0f} ticks/s), "
+          f"after {loaded - start:.3f} s loading")
+    print(f"Player at {player.get_position()}, with {player.get_health()} health & {player.get_food()} food")
+
+
+if __name__ == '__main__':
+    main()
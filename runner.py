@@ -0,0 +1,322 @@
+"""
+Runs many independent headless games across a pool of worker processes
+
+Run this file to measure the aggregate ticks per second of a number of games
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import argparse
+import logging
+import multiprocessing
+import struct
+import time
+from collections import namedtuple, deque
+
+# Compact state of a game, as passed between processes
+#   - tick: the number of ticks the game has run for
+#   - x, y, vx, vy: the player's position & velocity
+#   - health, food: the player's health & food
+#   - things: the number of things in the world
+# The player's fields are NaN if the game has no main player
+GameState = namedtuple('GameState', ['tick', 'x', 'y', 'vx', 'vy', 'health', 'food', 'things'])
+GAME_STATE_FORMAT = struct.Struct('<I6fI')
+
+# Most ticks a worker runs late, back to back, to catch up with its tick rate; any further
+# ticks are dropped, rather than falling further behind (as per World's max_steps_per_frame)
+RUNNER_MAX_TICKS_PER_FRAME = 5
+
+# Number of most recent errors kept for each game, until fetched
+RUNNER_ERROR_HISTORY = 16
+
+logger = logging.getLogger(__name__)
+
+
+def encode_state(game) -> bytes:
+    """(bytes) Returns the compact state of 'game (HeadlessGame)'"""
+    controller = game.get_controller()
+
+    if controller is None:
+        x = y = vx = vy = health = food = float('nan')
+    else:
+        player = controller.get_player()
+        x, y = player.get_position()
+        vx, vy = player.get_velocity()
+        health, food = player.get_health(), player.get_food()
+
+    return GAME_STATE_FORMAT.pack(game.get_ticks(), x, y, vx, vy, health, food,
+                                  game.get_world().count_things())
+
+
+def decode_state(data: bytes) -> GameState:
+    """(GameState) Returns the state encoded in 'data', as per encode_state"""
+    return GameState(*GAME_STATE_FORMAT.unpack(data))
+
+
+def _run_worker(connection, game_ids, seeds, tick_rate, max_ticks_per_frame, game_options):
+    """Runs games in a worker process until told to stop
+
+    Commands are received on the connection as tuples of (command, *arguments):
+        - ('input', game_id, inputs): Queues inputs for the game's next tick
+        - ('state', game_id): Replies with the game's encoded state, or None for an unknown game
+        - ('stats',): Replies with (ticks, seconds, dropped ticks) run by this worker so far
+        - ('errors',): Replies with the errors of each game since the last errors command
+        - ('stop',): Stops the worker
+
+    Invalid inputs (see headless.is_valid_input) are rejected, and a game whose tick raises an
+    error is no longer ticked; both are reported as errors of that game, rather than stopping
+    the worker & every other game it runs.
+
+    Parameters:
+        connection (multiprocessing.connection.Connection): The worker's end of a pipe to the runner
+        game_ids (list<int>): The id of each game owned by this worker
+        seeds (list<int>): The seed of each game owned by this worker
+        tick_rate (float): The number of times to tick each game per second, or None for as fast as possible
+        max_ticks_per_frame (int): The most ticks to run late to catch up with the tick rate
+        game_options (dict): Keyword arguments to be given to each HeadlessGame on creation
+    """
+    # imported here, so that the runner itself doesn't need to load the game
+    from headless import HeadlessGame, is_valid_input
+
+    games = {game_id: HeadlessGame(seed, **game_options) for game_id, seed in zip(game_ids, seeds)}
+    pending = {game_id: [] for game_id in games}
+    errors = {game_id: deque(maxlen=RUNNER_ERROR_HISTORY) for game_id in games}
+    failed = set()
+
+    ticks = 0
+    dropped = 0
+    start = time.perf_counter()
+    next_tick = start
+
+    while True:
+        while connection.poll():
+            command, *args = connection.recv()
+
+            if command == 'input':
+                game_id, inputs = args
+                if game_id not in games:
+                    logger.warning("Ignoring inputs for unknown game %r", game_id)
+                    continue
+
+                pixel_size = games[game_id].get_world().get_pixel_size()
+                for game_input in inputs:
+                    if is_valid_input(game_input, pixel_size):
+                        pending[game_id].append(game_input)
+                    else:
+                        errors[game_id].append(f"Rejected invalid input {game_input!r}")
+            elif command == 'state':
+                game_id, = args
+                game = games.get(game_id)
+                connection.send(None if game is None else encode_state(game))
+            elif command == 'stats':
+                connection.send((ticks, time.perf_counter() - start, dropped))
+            elif command == 'errors':
+                connection.send({game_id: list(game_errors) for game_id, game_errors in errors.items()
+                                 if game_errors})
+                for game_errors in errors.values():
+                    game_errors.clear()
+            elif command == 'stop':
+                connection.close()
+                return
+            else:
+                logger.warning("Ignoring unknown command %r", command)
+
+        if tick_rate is not None:
+            now = time.perf_counter()
+            delay = next_tick - now
+            if delay > 0:
+                # wait for the next tick, or a command, whichever comes first
+                connection.poll(delay)
+                continue
+            next_tick += 1 / tick_rate
+
+            behind = int((now - next_tick) * tick_rate)
+            if behind > max_ticks_per_frame:
+                dropped += behind - max_ticks_per_frame
+                next_tick += (behind - max_ticks_per_frame) / tick_rate
+
+        for game_id, game in games.items():
+            if game_id in failed or game.is_over():
+                continue
+
+            inputs, pending[game_id] = pending[game_id], []
+            try:
+                game.tick(inputs)
+            except Exception as error:
+                logger.exception("Stopping game %d after its tick with inputs %r failed", game_id, inputs)
+                errors[game_id].append(f"Stopped after {error!r}")
+                failed.add(game_id)
+                continue
+
+            ticks += 1
+
+
+class WorldRunner:
+    """Runs independent headless games, sharded across worker processes
+
+    Each worker owns its games & ticks them in a loop; the runner communicates with workers
+    only through compact messages (inputs in, encoded states out)"""
+
+    def __init__(self, count: int, processes: int = None, seeds=None, tick_rate: float = None,
+                 max_ticks_per_frame: int = RUNNER_MAX_TICKS_PER_FRAME, **game_options):
+        """Constructor
+
+        Parameters:
+            count (int): The number of games to run
+            processes (int): The number of worker processes, defaulting to the number of CPUs
+            seeds (list<int>): The seed of each game, defaulting to each game's id
+            tick_rate (float): The number of times to tick each game per second, or None for as fast as possible
+            max_ticks_per_frame (int): The most ticks a worker runs late, back to back, to catch
+                                       up with the tick rate; any further ticks are dropped
+            game_options: Keyword arguments to be given to each HeadlessGame on creation
+        """
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        processes = max(1, min(processes, count))
+
+        if seeds is None:
+            seeds = list(range(count))
+
+        self._count = count
+        self._processes = processes
+        self._seeds = seeds
+        self._tick_rate = tick_rate
+        self._max_ticks_per_frame = max_ticks_per_frame
+        self._game_options = game_options
+
+        self._workers = []
+        self._connections = []
+
+    def get_worker_for_game(self, game_id: int) -> int:
+        """(int) Returns the index of the worker that owns the game with 'game_id'
+
+        Raises:
+            KeyError if there is no game with 'game_id'
+        """
+        if not isinstance(game_id, int) or not 0 <= game_id < self._count:
+            raise KeyError(f"No game with id {game_id!r}")
+
+        return game_id % self._processes
+
+    def start(self):
+        """Starts the worker processes"""
+        for worker in range(self._processes):
+            game_ids = list(range(worker, self._count, self._processes))
+            seeds = [self._seeds[game_id] for game_id in game_ids]
+
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_worker,
+                                              args=(worker_connection, game_ids, seeds, self._tick_rate,
+                                                    self._max_ticks_per_frame, self._game_options),
+                                              daemon=True)
+            process.start()
+            # only the worker uses its end, so that reading from a worker that has exited fails
+            # (with EOFError) rather than waiting forever
+            worker_connection.close()
+
+            self._workers.append(process)
+            self._connections.append(connection)
+
+    def stop(self):
+        """Stops the worker processes & waits for them to exit"""
+        for connection in self._connections:
+            connection.send(('stop',))
+
+        for process in self._workers:
+            process.join()
+
+        self._workers = []
+        self._connections = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def submit_input(self, game_id: int, inputs):
+        """Queues inputs to be applied on the next tick of a game
+
+        Parameters:
+            game_id (int): The id of the game
+            inputs (list<tuple<str, *>>): The inputs to apply; see headless.INPUT_HANDLERS. Invalid
+                                          inputs are rejected, & reported by fetch_errors
+
+        Raises:
+            KeyError if there is no game with 'game_id'
+        """
+        self._connections[self.get_worker_for_game(game_id)].send(('input', game_id, list(inputs)))
+
+    def fetch_state(self, game_id: int) -> GameState:
+        """(GameState) Returns the current state of the game with 'game_id'
+
+        Raises:
+            KeyError if there is no game with 'game_id'
+        """
+        connection = self._connections[self.get_worker_for_game(game_id)]
+        connection.send(('state', game_id))
+        return decode_state(connection.recv())
+
+    def fetch_stats(self):
+        """Returns the number of ticks run by each worker, for how long & how many were dropped
+
+        Return:
+            list<tuple<int, float, int>>: The (ticks, seconds, dropped ticks) of each worker
+        """
+        for connection in self._connections:
+            connection.send(('stats',))
+
+        return [connection.recv() for connection in self._connections]
+
+    def wait_until_ready(self):
+        """Waits until every worker has created its games & is running them"""
+        self.fetch_stats()
+
+    def fetch_errors(self) -> dict:
+        """Returns the errors of each game since errors were last fetched, such as rejected
+        inputs, or the error that stopped a game
+
+        Return:
+            dict<int: list<str>>: The recent errors of each game with any, by game id
+        """
+        for connection in self._connections:
+            connection.send(('errors',))
+
+        errors = {}
+        for connection in self._connections:
+            errors.update(connection.recv())
+
+        return errors
+
+    def get_ticks_per_second(self) -> float:
+        """(float) Returns the aggregate number of game ticks per second, across all workers"""
+        return sum(ticks / seconds for ticks, seconds, _ in self.fetch_stats() if seconds > 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the aggregate tick rate of many headless games")
+    parser.add_argument('games', type=int, nargs='?', default=16, help="the number of games to run")
+    parser.add_argument('--processes', type=int, default=None, help="the number of worker processes")
+    parser.add_argument('--seconds', type=float, default=5, help="how long to run for")
+    args = parser.parse_args()
+
+    with WorldRunner(args.games, processes=args.processes) as runner:
+        # games are created by the workers, so exclude start-up from the measurement
+        runner.wait_until_ready()
+        before = runner.fetch_stats()
+        time.sleep(args.seconds)
+        after = runner.fetch_stats()
+
+    ticks = sum(end[0] - begin[0] for begin, end in zip(before, after))
+    seconds = max(end[1] - begin[1] for begin, end in zip(before, after))
+
+    print(f"{args.games} games on {len(after)} processes: {ticks / seconds:.0f} ticks/s "
+          f"({ticks / seconds / args.games:.0f} ticks/s per game)")
+
+
+if __name__ == '__main__':
+    main()
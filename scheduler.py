@@ -0,0 +1,261 @@
+"""
+Scheduling of mob updates by their distance to the nearest player (level of detail)
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import math
+import time
+from collections import deque
+
+# Levels of detail, nearest first, as (distance from the nearest player in cells, number of
+# ticks between updates); mobs further than the last distance are frozen
+MOB_LOD_LEVELS = ((8, 1), (16, 2), (32, 4), (64, 8))
+
+# Most time spent stepping mobs per tick, in seconds; mobs due beyond this wait for the next tick
+MOB_UPDATE_BUDGET = .002
+
+# Number of ticks between checks of which level of detail each mob is at
+MOB_LOD_REFRESH_INTERVAL = 15
+
+# Number of ticks between checks of whether a frozen mob has come within range
+MOB_FROZEN_INTERVAL = 30
+
+# Number of recent ticks over which mob update times are averaged
+MOB_TIME_HISTORY = 60
+
+# Due tick of a mob that has been deferred to the next tick by the budget
+DEFERRED = -1
+
+
+class MobScheduler:
+    """Steps the mobs of a world at a rate set by their distance to the nearest player
+
+    Used as the mob scheduler of a World (see World's mob_scheduler parameter), which then
+    steps mobs only through this scheduler, once per tick:
+        - mobs near a player are stepped every tick; further away, they are stepped every few
+          ticks (with the total time since they were last stepped); beyond the last level of
+          detail, or outside the world's active chunks, they are frozen
+        - each mob is given a phase when added, so that mobs updated every n ticks are spread
+          evenly over those n ticks, rather than all being stepped on the same tick
+        - sleeping mobs (see World.is_sleeping) are skipped, as if frozen
+        - if a budget is given, mobs still due once it has been spent on a tick are deferred to
+          the next tick, before any mobs due then
+
+    Since a budget makes the mobs stepped on each tick depend on real time, games that must
+    be repeatable (e.g. for replays) should not use one. The scheduler's phases aren't part of
+    a snapshot, so mobs updated at reduced rates may be stepped on different ticks after a
+    restore.
+    """
+
+    def __init__(self, levels=MOB_LOD_LEVELS, budget: float = None):
+        """Constructor
+
+        Parameters:
+            levels (tuple<tuple<float, int>>): The levels of detail, as per MOB_LOD_LEVELS
+            budget (float): The most time to spend stepping mobs per tick, in seconds, or None
+                            to step every mob that is due (e.g. MOB_UPDATE_BUDGET)
+        """
+        self._levels = tuple(levels)
+        self._budget = budget
+
+        # [due tick, time when last stepped, phase, interval (None if frozen), tick at which to
+        # next check the interval, staggered] of each mob
+        self._mobs = {}
+        # Mobs due on each tick, which may include mobs since removed or rescheduled
+        self._due = {}
+        self._deferred = deque()
+
+        self._tick = 0
+        self._time = 0.
+        self._next_phase = 0
+
+        self._stepped = 0
+        self._deferrals = 0
+        self._overruns = 0
+        self._times = deque(maxlen=MOB_TIME_HISTORY)
+
+    def add_mob(self, mob):
+        """Schedules a mob that has been added to the world, to be stepped on the next tick"""
+        phase = self._next_phase
+        self._next_phase += 1
+
+        self._mobs[mob] = [None, self._time, phase, None, 0, False]
+        self._schedule(mob, self._tick + 1)
+
+    def remove_mob(self, mob):
+        """Stops scheduling a mob that has been removed from the world"""
+        self._mobs.pop(mob, None)
+
+    def _schedule(self, mob, tick: int):
+        """Schedules 'mob' to be considered again on 'tick'"""
+        self._mobs[mob][0] = tick
+        self._due.setdefault(tick, []).append(mob)
+
+    def _get_interval(self, world, mob, players, player_chunks):
+        """(int) Returns the number of ticks between updates of 'mob', or None if it is frozen"""
+        if not players:
+            return None
+
+        x, y = mob.get_position()
+
+        if player_chunks is not None:
+            radius = world.get_activation_radius()
+            column, row = world.get_chunk_position(x, y)
+
+            if all(max(abs(column - player_column), abs(row - player_row)) > radius
+                   for player_column, player_row in player_chunks):
+                return None
+
+        distance = min(math.hypot(x - player_x, y - player_y) for player_x, player_y in players)
+        distance /= world.get_cell_expanse()
+
+        for limit, interval in self._levels:
+            if distance <= limit:
+                return interval
+
+        return None
+
+    def step(self, world, time_delta: float, game_data):
+        """Steps the mobs that are due on this tick
+
+        Called by 'world (World)' on each time step, with the world's time_delta & game_data
+        (see World.advance)"""
+        started = time.perf_counter()
+
+        for mob, mob_time_delta in self.take_due_mobs(world, time_delta, started):
+            mob.step(mob_time_delta, game_data)
+
+        self._times.append(time.perf_counter() - started)
+
+    def take_due_mobs(self, world, time_delta: float, started: float = None):
+        """Yields each mob that is due on this tick, to be stepped by the caller, in order
+
+        Mobs are rescheduled as they are yielded, as if they had been stepped; if there is a
+        budget, it is spent on the time between 'started' & each mob being taken (i.e. on
+        stepping the mobs already taken), so mobs must be stepped as they are taken for the
+        budget to hold. Used by step, & by population.MobPopulation to step the mobs together.
+
+        Parameters:
+            world (World): The world whose tick this is
+            time_delta (float): The time step of this tick, in seconds
+            started (float): The time.perf_counter() at which the tick started, for the budget;
+                             defaults to when the first mob is taken
+
+        Yield:
+            tuple<Mob, float>: A mob that is due, & the time since it was last stepped, in seconds
+        """
+        if started is None:
+            started = time.perf_counter()
+
+        self._tick += 1
+        self._time += time_delta
+        tick = self._tick
+
+        players = [player.get_position() for player in world.get_things_in_categories("player")]
+        player_chunks = None
+        if world.get_chunk_size() is not None:
+            player_chunks = {world.get_chunk_position(x, y) for x, y in players}
+
+        due = list(self._deferred)
+        self._deferred.clear()
+        due.extend(self._due.pop(tick, ()))
+
+        mobs = self._mobs
+        budget = self._budget
+        now = self._time
+
+        self._stepped = 0
+        for index, mob in enumerate(due):
+            state = mobs.get(mob)
+
+            # removed, or since rescheduled for another tick
+            if state is None or (state[0] != tick and state[0] != DEFERRED):
+                continue
+
+            if budget is not None and self._stepped and time.perf_counter() - started > budget:
+                deferred = [mob for mob in due[index:] if mob in mobs and mobs[mob][0] in (tick, DEFERRED)]
+                for mob in deferred:
+                    mobs[mob][0] = DEFERRED
+
+                self._deferred.extend(deferred)
+                self._deferrals += len(deferred)
+                self._overruns += 1
+                break
+
+            if tick >= state[4]:
+                interval = state[3] = self._get_interval(world, mob, players, player_chunks)
+
+                if interval is None:
+                    # frozen, so no time passes for it
+                    state[1] = now
+                    state[4] = tick + MOB_FROZEN_INTERVAL
+                    self._schedule(mob, state[4])
+                    continue
+
+                state[4] = tick + MOB_LOD_REFRESH_INTERVAL
+
+                if not state[5]:
+                    # spread mobs with the same interval evenly over the ticks of that interval
+                    state[5] = True
+                    offset = state[2] % interval
+                    if offset:
+                        self._schedule(mob, tick + offset)
+                        continue
+            else:
+                interval = state[3]
+
+            if mob.get_shape().body.is_sleeping:
+                # at rest, so no time passes for it (see World.is_sleeping)
+                state[1] = now
+                self._schedule(mob, tick + interval)
+                continue
+
+            mob_time_delta = now - state[1]
+            state[1] = now
+            self._stepped += 1
+            self._schedule(mob, tick + interval)
+
+            yield mob, mob_time_delta
+
+    def get_budget(self) -> float:
+        """(float) Returns the most time to spend stepping mobs per tick, in seconds, or None"""
+        return self._budget
+
+    def get_stats(self) -> dict:
+        """Returns statistics about the mobs scheduled
+
+        Return:
+            dict<str: *>: Mapping of:
+                - 'mobs': the number of mobs scheduled
+                - 'levels': the number of mobs at each interval (in ticks) between updates,
+                            with frozen mobs at None, as of when each was last considered
+                - 'stepped': the number of mobs stepped on the last tick
+                - 'deferred': the number of mobs waiting from the last tick
+                - 'deferrals': the total number of times mobs were deferred by the budget
+                - 'overruns': the total number of ticks on which the budget was spent
+                - 'budget': the budget per tick, in seconds (or None)
+                - 'last_time', 'mean_time', 'max_time': the time spent stepping mobs on the
+                                                        last tick & over recent ticks, in seconds
+        """
+        levels = {}
+        for state in self._mobs.values():
+            levels[state[3]] = levels.get(state[3], 0) + 1
+
+        times = self._times or [0.]
+
+        return {
+            'mobs': len(self._mobs),
+            'levels': levels,
+            'stepped': self._stepped,
+            'deferred': len(self._deferred),
+            'deferrals': self._deferrals,
+            'overruns': self._overruns,
+            'budget': self._budget,
+            'last_time': times[-1],
+            'mean_time': sum(times) / len(times),
+            'max_time': max(times),
+        }
@@ -0,0 +1,526 @@
+"""
+An authoritative game server, which runs a headless game at a fixed tick rate for players
+connected over TCP (see network.py for the protocol & client.py for a client)
+
+Each client controls its own player. Inputs received from clients are queued & applied at the
+start of the next tick; every few ticks, the state of the world is encoded once as a delta
+frame (see delta.py) & broadcast to every client, along with the sequence number of the last
+inputs applied for that client, so that it can reconcile its predictions.
+
+Run this file to serve a game, or with --load-test to measure tick times while dozens of bot
+clients play on localhost
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from delta import DeltaEncoder, DeltaDecoder
+from headless import HeadlessGame, GRID_WIDTH, GRID_HEIGHT, is_valid_input
+from scheduler import MobScheduler, MOB_UPDATE_BUDGET
+from network import (MESSAGE_STATE, MESSAGE_INPUTS, DEFAULT_PORT, ProtocolError, read_message,
+                     encode_welcome, encode_state, decode_state, encode_inputs_message,
+                     decode_inputs_message)
+
+# Number of ticks per second
+SERVER_TICK_RATE = 60
+
+# Number of ticks between states sent to clients
+SERVER_BROADCAST_INTERVAL = 3
+
+# Largest inputs message accepted from a client, in bytes
+SERVER_MAX_INPUTS_SIZE = 4096
+
+# Most inputs applied for a client per tick; any more are dropped
+SERVER_MAX_INPUTS_PER_TICK = 32
+
+# Most data waiting to be sent to a client, in bytes, before the client is disconnected for
+# falling behind
+SERVER_MAX_SEND_BUFFER = 2 ** 22
+
+# If the server falls this many seconds behind its tick schedule, it skips ahead instead of
+# trying to catch up
+SERVER_MAX_LAG = .25
+
+# Number of most recent tick times kept for statistics
+SERVER_TICK_HISTORY = 60 * 60 * 10
+
+logger = logging.getLogger(__name__)
+
+# Seconds between inputs sent by each bot in a load test
+BOT_INPUT_INTERVAL = .1
+
+
+class ClientConnection:
+    """A client connected to a GameServer, controlling a player"""
+
+    def __init__(self, controller, writer: asyncio.StreamWriter):
+        """Constructor
+
+        Parameters:
+            controller (headless.PlayerController): The controller of the client's player
+            writer (asyncio.StreamWriter): The stream to which to send messages
+        """
+        self._controller = controller
+        self._writer = writer
+
+        # Inputs received since the last tick, & the sequence number of the last inputs received
+        self._inputs = []
+        self._sequence = 0
+
+    def get_controller(self):
+        """(headless.PlayerController) Returns the controller of the client's player"""
+        return self._controller
+
+    def get_writer(self) -> asyncio.StreamWriter:
+        """(asyncio.StreamWriter) Returns the stream to which to send messages"""
+        return self._writer
+
+    def get_sequence(self) -> int:
+        """(int) Returns the sequence number of the last inputs received"""
+        return self._sequence
+
+    def receive_inputs(self, sequence: int, inputs):
+        """Queues inputs received from the client, to be applied on the next tick"""
+        self._sequence = sequence
+        self._inputs.extend(inputs)
+
+    def take_inputs(self) -> list:
+        """(list<tuple<str, *>>) Returns & clears the inputs received since the last tick"""
+        inputs, self._inputs = self._inputs, []
+        return inputs
+
+
+class GameServer:
+    """Runs a headless game at a fixed tick rate for clients connected over TCP"""
+
+    def __init__(self, game: HeadlessGame, tick_rate: int = SERVER_TICK_RATE,
+                 broadcast_interval: int = SERVER_BROADCAST_INTERVAL):
+        """Constructor
+
+        Parameters:
+            game (HeadlessGame): The game to run, typically without a main player
+            tick_rate (int): The number of ticks per second
+            broadcast_interval (int): The number of ticks between states sent to clients
+        """
+        self._game = game
+        self._tick_rate = tick_rate
+        self._broadcast_interval = broadcast_interval
+
+        self._encoder = DeltaEncoder(game.get_world(), keyframe_interval=None)
+
+        self._server = None
+        self._clients = []
+        self._running = False
+
+        self._tick_times = deque(maxlen=SERVER_TICK_HISTORY)
+        self._overruns = 0
+        self._bytes_sent = 0
+        self._dropped_inputs = 0
+
+    def get_game(self) -> HeadlessGame:
+        """(HeadlessGame) Returns the game being run"""
+        return self._game
+
+    def get_clients(self) -> list:
+        """(list<ClientConnection>) Returns every connected client"""
+        return list(self._clients)
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        """Starts accepting clients
+
+        Parameters:
+            host (str): The address on which to listen
+            port (int): The port on which to listen, or 0 for any free port
+
+        Return:
+            tuple<str, int>: The (host, port) on which the server is listening
+        """
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Adds a player for a newly connected client & queues their inputs until they disconnect"""
+        client = ClientConnection(self._game.add_player(), writer)
+        self._clients.append(client)
+
+        writer.write(encode_welcome(self._game.get_world(), self._broadcast_interval))
+        self._encoder.request_keyframe()
+
+        try:
+            while True:
+                message_type, body = await read_message(reader, max_size=SERVER_MAX_INPUTS_SIZE)
+
+                if message_type != MESSAGE_INPUTS:
+                    raise ProtocolError(f"Unexpected message type {message_type}")
+
+                sequence, inputs = decode_inputs_message(body)
+                pixel_size = self._game.get_world().get_pixel_size()
+                if not all(is_valid_input(game_input, pixel_size) for game_input in inputs):
+                    raise ProtocolError(f"Invalid inputs {inputs!r}")
+
+                client.receive_inputs(sequence, inputs)
+
+        except (asyncio.IncompleteReadError, ConnectionError, ProtocolError):
+            pass
+        finally:
+            self._disconnect(client)
+
+    def _disconnect(self, client: ClientConnection):
+        """Removes a client & their player from the game"""
+        if client not in self._clients:
+            return
+
+        self._clients.remove(client)
+        self._game.remove_player(client.get_controller())
+        client.get_writer().close()
+
+    def tick(self):
+        """Applies the inputs received from each client, advances the game by one tick & sends
+        the state of the world to every client, if due
+
+        A client whose inputs raise an error is disconnected, rather than stopping the game for
+        every other client"""
+        # copied, since clients may be disconnected
+        for client in list(self._clients):
+            inputs = client.take_inputs()
+
+            if len(inputs) > SERVER_MAX_INPUTS_PER_TICK:
+                self._dropped_inputs += len(inputs) - SERVER_MAX_INPUTS_PER_TICK
+                inputs = inputs[-SERVER_MAX_INPUTS_PER_TICK:]
+
+            try:
+                client.get_controller().apply_inputs(inputs)
+            except Exception:
+                logger.exception("Disconnecting client after their inputs %r failed", inputs)
+                self._disconnect(client)
+
+        self._game.tick()
+
+        tick = self._game.get_ticks()
+        if tick % self._broadcast_interval == 0:
+            self._broadcast(tick)
+
+    def _broadcast(self, tick: int):
+        """Sends the state of the world at 'tick' to every client"""
+        frame = self._encoder.encode(tick)
+
+        for client in list(self._clients):
+            writer = client.get_writer()
+
+            if writer.transport.get_write_buffer_size() > SERVER_MAX_SEND_BUFFER:
+                self._disconnect(client)
+                continue
+
+            player_id = self._encoder.get_thing_id(client.get_controller().get_player()) or 0
+            message = encode_state(client.get_sequence(), player_id, frame)
+
+            writer.write(message)
+            self._bytes_sent += len(message)
+
+    async def run(self, duration: float = None):
+        """Ticks the game at the tick rate, until stopped
+
+        Parameters:
+            duration (float): The number of seconds for which to run, or None to run until stop
+                              is called
+        """
+        loop = asyncio.get_running_loop()
+        period = 1 / self._tick_rate
+
+        start = next_tick = loop.time()
+        self._running = True
+
+        while self._running and (duration is None or loop.time() - start < duration):
+            started = time.perf_counter()
+            self.tick()
+            self._tick_times.append(time.perf_counter() - started)
+
+            next_tick += period
+            delay = next_tick - loop.time()
+
+            if delay < -SERVER_MAX_LAG:
+                self._overruns += 1
+                next_tick = loop.time()
+                delay = 0
+
+            await asyncio.sleep(max(0., delay))
+
+    def stop(self):
+        """Stops running the game after the current tick"""
+        self._running = False
+
+    async def close(self):
+        """Stops accepting clients & disconnects every client"""
+        self.stop()
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+        for client in list(self._clients):
+            self._disconnect(client)
+
+        self._encoder.close()
+
+    def reset_stats(self):
+        """Clears the tick time history & counters"""
+        self._tick_times.clear()
+        self._overruns = 0
+        self._bytes_sent = 0
+        self._dropped_inputs = 0
+
+    def get_stats(self) -> dict:
+        """Returns statistics about the ticks run so far
+
+        Return:
+            dict<str: *>: Mapping of:
+                - 'ticks': the number of ticks in the tick time history
+                - 'p50', 'p90', 'p99', 'max': percentiles of the time taken by each tick, in
+                                              seconds, including sending states
+                - 'overruns': the number of times the server fell too far behind its schedule
+                - 'bytes_sent': the number of bytes sent to clients
+                - 'dropped_inputs': the number of inputs dropped for exceeding the limit per tick
+                - 'clients': the number of connected clients
+                - 'mobs': the statistics of the game's mob scheduler, if it has one (see
+                          scheduler.MobScheduler.get_stats)
+                - 'items': the statistics of the items in the world (see World.get_item_stats)
+                - 'item_pool': the statistics of the reuse of item bodies & shapes (see
+                               World.get_item_pool_stats)
+                - 'spawning': the statistics of the game's mob spawner, if it has one (see
+                              spawning.MobSpawner.get_stats)
+                - 'loot': the statistics of the game's loot physics, if it has any (see
+                          loot.SimpleLoot.get_stats)
+                - 'collisions': the overlapping pairs of shapes by pair of categories, from
+                                any censuses (see World.get_collision_stats)
+        """
+        times = np.array(self._tick_times) if self._tick_times else np.zeros(1)
+        p50, p90, p99 = np.percentile(times, [50, 90, 99])
+        scheduler = self._game.get_world().get_mob_scheduler()
+        spawner = self._game.get_world().get_mob_spawner()
+        loot = self._game.get_world().get_loot_physics()
+
+        return {
+            'ticks': len(self._tick_times),
+            'p50': p50,
+            'p90': p90,
+            'p99': p99,
+            'max': times.max(),
+            'overruns': self._overruns,
+            'bytes_sent': self._bytes_sent,
+            'dropped_inputs': self._dropped_inputs,
+            'clients': len(self._clients),
+            'mobs': scheduler.get_stats() if scheduler is not None else None,
+            'items': self._game.get_world().get_item_stats(),
+            'item_pool': self._game.get_world().get_item_pool_stats(),
+            'spawning': spawner.get_stats() if spawner is not None else None,
+            'loot': loot.get_stats() if loot is not None else None,
+            'collisions': self._game.get_world().get_collision_stats(),
+        }
+
+
+async def run_bot(host: str, port: int, duration: float, seed: int) -> dict:
+    """Connects to a server as a bot that plays randomly, following the state of the world
+
+    Parameters:
+        host (str): The address of the server
+        port (int): The port of the server
+        duration (float): The number of seconds for which to play
+        seed (int): The seed of the bot's random choices
+
+    Return:
+        dict<str: *>: The number of 'states' & 'bytes' received, and the longest 'gap' between
+                      states, in seconds
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+
+    decoder = DeltaDecoder()
+    stats = {'states': 0, 'bytes': 0, 'gap': 0.}
+
+    async def receive():
+        last = None
+        while True:
+            message_type, body = await read_message(reader)
+            stats['bytes'] += len(body)
+
+            if message_type != MESSAGE_STATE:
+                continue
+
+            now = time.perf_counter()
+            if last is not None:
+                stats['gap'] = max(stats['gap'], now - last)
+            last = now
+
+            stats['states'] += 1
+            decoder.apply(decode_state(body)[2])
+
+    receiver = asyncio.ensure_future(receive())
+
+    loop = asyncio.get_running_loop()
+    end = loop.time() + duration
+    sequence = 0
+
+    try:
+        while loop.time() < end and not receiver.done():
+            inputs = [('move', rng.choice((-1, 1)), 0)]
+            if rng.random() < .2:
+                inputs.append(('jump',))
+            if rng.random() < .3:
+                inputs.append(('target', rng.uniform(0, 1000), rng.uniform(0, 500)))
+                inputs.append(('mine',) if rng.random() < .8 else ('use',))
+
+            sequence += 1
+            writer.write(encode_inputs_message(sequence, inputs))
+            await writer.drain()
+
+            await asyncio.sleep(BOT_INPUT_INTERVAL)
+    finally:
+        receiver.cancel()
+        writer.close()
+
+    return stats
+
+
+def _run_bots(host: str, port: int, count: int, duration: float, seed: int, connection):
+    """Runs 'count' bots concurrently & sends their statistics through 'connection'"""
+    async def run_all():
+        return await asyncio.gather(*(run_bot(host, port, duration, seed + i) for i in range(count)),
+                                    return_exceptions=True)
+
+    connection.send(asyncio.run(run_all()))
+
+
+async def load_test(bots: int, duration: float, seed: int = 0, grid_size=(GRID_WIDTH, GRID_HEIGHT),
+                    tick_rate: int = SERVER_TICK_RATE, broadcast_interval: int = SERVER_BROADCAST_INTERVAL):
+    """Runs a server on localhost while bot clients, in a separate process, play for a while
+
+    Parameters:
+        bots (int): The number of bot clients
+        duration (float): The number of seconds for which the bots play
+        seed (int): The seed of the game & the bots
+        grid_size (tuple<int, int>): The (column, row) size of the world's grid
+        tick_rate (int): The number of ticks per second
+        broadcast_interval (int): The number of ticks between states sent to clients
+
+    Return:
+        tuple<dict, list<dict>>: The server's statistics (see GameServer.get_stats) & those of
+                                 each bot (see run_bot)
+    """
+    game = HeadlessGame(seed, grid_size=grid_size, spawn_player=False,
+                        mob_scheduler=MobScheduler(budget=MOB_UPDATE_BUDGET))
+    server = GameServer(game, tick_rate=tick_rate, broadcast_interval=broadcast_interval)
+    host, port = await server.start('127.0.0.1', 0)
+
+    # bots run in their own process, so that they don't compete with the server's event loop
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_bots, args=(host, port, bots, duration, seed, sender), daemon=True)
+    process.start()
+
+    loop = asyncio.get_running_loop()
+    results = loop.run_in_executor(None, receiver.recv)
+
+    # exclude the time taken for the bots to start & join from the statistics
+    while len(server.get_clients()) < bots and not results.done():
+        server.tick()
+        await asyncio.sleep(1 / tick_rate)
+
+    game_ticks = game.get_ticks()
+    server.reset_stats()
+
+    runner = asyncio.ensure_future(server.run())
+    bot_stats = await results
+    stats = server.get_stats()
+    stats['game_ticks'] = game.get_ticks() - game_ticks
+
+    await server.close()
+    await runner
+    process.join()
+
+    return stats, bot_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves a headless game to clients over TCP")
+    parser.add_argument('--host', default='127.0.0.1', help="the address on which to listen")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="the port on which to listen")
+    parser.add_argument('--seed', type=int, default=None, help="the seed of the world")
+    parser.add_argument('--size', type=int, nargs=2, default=(GRID_WIDTH, GRID_HEIGHT),
+                        metavar=('COLUMNS', 'ROWS'), help="the size of the world's grid")
+    parser.add_argument('--tick-rate', type=int, default=SERVER_TICK_RATE, help="the number of ticks per second")
+    parser.add_argument('--broadcast-interval', type=int, default=SERVER_BROADCAST_INTERVAL,
+                        help="the number of ticks between states sent to clients")
+    parser.add_argument('--load-test', type=int, default=None, metavar='BOTS',
+                        help="instead of serving, measure tick times while this many bots play on localhost")
+    parser.add_argument('--seconds', type=float, default=10, help="how long the load test runs for")
+    args = parser.parse_args()
+
+    if args.load_test is not None:
+        stats, bot_stats = asyncio.run(load_test(args.load_test, args.seconds, seed=args.seed or 0,
+                                                 grid_size=tuple(args.size), tick_rate=args.tick_rate,
+                                                 broadcast_interval=args.broadcast_interval))
+
+        failures = [result for result in bot_stats if isinstance(result, BaseException)]
+        bot_stats = [result for result in bot_stats if not isinstance(result, BaseException)]
+
+        print(f"{args.load_test} bots for {args.seconds:g}s: {stats['game_ticks']} ticks "
+              f"({stats['game_ticks'] / args.seconds:.1f}/s), {stats['overruns']} overruns, "
+              f"{len(failures)} failed bots")
+        print("tick time (ms): " + ", ".join(f"{key} {stats[key] * 1000:.2f}" for key in ('p50', 'p90', 'p99', 'max')))
+
+        mobs = stats['mobs']
+        if mobs is not None:
+            print(f"mobs: {mobs['mobs']}, mean {mobs['mean_time'] * 1000:.2f} ms & max "
+                  f"{mobs['max_time'] * 1000:.2f} ms per tick (budget {(mobs['budget'] or 0) * 1000:g} ms), "
+                  f"{mobs['overruns']} ticks over budget")
+
+        items, pool = stats['items'], stats['item_pool']
+        print(f"items: {items['items']}, {items['expired']} expired, {items['evicted']} evicted, "
+              f"{items['merged']} merged; bodies reused: {pool['hits']} of {pool['hits'] + pool['misses']} "
+              f"({pool['hit_rate']:.0%})")
+
+        spawning = stats['spawning']
+        if spawning is not None:
+            print(f"spawned {spawning['spawned']} mobs ({spawning['reused']} reused), despawned "
+                  f"{spawning['despawned_far'] + spawning['despawned_idle']}")
+
+        if bot_stats:
+            states = np.mean([bot['states'] for bot in bot_stats]) / args.seconds
+            received = np.mean([bot['bytes'] for bot in bot_stats]) / args.seconds
+            gap = max(bot['gap'] for bot in bot_stats)
+            print(f"per bot: {states:.1f} states/s, {received / 1024:.1f} KiB/s, "
+                  f"longest gap between states {gap * 1000:.0f} ms")
+        return
+
+    async def serve():
+        game = HeadlessGame(args.seed, grid_size=tuple(args.size), spawn_player=False,
+                            mob_scheduler=MobScheduler(budget=MOB_UPDATE_BUDGET))
+        server = GameServer(game, tick_rate=args.tick_rate, broadcast_interval=args.broadcast_interval)
+        host, port = await server.start(args.host, args.port)
+        print(f"Serving seed {game.get_seed()} on {host}:{port}")
+
+        try:
+            await server.run()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -22,5 +22,5 @@ def execute(cmd):
     if return_code:
         raise subprocess.CalledProcessError(return_code, cmd)
 
-for path in execute([sys.executable, "-m", "pip", "install", "pymunk"]):
+for path in execute([sys.executable, "-m", "pip", "install", "pymunk", "numpy"]):
     print(path, end="")
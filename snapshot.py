@@ -0,0 +1,384 @@
+"""
+Compact binary snapshots of the game world, the player & their items
+
+A snapshot consists of:
+    - a header of SNAPSHOT_HEADER, giving the length of the metadata that follows
+    - metadata, as UTF-8 JSON, including the block id of each code & the kind of each thing
+    - the block code of every grid cell, as a (columns, rows) array of uint16
+    - the remaining hitpoints of damaged blocks only, as an array of HITPOINTS_DTYPE
+    - every item & mob (including those stored in inactive chunks), as an array of THING_DTYPE
+    - the stacks of each item grid (e.g. hot bar & inventory), as an array of STACK_DTYPE
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import json
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from dropped_item import DroppedItem
+from inventory import Stack
+from item import create_item
+from mob import Mob, Bird
+from terrain import load_terrain
+
+SNAPSHOT_MAGIC = b'NDSS'
+SNAPSHOT_VERSION = 3
+
+# (magic, version, length of metadata)
+SNAPSHOT_HEADER = struct.Struct('<4sHI')
+
+# Mob classes that can be restored from a snapshot, by name
+MOB_CLASSES = {cls.__name__: cls for cls in (Mob, Bird)}
+
+# Cells are indexed by column * rows + row
+HITPOINTS_DTYPE = np.dtype([('cell', '<u4'), ('hitpoints', '<f8')])
+THING_DTYPE = np.dtype([('kind', '<u2'), ('x', '<f8'), ('y', '<f8'), ('vx', '<f8'), ('vy', '<f8'),
+                        ('health', '<f8'), ('steps', '<u4'), ('age', '<f8'), ('quantity', '<u2')])
+STACK_DTYPE = np.dtype([('grid', 'u1'), ('row', '<u2'), ('column', '<u2'), ('item', '<u2'),
+                        ('quantity', '<u2')])
+
+# A snapshot, as read by load_snapshot
+#   - grid_size: the (column, row) size of the world's grid
+#   - block_ids: the block id of each code in codes (None for empty)
+#   - codes: the (columns, rows) array of the code of each cell's block
+#   - hitpoints: the array of the remaining hitpoints of each damaged block
+#   - kinds: the kind of each thing in things (see encode_things)
+#   - things: the array of the state of each item & mob
+#   - player: the player's state as a dict, or None if there was no player
+#   - item_ids: the item id of each item in stacks
+#   - stacks: the array of the stacks of each item grid
+#   - metadata: arbitrary data given to save_snapshot
+Snapshot = namedtuple('Snapshot', ['grid_size', 'block_ids', 'codes', 'hitpoints', 'kinds', 'things',
+                                   'player', 'item_ids', 'stacks', 'metadata'])
+
+
+def encode_blocks(world):
+    """Encodes every block in a world, including those stored in inactive chunks
+
+    Parameters:
+        world (World): The world whose blocks to encode
+
+    Return:
+        tuple<list<tuple<*>>, np.ndarray<uint16>, np.ndarray<HITPOINTS_DTYPE>>:
+                The block id of each code (None for empty), the (columns, rows) array of the
+                code of each cell's block & the remaining hitpoints of each damaged block
+    """
+    columns, rows = world.get_grid_size()
+    palette = world.get_block_palette()
+
+    codes = np.zeros((columns, rows), dtype=np.uint16)
+    damaged = []
+
+    size = world.get_chunk_size()
+    if size is not None:
+        for chunk in world.get_chunks():
+            if chunk.is_active():
+                continue
+
+            world.load_chunk(chunk)
+
+            left, top = chunk.get_origin()
+            # chunks store their codes row-major, and may overhang the grid
+            region = np.frombuffer(chunk.get_codes(), dtype=np.uint16).reshape(size, size).T
+            width, height = min(size, columns - left), min(size, rows - top)
+            codes[left:left + width, top:top + height] = region[:width, :height]
+
+            damaged.extend(chunk.get_damaged_blocks())
+
+    block_columns, block_rows, block_codes = [], [], []
+    for block in world.get_things_in_categories("block"):
+        column, row = world.get_block_cell(block)
+        block_columns.append(column)
+        block_rows.append(row)
+        block_codes.append(palette.encode(block.get_block_id()))
+
+        hitpoints = block.get_hitpoints()
+        if hitpoints != block.get_max_hitpoints():
+            damaged.append((column, row, hitpoints))
+
+    codes[block_columns, block_rows] = block_codes
+
+    hitpoints = np.array([(column * rows + row, value) for column, row, value in damaged],
+                         dtype=HITPOINTS_DTYPE)
+
+    return [None] + palette.get_block_ids(), codes, hitpoints
+
+
+def encode_things(world):
+    """Encodes every item & mob in a world, including those stored in inactive chunks
+
+    Each distinct kind of thing is encoded once, as a tuple of either:
+        - ('item', item_id) for a dropped item
+        - ('mob', class_name, mob_id, width, height, tempo, max_health) for a mob
+
+    Parameters:
+        world (World): The world whose things to encode
+
+    Return:
+        tuple<list<tuple<*>>, np.ndarray<THING_DTYPE>>:
+                The kind of each thing & the array of the state of each thing
+    """
+    stored = list(_get_active_things(world))
+
+    if world.get_chunk_size() is not None:
+        for chunk in world.get_chunks():
+            stored.extend((thing, position, velocity) for thing, _, position, velocity in chunk.get_things())
+
+    kinds = {}
+    records = []
+
+    for thing, (x, y), (vx, vy) in stored:
+        if isinstance(thing, DroppedItem):
+            kind = ('item', thing.get_item().get_id())
+            steps = 0
+            age = world.get_item_age(thing)
+            quantity = thing.get_quantity()
+        else:
+            width, height = thing.get_size()
+            kind = ('mob', type(thing).__name__, thing.get_id(), width, height, thing.get_tempo(),
+                    thing.get_max_health())
+            steps = thing.get_steps()
+            age = thing.get_age()
+            quantity = 0
+
+        code = kinds.setdefault(kind, len(kinds))
+        records.append((code, x, y, vx, vy, thing.get_health(), steps, age, quantity))
+
+    return list(kinds), np.array(records, dtype=THING_DTYPE)
+
+
+def _get_active_things(world):
+    """Yields the (thing, position, velocity) of every item & mob that is simulated in a world"""
+    for thing in world.get_things_in_categories("item", "mob"):
+        velocity = thing.get_velocity()
+        yield thing, thing.get_position(), (velocity.x, velocity.y)
+
+
+def encode_stacks(grids):
+    """Encodes the stacks of item grids
+
+    Parameters:
+        grids (list<Grid>): The item grids whose stacks to encode
+
+    Return:
+        tuple<list<str>, np.ndarray<STACK_DTYPE>>:
+                The item id of each item & the array of each stack
+    """
+    item_ids = {}
+    records = []
+
+    for index, grid in enumerate(grids):
+        for (row, column), stack in grid.items():
+            if stack is None:
+                continue
+
+            item = item_ids.setdefault(stack.get_item().get_id(), len(item_ids))
+            records.append((index, row, column, item, stack.get_quantity()))
+
+    return list(item_ids), np.array(records, dtype=STACK_DTYPE)
+
+
+def save_snapshot(world, player=None, grids=(), metadata=None) -> bytes:
+    """Saves a snapshot of a world
+
+    Parameters:
+        world (World): The world to save
+        player (Player): The player to save, or None if there is no player
+        grids (list<Grid>): The player's item grids (e.g. hot bar & inventory) to save
+        metadata (dict): Arbitrary JSON serialisable data to save with the snapshot
+
+    Return:
+        bytes: The snapshot
+    """
+    block_ids, codes, hitpoints = encode_blocks(world)
+    kinds, things = encode_things(world)
+    item_ids, stacks = encode_stacks(grids)
+
+    player_state = None
+    if player is not None:
+        velocity = player.get_velocity()
+        player_state = {
+            'position': player.get_position(),
+            'velocity': (velocity.x, velocity.y),
+            'health': player.get_health(),
+            'food': player.get_food(),
+        }
+
+    header = json.dumps({
+        'grid_size': world.get_grid_size(),
+        'block_ids': block_ids,
+        'kinds': kinds,
+        'item_ids': item_ids,
+        'player': player_state,
+        'counts': (len(hitpoints), len(things), len(stacks)),
+        'metadata': metadata,
+    }).encode('utf-8')
+
+    return b''.join((SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)), header,
+                     codes.tobytes(), hitpoints.tobytes(), things.tobytes(), stacks.tobytes()))
+
+
+def load_snapshot(data: bytes) -> Snapshot:
+    """Reads a snapshot, without restoring it
+
+    The arrays of the returned snapshot are read-only views of 'data'
+
+    Parameters:
+        data (bytes): The snapshot, as per save_snapshot
+
+    Raises:
+        ValueError if data is not a snapshot of a supported version
+    """
+    magic, version, length = SNAPSHOT_HEADER.unpack_from(data)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Data is not a snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    offset = SNAPSHOT_HEADER.size
+    header = json.loads(data[offset:offset + length].decode('utf-8'))
+    offset += length
+
+    columns, rows = header['grid_size']
+    hitpoints_count, things_count, stacks_count = header['counts']
+
+    arrays = []
+    for dtype, count in ((np.uint16, columns * rows), (HITPOINTS_DTYPE, hitpoints_count),
+                         (THING_DTYPE, things_count), (STACK_DTYPE, stacks_count)):
+        arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset))
+        offset += count * np.dtype(dtype).itemsize
+
+    codes, hitpoints, things, stacks = arrays
+
+    return Snapshot(
+        grid_size=(columns, rows),
+        block_ids=[tuple(block_id) if block_id is not None else None for block_id in header['block_ids']],
+        codes=codes.reshape(columns, rows),
+        hitpoints=hitpoints,
+        kinds=[tuple(kind) for kind in header['kinds']],
+        things=things,
+        player=header['player'],
+        item_ids=header['item_ids'],
+        stacks=stacks,
+        metadata=header['metadata'],
+    )
+
+
+def _create_thing(kind, quantity: int, rng=None):
+    """(DynamicThing) Returns a new thing of 'kind', as per encode_things, with mobs moving by
+    'rng' & items in a pile of 'quantity'"""
+    if kind[0] == 'item':
+        return DroppedItem(create_item(kind[1]), quantity)
+
+    _, class_name, mob_id, width, height, tempo, max_health = kind
+    return MOB_CLASSES[class_name](mob_id, (width, height), tempo=tempo, max_health=max_health, rng=rng)
+
+
+def restore_world(world, snapshot: Snapshot, rng=None):
+    """Restores the blocks & things of a snapshot into a world
+
+    As with terrain.load_terrain, for a chunked world, the contents of inactive chunks are
+    written directly into each chunk, so that no blocks are created for them. Chunks that the
+    world's chunk store already holds are overwritten too, since the snapshot is the newer state
+
+    Parameters:
+        world (World): The world to restore into; must be empty & have the snapshot's grid size
+        snapshot (Snapshot): The snapshot, as per load_snapshot
+        rng (random.Random): The source of randomness for restored mobs (see Mob)
+
+    Raises:
+        ValueError if the world's grid is not the same size as the snapshot's
+    """
+    if tuple(world.get_grid_size()) != snapshot.grid_size:
+        raise ValueError(f"Cannot restore a {snapshot.grid_size} snapshot into a "
+                         f"{world.get_grid_size()} world")
+
+    load_terrain(world, snapshot.codes, snapshot.block_ids, overwrite=True)
+
+    columns, rows = snapshot.grid_size
+    for cell, hitpoints in snapshot.hitpoints.tolist():
+        column, row = divmod(cell, rows)
+        block = world.get_block_at_cell(column, row)
+
+        if block is not None:
+            block.set_hitpoints(hitpoints)
+        else:
+            chunk = world.get_chunk_at_cell(column, row)
+            chunk.set_block(column, row, chunk.get_block(column, row)[0], hitpoints)
+
+    chunked = world.get_chunk_size() is not None
+
+    for kind, x, y, vx, vy, health, steps, age, quantity in snapshot.things.tolist():
+        kind = snapshot.kinds[kind]
+        category = kind[0]
+
+        thing = _create_thing(kind, quantity, rng)
+        thing.set_health(health)
+        if category == 'mob':
+            thing.set_steps(steps)
+            thing.set_age(age)
+
+        if chunked:
+            column, row = world.xy_to_grid(x, y)
+            column = min(max(column, 0), columns - 1)
+            row = min(max(row, 0), rows - 1)
+            chunk = world.get_chunk_at_cell(column, row)
+
+            if not chunk.is_active():
+                chunk.add_thing(thing, category, (x, y), (vx, vy))
+                if category == 'item':
+                    world.set_item_age(thing, age)
+                continue
+
+        if category == 'item':
+            world.add_item(thing, x, y)
+            world.set_item_age(thing, age)
+        else:
+            world.add_mob(thing, x, y)
+
+        thing.set_velocity((vx, vy))
+
+
+def restore_player(world, player, snapshot: Snapshot):
+    """Restores the state of the player in a snapshot, and adds them to a world
+
+    Parameters:
+        world (World): The world to add the player to
+        player (Player): The player to restore
+        snapshot (Snapshot): The snapshot, as per load_snapshot
+
+    Raises:
+        ValueError if the snapshot has no player
+    """
+    state = snapshot.player
+
+    if state is None:
+        raise ValueError("Snapshot has no player")
+
+    world.add_player(player, *state['position'])
+    player.set_velocity(state['velocity'])
+    player.set_health(state['health'])
+    player.change_food(state['food'] - player.get_food())
+
+
+def restore_stacks(grids, snapshot: Snapshot):
+    """Replaces the stacks of item grids with those in a snapshot
+
+    Parameters:
+        grids (list<Grid>): The item grids to restore, in the same order as they were saved
+        snapshot (Snapshot): The snapshot, as per load_snapshot
+    """
+    for grid in grids:
+        for position in grid:
+            grid[position] = None
+
+    item_ids = snapshot.item_ids
+    for index, row, column, item, quantity in snapshot.stacks.tolist():
+        grids[index][row, column] = Stack(create_item(item_ids[item]), quantity)
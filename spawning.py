@@ -0,0 +1,244 @@
+"""
+Spawning & despawning of mobs around players, recycling despawned mobs
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import math
+import random
+from itertools import accumulate
+
+from mob import create_mob
+
+# Relative likelihood of each type of mob being spawned, as (weight, mob id) pairs
+MOB_SPAWN_WEIGHTS = ((1, 'friendly_bird'),)
+
+# Target number of mobs per grid column within the spawn radius of each player
+MOB_DENSITY = 1 / 12
+
+# Distances from a player, in cells: mobs are spawned between the minimum distance & the
+# spawn radius, and despawned beyond the despawn radius
+MOB_SPAWN_RADIUS = 24
+MOB_SPAWN_MIN_DISTANCE = 8
+MOB_DESPAWN_RADIUS = 48
+
+# Mobs that have moved less than the idle distance (in cells) within the idle time (in seconds)
+# are despawned, unless they are within the minimum spawn distance of a player
+MOB_IDLE_TIME = 30
+MOB_IDLE_DISTANCE = 1
+
+# Number of ticks between spawning & despawning mobs
+MOB_SPAWN_INTERVAL = 20
+
+# Most mobs spawned around each player at once, & attempts to find a cell for each
+MOB_SPAWNS_PER_CHECK = 2
+MOB_SPAWN_ATTEMPTS = 4
+
+# Most despawned mobs of each type kept for reuse
+MOB_POOL_SIZE = 64
+
+
+class MobSpawner:
+    """Keeps a density of mobs around players, spawning them on the surface & despawning them
+    once they are far from every player or idle
+
+    Used as the mob spawner of a World (see World's mob_spawner parameter), which steps it once
+    per tick. Every MOB_SPAWN_INTERVAL ticks:
+        - mobs in the world that are beyond the despawn radius of every player, or that have
+          been idle for too long, are removed from the world
+        - near each player with fewer mobs than the target density, a few mobs are spawned in
+          random empty cells directly above the topmost block of a column (see
+          World.get_surface_row), away from the player
+
+    Despawned mobs are kept in a pool, along with their bodies & shapes (see World.add_thing),
+    and are reset & spawned again rather than creating new mobs, so that the churn of mobs
+    doesn't allocate.
+
+    Mobs stored in inactive chunks are left alone. If there are no players, nothing is spawned
+    or despawned. Like the mob scheduler, a spawner's state (its pool & how long mobs have been
+    idle) isn't part of a snapshot.
+    """
+
+    def __init__(self, rng=random, weights=MOB_SPAWN_WEIGHTS, density: float = MOB_DENSITY,
+                 spawn_radius: float = MOB_SPAWN_RADIUS, min_distance: float = MOB_SPAWN_MIN_DISTANCE,
+                 despawn_radius: float = MOB_DESPAWN_RADIUS, idle_time: float = MOB_IDLE_TIME,
+                 interval: int = MOB_SPAWN_INTERVAL, pool_size: int = MOB_POOL_SIZE):
+        """Constructor
+
+        Parameters:
+            rng (random.Random): The source of randomness for where & which mobs are spawned, and
+                                 for the movement of new mobs; defaults to the random module
+            weights (tuple<tuple<float, str>>): The (weight, mob id) of each type of mob to spawn,
+                                                as per MOB_SPAWN_WEIGHTS
+            density (float): The target number of mobs per grid column within the spawn radius
+            spawn_radius (float): The furthest distance from a player to spawn mobs, in cells
+            min_distance (float): The nearest distance to a player to spawn mobs, in cells
+            despawn_radius (float): The distance from every player beyond which mobs are
+                                    despawned, in cells
+            idle_time (float): The time after which mobs that haven't moved are despawned, in seconds
+            interval (int): The number of ticks between spawning & despawning mobs
+            pool_size (int): The most despawned mobs of each type to keep for reuse
+        """
+        self._rng = rng
+
+        weights, mob_ids = zip(*weights)
+        self._mob_ids = mob_ids
+        self._cum_weights = list(accumulate(weights))
+
+        self._density = density
+        self._spawn_radius = spawn_radius
+        self._min_distance = min_distance
+        self._despawn_radius = despawn_radius
+        self._idle_time = idle_time
+        self._interval = interval
+        self._pool_size = pool_size
+
+        # Despawned mobs of each type, ready to be spawned again
+        self._pools = {mob_id: [] for mob_id in mob_ids}
+        # [x, y, time] at which each mob was last found to have moved by the idle distance
+        self._movements = {}
+
+        self._tick = 0
+        self._time = 0.
+
+        self._created = 0
+        self._reused = 0
+        self._despawned_far = 0
+        self._despawned_idle = 0
+
+    def step(self, world, time_delta: float, game_data):
+        """Spawns & despawns mobs, if it is time to
+
+        Called by 'world (World)' on each time step, with the world's time_delta & game_data
+        (see World.advance)"""
+        self._tick += 1
+        self._time += time_delta
+
+        if self._tick % self._interval:
+            return
+
+        players = [player.get_position() for player in world.get_things_in_categories("player")]
+        if not players:
+            return
+
+        self._despawn(world, players)
+
+        for x, y in players:
+            self._populate(world, x, y)
+
+    def _despawn(self, world, players):
+        """Removes mobs that are far from every player in 'players', or idle, from 'world'"""
+        expanse = world.get_cell_expanse()
+        despawn_radius = self._despawn_radius * expanse
+        min_distance = self._min_distance * expanse
+        idle_distance = MOB_IDLE_DISTANCE * expanse
+        now = self._time
+
+        # rebuilt, so that mobs no longer in the world are forgotten
+        movements = {}
+
+        # copied, since mobs are removed
+        for mob in list(world.get_things_in_categories("mob")):
+            x, y = mob.get_position()
+            distance = min(math.hypot(x - player_x, y - player_y) for player_x, player_y in players)
+
+            movement = self._movements.get(mob)
+            if movement is None or math.hypot(x - movement[0], y - movement[1]) > idle_distance:
+                movement = [x, y, now]
+
+            if distance > despawn_radius:
+                self._despawned_far += 1
+            elif distance > min_distance and now - movement[2] >= self._idle_time:
+                self._despawned_idle += 1
+            else:
+                movements[mob] = movement
+                continue
+
+            world.remove_mob(mob)
+
+            pool = self._pools.get(mob.get_id())
+            if pool is not None and len(pool) < self._pool_size:
+                pool.append(mob)
+
+        self._movements = movements
+
+    def _populate(self, world, x: float, y: float):
+        """Spawns mobs around the player at ('x', 'y') in 'world', if there are too few"""
+        expanse = world.get_cell_expanse()
+        target = round(self._density * (2 * self._spawn_radius + 1))
+        count = len(world.get_mobs(x, y, self._spawn_radius * expanse))
+
+        column, row = world.xy_to_grid(x, y)
+        for _ in range(min(target - count, MOB_SPAWNS_PER_CHECK)):
+            self._spawn_near(world, column, row)
+
+    def _spawn_near(self, world, column: int, row: int) -> bool:
+        """Spawns a mob on the surface between the minimum distance & the spawn radius of the
+        cell at ('column', 'row'), if an empty cell can be found within MOB_SPAWN_ATTEMPTS
+
+        Return:
+            bool: True iff a mob was spawned
+        """
+        columns, rows = world.get_grid_size()
+        radius = int(self._spawn_radius)
+
+        for _ in range(MOB_SPAWN_ATTEMPTS):
+            spawn_column = column + self._rng.randint(-radius, radius)
+            if not 0 <= spawn_column < columns:
+                continue
+
+            surface = world.get_surface_row(spawn_column)
+            # an empty column has no surface, & a full one has no room above it
+            if surface == rows or surface == 0:
+                continue
+
+            spawn_row = surface - 1
+            if not self._min_distance <= math.hypot(spawn_column - column, spawn_row - row) <= self._spawn_radius:
+                continue
+
+            if not world.is_cell_active(spawn_column, spawn_row):
+                continue
+
+            world.add_mob(self._take_mob(), *world.grid_to_xy_centre(spawn_column, spawn_row))
+            return True
+
+        return False
+
+    def _take_mob(self):
+        """(Mob) Returns a mob of a random type, reused from the pool if possible"""
+        mob_id = self._rng.choices(self._mob_ids, cum_weights=self._cum_weights)[0]
+        pool = self._pools[mob_id]
+
+        if pool:
+            mob = pool.pop()
+            mob.reset()
+            self._reused += 1
+        else:
+            mob = create_mob(mob_id, rng=self._rng)
+            self._created += 1
+
+        return mob
+
+    def get_stats(self) -> dict:
+        """Returns statistics about the mobs spawned & despawned
+
+        Return:
+            dict<str: int>: Mapping of:
+                - 'spawned': the total number of mobs spawned
+                - 'created': the number of those that were new mobs
+                - 'reused': the number of those that were taken from the pool
+                - 'despawned_far': the total number of mobs despawned for being far from players
+                - 'despawned_idle': the total number of mobs despawned for being idle
+                - 'pooled': the number of mobs in the pool
+        """
+        return {
+            'spawned': self._created + self._reused,
+            'created': self._created,
+            'reused': self._reused,
+            'despawned_far': self._despawned_far,
+            'despawned_idle': self._despawned_idle,
+            'pooled': sum(len(pool) for pool in self._pools.values()),
+        }
@@ -0,0 +1,199 @@
+"""
+Streaming of chunks from storage in the background, ahead of the player
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import queue
+import threading
+from collections import OrderedDict
+
+# Maximum number of decoded chunks kept in memory, waiting to be activated
+STREAMING_CACHE_SIZE = 64
+
+# How far ahead to predict the player's position, in seconds
+STREAMING_LOOKAHEAD = 1.
+
+# Fractions of the lookahead at which to predict the player's position
+STREAMING_PREDICTIONS = (.5, 1.)
+
+
+class ChunkStreamer:
+    """Reads & decodes chunks from a region.RegionStore on a background thread, ahead of the
+    players in a world, so that activating a chunk doesn't have to wait on storage
+
+    Used as the chunk store of a World (see World's chunk_store parameter). Before each update of
+    the world's active chunks, prefetch:
+        - moves chunks decoded by the background thread out of a queue & into a bounded cache
+          of decoded chunks, evicting the least recently used
+        - predicts where each player will be from their velocity & requests every chunk that
+          would be activated there & isn't already loaded, cached or requested
+
+    When the world activates a chunk, its decoded blocks are taken from the cache if possible,
+    otherwise they are read from the store immediately (a cache miss).
+    """
+
+    def __init__(self, store, cache_size: int = STREAMING_CACHE_SIZE, lookahead: float = STREAMING_LOOKAHEAD):
+        """Constructor
+
+        Parameters:
+            store (region.RegionStore): The store from which to read chunks
+            cache_size (int): The maximum number of decoded chunks to keep in memory
+            lookahead (float): How far ahead to predict each player's position, in seconds
+        """
+        self._store = store
+        self._cache_size = cache_size
+        self._lookahead = lookahead
+
+        # Decoded data of each chunk by its (column, row) position, in least recently used order
+        self._cache = OrderedDict()
+        # Positions of chunks that have been requested, but not yet received
+        self._pending = set()
+        self._predicted = None
+
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._prefetched = 0
+
+        self._thread = threading.Thread(target=self._run, name="chunk-streamer", daemon=True)
+        self._thread.start()
+
+    def get_store(self):
+        """(region.RegionStore) Returns the store from which chunks are read"""
+        return self._store
+
+    def _run(self):
+        """Reads & decodes requested chunks until a request of None is received"""
+        while True:
+            position = self._requests.get()
+
+            if position is None:
+                return
+
+            self._results.put((position, self._store.read_chunk_data(*position)))
+
+    def _cache_chunk(self, position, data):
+        """Adds the decoded data of the chunk at 'position' to the cache, evicting the least
+        recently used chunks if it is full"""
+        self._cache[position] = data
+        self._cache.move_to_end(position)
+
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+            self._evictions += 1
+
+    def _receive(self, world):
+        """Moves every chunk decoded by the background thread into the cache"""
+        while True:
+            try:
+                position, data = self._results.get_nowait()
+            except queue.Empty:
+                return
+
+            self._pending.discard(position)
+            self._prefetched += 1
+
+            # the chunk may have been read synchronously while this was waiting
+            if not world.get_chunk(*position).is_loaded():
+                self._cache_chunk(position, data)
+
+    def _predict_chunks(self, world):
+        """(list<tuple<int, int>>) Returns the positions of the chunks that are predicted to be
+        activated soon, nearest to each player's predicted position first"""
+        radius = world.get_activation_radius()
+        centres = []
+
+        for player in world.get_things_in_categories("player"):
+            x, y = player.get_position()
+            vx, vy = player.get_velocity()
+
+            for fraction in STREAMING_PREDICTIONS:
+                time = fraction * self._lookahead
+                centres.append(world.get_chunk_position(x + vx * time, y + vy * time))
+
+        wanted = {}
+        for centre_column, centre_row in centres:
+            for column in range(centre_column - radius, centre_column + radius + 1):
+                for row in range(centre_row - radius, centre_row + radius + 1):
+                    distance = max(abs(column - centre_column), abs(row - centre_row))
+                    wanted[column, row] = min(distance, wanted.get((column, row), distance))
+
+        return sorted(wanted, key=wanted.get)
+
+    def prefetch(self, world):
+        """Receives decoded chunks & requests chunks predicted to be needed soon
+
+        Called by 'world (World)' before it updates its active chunks"""
+        self._receive(world)
+
+        predicted = self._predict_chunks(world)
+        if predicted == self._predicted:
+            return
+        self._predicted = predicted
+
+        for position in predicted:
+            chunk = world.get_chunk(*position)
+
+            if chunk is None or chunk.is_loaded() or position in self._pending:
+                continue
+
+            if position in self._cache:
+                # still wanted, so keep it from being evicted
+                self._cache.move_to_end(position)
+                continue
+
+            self._pending.add(position)
+            self._requests.put(position)
+
+    def has_chunk(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the chunk at ('column', 'row'), in chunks, has been stored"""
+        return self._store.has_chunk(column, row)
+
+    def read_chunk(self, chunk, palette) -> bool:
+        """Replaces the blocks of an inactive chunk with those stored for it, from the cache if possible
+
+        See region.RegionStore.read_chunk for parameters & return"""
+        position = chunk.get_position()
+
+        if position in self._cache:
+            self._hits += 1
+            data = self._cache.pop(position)
+        else:
+            self._misses += 1
+            data = self._store.read_chunk_data(*position)
+
+        return self._store.apply_chunk_data(chunk, data, palette)
+
+    def get_stats(self) -> dict:
+        """Returns statistics about the chunks streamed so far
+
+        Return:
+            dict<str: int>: Mapping of:
+                - 'hits': chunks activated from the cache
+                - 'misses': chunks that had to be read when they were activated
+                - 'prefetched': chunks decoded in the background
+                - 'evictions': decoded chunks evicted from the cache before being used
+                - 'cached': decoded chunks currently in the cache
+                - 'pending': chunks requested but not yet decoded
+        """
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'prefetched': self._prefetched,
+            'evictions': self._evictions,
+            'cached': len(self._cache),
+            'pending': len(self._pending),
+        }
+
+    def close(self):
+        """Stops the background thread & closes the store"""
+        self._requests.put(None)
+        self._thread.join()
+        self._store.close()
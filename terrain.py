@@ -0,0 +1,273 @@
+"""
+Seeded procedural generation of terrain for the world grid
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from array import array
+
+import numpy as np
+
+from block import create_block
+
+# Block ids of generated terrain, in order of their code in a generated array (0 is empty)
+TERRAIN_BLOCK_IDS = [None, ('dirt',), ('stone',), ('wood',), ('leaf',)]
+EMPTY, DIRT, STONE, WOOD, LEAF = range(len(TERRAIN_BLOCK_IDS))
+
+# Ore veins, as (code, minimum depth, noise threshold, noise scale) quadruples
+#   - a cell at least 'minimum depth' below the surface becomes the ore wherever the
+#     ore's noise (in [0, 1]) exceeds 'threshold'
+#   - a larger 'noise scale' (in grid cells) produces larger veins
+TERRAIN_ORES = [
+    (STONE, 1, .72, 4),
+    (DIRT, 8, .75, 6),
+]
+
+# (dx, dy) offsets of leaves from the top of a tree's trunk
+LEAF_OFFSETS = [(dx, dy) for dy in (-3, -2, -1) for dx in (-1, 0, 1)]
+
+
+def value_noise_1d(rng: np.random.Generator, length: int, scale: float, octaves: int = 3,
+                   persistence: float = .5) -> np.ndarray:
+    """(np.ndarray<float>) Returns 'length' samples of smooth 1d noise, in [0, 1]
+
+    Random values are placed every 'scale' samples & smoothly interpolated between, with each
+    further octave at half the scale & 'persistence' times the weight of the previous
+
+    Parameters:
+        rng (np.random.Generator): The source of randomness
+        length (int): The number of samples
+        scale (float): The distance between random values of the first octave, in samples
+        octaves (int): The number of octaves to sum
+        persistence (float): The weight of each octave relative to the previous
+    """
+    total = np.zeros(length)
+    weights = 0.
+    weight = 1.
+    positions = np.arange(length)
+
+    for _ in range(octaves):
+        x = positions / scale
+        lattice = rng.random(int(x[-1]) + 2)
+
+        i = x.astype(np.int64)
+        t = x - i
+        t = t * t * (3 - 2 * t)
+
+        total += weight * (lattice[i] * (1 - t) + lattice[i + 1] * t)
+        weights += weight
+
+        weight *= persistence
+        scale = max(1., scale / 2)
+
+    return total / weights
+
+
+def value_noise_2d(rng: np.random.Generator, size, scale: float) -> np.ndarray:
+    """(np.ndarray<float>) Returns a (columns, rows) array of smooth 2d noise, in [0, 1]
+
+    Parameters:
+        rng (np.random.Generator): The source of randomness
+        size (tuple<int, int>): The (columns, rows) size of the array
+        scale (float): The distance between random values, in cells
+    """
+    columns, rows = size
+
+    x = np.arange(columns) / scale
+    y = np.arange(rows) / scale
+    lattice = rng.random((int(x[-1]) + 2, int(y[-1]) + 2))
+
+    i = x.astype(np.int64)[:, None]
+    j = y.astype(np.int64)[None, :]
+    tx = (x[:, None] - i)
+    ty = (y[None, :] - j)
+    tx = tx * tx * (3 - 2 * tx)
+    ty = ty * ty * (3 - 2 * ty)
+
+    top = lattice[i, j] * (1 - tx) + lattice[i + 1, j] * tx
+    bottom = lattice[i, j + 1] * (1 - tx) + lattice[i + 1, j + 1] * tx
+
+    return top * (1 - ty) + bottom * ty
+
+
+class TerrainGenerator:
+    """Generates terrain as an array of block codes (see TERRAIN_BLOCK_IDS)
+
+    The same seed & parameters always generate the same terrain"""
+
+    def __init__(self, seed: int, surface_level: float = .55, surface_variation: float = .25,
+                 surface_scale: float = 24, soil_depth=(3, 6), ores=None, tree_spacing: int = 8,
+                 tree_chance: float = .6, trunk_height=(3, 5)):
+        """Constructor
+
+        Parameters:
+            seed (int): The seed from which to generate terrain
+            surface_level (float): The mean height of the surface, as a fraction of the grid height
+                                   from the top
+            surface_variation (float): The maximum distance of the surface from its mean, as a
+                                       fraction of the grid height
+            surface_scale (float): The distance between hills, in grid cells
+            soil_depth (tuple<int, int>): The (minimum, maximum) depth of dirt above stone
+            ores (list<tuple<int, int, float, float>>): Ore veins; defaults to TERRAIN_ORES
+            tree_spacing (int): The width of the strip of columns in which at most one tree grows
+            tree_chance (float): The chance that a tree grows in each strip
+            trunk_height (tuple<int, int>): The (minimum, maximum) height of a tree's trunk
+        """
+        self._seed = seed
+        self._surface_level = surface_level
+        self._surface_variation = surface_variation
+        self._surface_scale = surface_scale
+        self._soil_depth = soil_depth
+        self._ores = TERRAIN_ORES if ores is None else ores
+        self._tree_spacing = tree_spacing
+        self._tree_chance = tree_chance
+        self._trunk_height = trunk_height
+
+    def get_seed(self) -> int:
+        """(int) Returns the seed from which terrain is generated"""
+        return self._seed
+
+    def get_block_ids(self) -> [tuple]:
+        """(list<tuple<str>>) Returns the block id of each code in generated terrain"""
+        return TERRAIN_BLOCK_IDS
+
+    def generate(self, grid_size) -> np.ndarray:
+        """Generates terrain for a grid
+
+        Parameters:
+            grid_size (tuple<int, int>): The (column, row) size of the grid
+
+        Return:
+            np.ndarray<uint16>: The (columns, rows) array of the code of each cell's block
+        """
+        columns, rows = grid_size
+        rng = np.random.default_rng(self._seed)
+
+        # height map: the row of the topmost block in each column
+        noise = value_noise_1d(rng, columns, self._surface_scale)
+        surface = rows * (self._surface_level + (2 * noise - 1) * self._surface_variation)
+        surface = np.clip(surface.astype(np.int64), 1, rows - 1)
+
+        depth = np.arange(rows)[None, :] - surface[:, None]
+
+        min_soil, max_soil = self._soil_depth
+        soil = rng.integers(min_soil, max_soil + 1, columns)[:, None]
+
+        codes = np.zeros((columns, rows), dtype=np.uint16)
+        codes[depth >= 0] = DIRT
+        codes[depth >= soil] = STONE
+
+        for code, min_depth, threshold, scale in self._ores:
+            veins = (value_noise_2d(rng, (columns, rows), scale) > threshold) & (depth >= min_depth)
+            codes[veins] = code
+
+        self._grow_trees(rng, codes, surface)
+
+        return codes
+
+    def _grow_trees(self, rng: np.random.Generator, codes: np.ndarray, surface: np.ndarray):
+        """Grows trees on the surface of 'codes', in place
+
+        Parameters:
+            rng (np.random.Generator): The source of randomness
+            codes (np.ndarray<uint16>): The (columns, rows) array of codes to grow trees in
+            surface (np.ndarray<int>): The row of the topmost block in each column
+        """
+        columns, rows = codes.shape
+        spacing = self._tree_spacing
+        strips = columns // spacing
+
+        if strips == 0:
+            return
+
+        # at most one tree per strip, away from the strip's edges so that leaves never touch
+        offsets = rng.integers(1, max(2, spacing - 1), strips)
+        chances = rng.random(strips)
+        min_height, max_height = self._trunk_height
+        heights = rng.integers(min_height, max_height + 1, strips)
+
+        trees = chances < self._tree_chance
+        tree_columns = (np.arange(strips) * spacing + offsets)[trees]
+        heights = heights[trees]
+        bases = surface[tree_columns]
+
+        # trunks, from just above the surface up
+        for k in range(1, max_height + 1):
+            grows = (heights >= k) & (bases - k >= 0)
+            trunk_columns, trunk_rows = tree_columns[grows], bases[grows] - k
+            empty = codes[trunk_columns, trunk_rows] == EMPTY
+            codes[trunk_columns[empty], trunk_rows[empty]] = WOOD
+
+        tops = bases - heights
+        for dx, dy in LEAF_OFFSETS:
+            leaf_columns, leaf_rows = tree_columns + dx, tops + dy + 1
+            valid = (leaf_columns >= 0) & (leaf_columns < columns) & (leaf_rows >= 0) & (leaf_rows < rows)
+            leaf_columns, leaf_rows = leaf_columns[valid], leaf_rows[valid]
+            empty = codes[leaf_columns, leaf_rows] == EMPTY
+            codes[leaf_columns[empty], leaf_rows[empty]] = LEAF
+
+
+def get_surface_rows(codes: np.ndarray) -> np.ndarray:
+    """(np.ndarray<int>) Returns the row of the topmost block in each column of 'codes', or the
+    number of rows for an empty column
+
+    Parameters:
+        codes (np.ndarray<uint16>): A (columns, rows) array of block codes
+    """
+    solid = codes != EMPTY
+    return np.where(solid.any(axis=1), solid.argmax(axis=1), codes.shape[1])
+
+
+def load_terrain(world, codes: np.ndarray, block_ids: [tuple], overwrite: bool = False):
+    """Adds terrain to a world in bulk
+
+    For a chunked world, the codes for inactive chunks are written directly into each chunk,
+    replacing anything already stored there, without creating any blocks; blocks are only
+    created for active chunks (or for the whole grid, if the world is not chunked). Unless
+    'overwrite', inactive chunks that the world's chunk store already holds are skipped, so that
+    they are read from the store (with any edits saved there) when they are activated.
+
+    Parameters:
+        world (World): The world to add the terrain to
+        codes (np.ndarray<uint16>): The (columns, rows) array of the code of each cell's block,
+                                    in the same size as the world's grid
+        block_ids (list<tuple<*>>): The block id of each code (None for empty)
+        overwrite (bool): If True, chunks the store holds are replaced too, & left dirty so that
+                          they are replaced in the store when it is next saved
+    """
+    palette = world.get_block_palette()
+    lookup = np.array([palette.encode(block_id) if block_id is not None else palette.EMPTY
+                       for block_id in block_ids], dtype=np.uint16)
+    world_codes = lookup[codes]
+
+    size = world.get_chunk_size()
+    store = world.get_chunk_store()
+
+    if size is None:
+        active = [(column, row) for column, row in zip(*np.nonzero(world_codes))]
+    else:
+        active = []
+        columns, rows = world_codes.shape
+
+        for chunk in world.get_chunks():
+            left, top = chunk.get_origin()
+            region = world_codes[left:left + size, top:top + size]
+
+            if chunk.is_active():
+                active.extend((left + i, top + j) for i, j in zip(*np.nonzero(region)))
+                continue
+
+            if not overwrite and store is not None and store.has_chunk(*chunk.get_position()):
+                continue
+
+            padded = np.zeros((size, size), dtype=np.uint16)
+            padded[:region.shape[0], :region.shape[1]] = region
+
+            # chunks store their codes row-major
+            chunk.set_codes(array('H', padded.T.tobytes()))
+
+    world.add_blocks((create_block(*palette.decode(world_codes[column, row])), int(column), int(row))
+                     for column, row in active)
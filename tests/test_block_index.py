@@ -0,0 +1,59 @@
+"""
+Tests for looking up blocks by their grid cell
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from block import create_block
+from world import World
+
+BLOCK_SIZE = 32
+
+
+@pytest.mark.parametrize('mesh_tile_size', (None, 4))
+def test_blocks_are_found_at_their_cells(mesh_tile_size):
+    world = World((10, 10), BLOCK_SIZE, mesh_tile_size=mesh_tile_size)
+    dirt, stone = create_block('dirt'), create_block('stone')
+    world.add_blocks([(dirt, 2, 3), (stone, 3, 3)])
+
+    assert world.get_block_at_cell(2, 3) is dirt
+    assert world.get_block_at_cell(3, 3) is stone
+    assert world.get_block_at_cell(4, 3) is None
+    assert world.get_block_at_cell(-1, 3) is None
+    assert world.get_block_at_cell(10, 3) is None
+    assert world.get_block_cell(stone) == (3, 3)
+    assert world.get_block(2.5 * BLOCK_SIZE, 3.5 * BLOCK_SIZE) is dirt
+
+    world.remove_blocks([dirt])
+
+    assert world.get_block_at_cell(2, 3) is None
+    assert world.get_block_at_cell(3, 3) is stone
+    with pytest.raises(KeyError):
+        world.get_block_cell(dirt)
+
+
+def test_neighbours_follow_added_and_removed_blocks():
+    world = World((10, 10), BLOCK_SIZE)
+    blocks = {cell: create_block('dirt') for cell in ((4, 4), (5, 4), (4, 3))}
+    world.add_blocks((block, column, row) for (column, row), block in blocks.items())
+
+    # above, right, below & left (see CARDINAL_OFFSETS)
+    assert world.get_neighbouring_blocks(4, 4) == [blocks[4, 3], blocks[5, 4], None, None]
+
+    world.remove_blocks([blocks[5, 4]])
+    world.add_block_to_grid(create_block('stone'), 4, 5)
+
+    assert world.get_neighbouring_blocks(4, 4) == [blocks[4, 3], None, world.get_block_at_cell(4, 5), None]
+
+
+def test_neighbours_off_the_grid_are_empty():
+    world = World((10, 10), BLOCK_SIZE)
+    world.add_block_to_grid(create_block('dirt'), 1, 0)
+
+    assert world.get_neighbouring_blocks(0, 0, ((-1, 0), (0, -1), (1, 0))) == \
+        [None, None, world.get_block_at_cell(1, 0)]
@@ -0,0 +1,83 @@
+"""
+Tests for moving the contents of chunks out of & back into a world as players move
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import random
+
+from block import create_block
+from mob import Bird
+from player import Player
+from world import World
+
+BLOCK_SIZE = 32
+CHUNK_SIZE = 4
+
+# Cells in the chunk at the far right of the world
+FAR_CELLS = [(column, row) for column in range(28, 32) for row in range(4, 8)]
+
+
+def build_world():
+    """(World, Player) Returns a 32x8 world of 4x4 chunks, whose player is in its leftmost chunks"""
+    world = World((32, 8), BLOCK_SIZE, chunk_size=CHUNK_SIZE, activation_radius=1)
+
+    player = Player()
+    world.add_player(player, *world.grid_to_xy_centre(1, 1))
+    world.update_active_chunks()
+
+    return world, player
+
+
+def move_player(world, player, column, row):
+    """Moves 'player' to the grid cell at ('column', 'row') & updates the world's active chunks"""
+    player.get_shape().body.position = world.grid_to_xy_centre(column, row)
+    world.update_active_chunks()
+
+
+def test_blocks_added_to_inactive_chunks_are_stored():
+    world, player = build_world()
+    chunk = world.get_chunk_at_cell(*FAR_CELLS[0])
+
+    world.add_blocks((create_block('stone'), column, row) for column, row in FAR_CELLS)
+
+    assert not chunk.is_active()
+    assert chunk.count_blocks() == len(FAR_CELLS)
+    assert all(world.get_block_at_cell(column, row) is None for column, row in FAR_CELLS)
+
+
+def test_chunks_keep_blocks_and_things_when_deactivated_and_reactivated():
+    world, player = build_world()
+    chunk = world.get_chunk_at_cell(*FAR_CELLS[0])
+    world.add_blocks((create_block('stone'), column, row) for column, row in FAR_CELLS)
+
+    move_player(world, player, 30, 5)
+    assert chunk.is_active()
+    assert all(world.get_block_at_cell(column, row) is not None for column, row in FAR_CELLS)
+
+    damaged = world.get_block_at_cell(*FAR_CELLS[0])
+    damaged.set_hitpoints(damaged.get_max_hitpoints() / 2)
+    world.remove_block(world.get_block_at_cell(*FAR_CELLS[-1]))
+
+    bird = Bird("friendly_bird", (12, 12), rng=random.Random(0))
+    world.add_mob(bird, *world.grid_to_xy_centre(29, 4))
+
+    move_player(world, player, 1, 1)
+    assert not chunk.is_active()
+    assert chunk.count_blocks() == len(FAR_CELLS) - 1
+    assert chunk.count_things() == 1
+    assert world.get_block_at_cell(*FAR_CELLS[0]) is None
+    assert bird not in set(world.get_things_in_categories("mob"))
+
+    move_player(world, player, 30, 5)
+    assert chunk.is_active()
+    assert chunk.count_blocks() == chunk.count_things() == 0
+    assert world.get_block_at_cell(*FAR_CELLS[-1]) is None
+    assert all(world.get_block_at_cell(column, row).get_block_id() == ('stone',)
+               for column, row in FAR_CELLS[:-1])
+    assert world.get_block_at_cell(*FAR_CELLS[0]).get_hitpoints() == damaged.get_max_hitpoints() / 2
+    assert bird in set(world.get_things_in_categories("mob"))
+    assert chunk.is_dirty()
@@ -0,0 +1,67 @@
+"""
+Tests for filtering which categories of things collide with each other
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from block import create_block
+from dropped_item import DroppedItem
+from item import create_item
+from world import World, REDUCED_COLLISION_MATRIX
+
+BLOCK_SIZE = 32
+TIME_STEP = 1 / 60
+
+
+def drop_two_apples(**kwargs):
+    """(World, DroppedItem, DroppedItem) Returns a world with a floor along row 8, after two
+    apples dropped one above the other have had time to land"""
+    world = World((10, 10), BLOCK_SIZE, time_step=TIME_STEP, item_merge_radius=None, **kwargs)
+    world.add_blocks((create_block('dirt'), column, 8) for column in range(10))
+
+    lower, upper = DroppedItem(create_item('apple')), DroppedItem(create_item('apple'))
+    world.add_item(lower, 100, 200)
+    world.add_item(upper, 100, 180)
+
+    for _ in range(120):
+        world.advance(TIME_STEP, None)
+
+    return world, lower, upper
+
+
+def test_items_stack_by_default():
+    world, lower, upper = drop_two_apples()
+
+    assert world.collides("item", "item") and world.collides("item", "mob")
+    assert upper.get_position()[1] < lower.get_position()[1] - 4
+
+
+def test_items_pass_through_each_other_with_the_reduced_matrix():
+    world, lower, upper = drop_two_apples(collision_matrix=REDUCED_COLLISION_MATRIX)
+
+    assert not world.collides("item", "item")
+    assert upper.get_position()[1] == pytest.approx(lower.get_position()[1], abs=1)
+    assert set(world.get_items(100, lower.get_position()[1], 8)) == {lower, upper}
+
+
+def test_items_stack_if_the_reduced_matrix_says_so():
+    world, lower, upper = drop_two_apples(collision_matrix=REDUCED_COLLISION_MATRIX + (("item", "item"),))
+
+    assert world.collides("item", "item")
+    assert upper.get_position()[1] < lower.get_position()[1] - 4
+
+
+def test_census_counts_pairs_kept_from_the_narrowphase():
+    world, _, _ = drop_two_apples(collision_matrix=REDUCED_COLLISION_MATRIX)
+
+    pairs = world.census_contact_pairs()
+    stats = world.get_collision_stats()
+
+    assert pairs[("item", "item")] == 1
+    assert stats[("item", "item")] == {'collides': False, 'last': 1, 'total': 1, 'removed': 1}
+    assert stats[("block", "item")]['removed'] == 0
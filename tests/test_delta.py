@@ -0,0 +1,88 @@
+"""
+Tests for following a world's state through a delta-encoded stream
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from block import create_block
+from delta import (DeltaEncoder, DeltaDecoder, DYNAMIC_CATEGORIES, POSITION_SCALE,
+                   get_thing_kind)
+from headless import HeadlessGame
+
+GRID_SIZE = (64, 32)
+
+
+def assert_decoded(decoder, encoder, world):
+    """Asserts that the state followed by 'decoder' is that of 'world', as encoded by 'encoder'"""
+    blocks = {world.get_block_cell(block): block.get_block_id()
+              for block in world.get_things_in_categories("block")}
+    assert decoder.get_blocks() == blocks
+
+    things = decoder.get_things()
+    ids = set()
+
+    for category in DYNAMIC_CATEGORIES:
+        for thing in world.get_things_in_categories(category):
+            thing_id = encoder.get_thing_id(thing)
+            ids.add(thing_id)
+
+            state = things[thing_id]
+            x, y = thing.get_position()
+            assert state.kind == get_thing_kind(thing, category)
+            assert state.x == pytest.approx(x, abs=1 / POSITION_SCALE)
+            assert state.y == pytest.approx(y, abs=1 / POSITION_SCALE)
+            assert state.health == thing.get_health()
+
+    assert set(things) == ids
+
+
+def edit_world(game):
+    """Removes the block under the player & places one above them, as a spectator would see"""
+    world = game.get_world()
+    column, _ = world.xy_to_grid(*game.get_player().get_position())
+    row = world.get_surface_row(column)
+
+    world.remove_block(world.get_block_at_cell(column, row))
+    world.add_block_to_grid(create_block('stone'), column, row - 4)
+
+
+@pytest.mark.parametrize('keyframe_interval', [None, 5])
+def test_decoded_state_equals_world(keyframe_interval):
+    game = HeadlessGame(seed=5, grid_size=GRID_SIZE)
+    world = game.get_world()
+    encoder = DeltaEncoder(world, keyframe_interval=keyframe_interval)
+    decoder = DeltaDecoder()
+
+    for tick in range(30):
+        if tick == 10:
+            edit_world(game)
+
+        game.tick([('move', 1, 0)] if tick % 3 == 0 else [])
+        assert decoder.apply(encoder.encode(game.get_ticks()))
+        assert_decoded(decoder, encoder, world)
+
+    encoder.close()
+
+
+def test_late_decoder_waits_for_keyframe():
+    game = HeadlessGame(seed=5, grid_size=GRID_SIZE)
+    world = game.get_world()
+    encoder = DeltaEncoder(world, keyframe_interval=None)
+    encoder.encode(game.get_ticks())
+
+    game.tick()
+    decoder = DeltaDecoder()
+    assert not decoder.apply(encoder.encode(game.get_ticks()))
+    assert decoder.get_tick() is None
+
+    edit_world(game)
+    encoder.request_keyframe()
+    assert decoder.apply(encoder.encode(game.get_ticks()))
+    assert_decoded(decoder, encoder, world)
+
+    encoder.close()
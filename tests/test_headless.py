@@ -0,0 +1,47 @@
+"""
+Tests for the headless game controller
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from headless import HeadlessGame, SIMPLE_WORLD_SPAWN
+
+
+def test_simple_world_when_not_generated():
+    game = HeadlessGame(seed=3, generated=False)
+    world = game.get_world()
+
+    assert not game.is_generated()
+    assert world.get_block_at_cell(3, 8).get_block_id() == ('wood',)
+    assert world.get_block_at_cell(14, 8).get_id() == 'mayhem'
+    assert game.get_player().get_position() == SIMPLE_WORLD_SPAWN
+
+
+def test_world_is_generated_by_default():
+    game = HeadlessGame(seed=3)
+
+    assert game.is_generated()
+    assert game.get_player().get_position() != SIMPLE_WORLD_SPAWN
+
+
+def test_snapshot_keeps_the_kind_of_world():
+    game = HeadlessGame(seed=3, generated=False)
+    game.tick()
+
+    restored = HeadlessGame(snapshot=game.save())
+
+    assert not restored.is_generated()
+
+
+def test_only_generated_worlds_spawn_mobs():
+    assert HeadlessGame(seed=3).get_world().get_mob_spawner() is not None
+    assert HeadlessGame(seed=3, generated=False).get_world().get_mob_spawner() is None
+
+    game = HeadlessGame(seed=3, generated=False)
+    for _ in range(60):
+        game.tick()
+
+    assert len(list(game.get_world().get_things_in_categories("mob"))) == 1
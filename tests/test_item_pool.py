@@ -0,0 +1,76 @@
+"""
+Tests for the reuse of the bodies & shapes of removed dropped items
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from block import create_block
+from dropped_item import DroppedItem
+from item import BlockItem
+from player import Player
+from world import World
+
+BLOCK_SIZE = 32
+
+
+def build_floor_world(**kwargs):
+    """(World) Returns a 10x10 world with a floor of blocks along row 8"""
+    world = World((10, 10), BLOCK_SIZE, **kwargs)
+    world.add_blocks((create_block('dirt'), column, 8) for column in range(10))
+    return world
+
+
+def test_removed_item_shape_is_reused():
+    world = build_floor_world()
+    item = DroppedItem(BlockItem('dirt'))
+    world.add_item(item, 100, 20)
+    shape = item.get_shape()
+
+    world.remove_item(item)
+    other = DroppedItem(BlockItem('dirt'))
+    world.add_item(other, 200, 20)
+
+    assert other.get_shape() is shape
+    assert shape.object is other
+    assert world.get_item_pool_stats()['hits'] == 1
+
+
+def test_item_removed_in_callback_is_pooled_after_step():
+    world = build_floor_world()
+    seen = []
+    added = []
+
+    def on_begin(player, item, data, arbiter):
+        seen.append(item)
+
+        if world.count_things("item"):
+            world.remove_item(item)
+
+            # a shape still in the space must not be handed out during the step
+            replacement = DroppedItem(BlockItem('dirt'))
+            world.add_item(replacement, 20, 20)
+            added.append(replacement)
+
+        return False
+
+    world.add_collision_handler("player", "item", on_begin=on_begin)
+
+    y = 8 * BLOCK_SIZE - 16
+    for x in (96, 104):
+        world.add_player(Player(), x, y)
+
+    item = DroppedItem(BlockItem('dirt'))
+    world.add_item(item, 100, y)
+    shape = item.get_shape()
+
+    world.advance(1 / 60, None)
+
+    # both players saw the item, even though the first removed it
+    assert seen[:2] == [item, item]
+    assert all(replacement.get_shape() is not shape for replacement in added)
+    assert shape.body.space is None
+    assert shape.object is None
+    assert world.get_item_pool_stats()['pooled'] == 1
@@ -0,0 +1,83 @@
+"""
+Tests for expiring dropped items & capping the number of items
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from block import create_block
+from dropped_item import DroppedItem
+from item import create_item
+from player import Player
+from snapshot import save_snapshot, load_snapshot, restore_world
+from world import World, ITEM_CAP_INTERVAL
+
+BLOCK_SIZE = 32
+TIME_STEP = 1 / 60
+
+
+def build_world(**kwargs):
+    """(World) Returns a 32x16 world with a floor along row 12, that doesn't merge items"""
+    world = World((32, 16), BLOCK_SIZE, time_step=TIME_STEP, item_merge_radius=None, **kwargs)
+    world.add_blocks((create_block('dirt'), column, 12) for column in range(32))
+    return world
+
+
+def add_items(world, count, x=100):
+    """(list<DroppedItem>) Adds 'count' apples to 'world', side by side from 'x'"""
+    items = [DroppedItem(create_item('apple')) for _ in range(count)]
+    for i, item in enumerate(items):
+        world.add_item(item, x + 12 * i, 300)
+    return items
+
+
+def test_items_expire_after_their_lifetime():
+    world = build_world(item_lifetime=1.)
+    old, new = add_items(world, 2)
+    world.set_item_age(old, .5)
+
+    for _ in range(40):
+        world.advance(TIME_STEP, None)
+
+    assert set(world.get_things_in_categories("item")) == {new}
+
+    for _ in range(30):
+        world.advance(TIME_STEP, None)
+
+    assert not list(world.get_things_in_categories("item"))
+    assert world.get_item_stats()['expired'] == 2
+
+
+def test_oldest_items_are_evicted_beyond_the_maximum():
+    world = build_world(max_items=3)
+    items = add_items(world, 2)
+    world.advance(TIME_STEP, None)
+    items += add_items(world, 3, x=200)
+
+    assert set(world.get_things_in_categories("item")) == set(items[2:])
+    assert world.get_item_stats()['evicted'] == 2
+
+
+def test_oldest_items_are_capped_per_chunk():
+    world = build_world(chunk_size=16, max_items_per_chunk=2)
+    world.add_player(Player(), 400, 300)
+    items = add_items(world, 4)
+
+    for _ in range(ITEM_CAP_INTERVAL):
+        world.advance(TIME_STEP, None)
+
+    assert set(world.get_things_in_categories("item")) == set(items[2:])
+
+
+def test_item_age_survives_a_snapshot():
+    world = build_world(item_lifetime=10.)
+    item, = add_items(world, 1)
+    world.set_item_age(item, 7.)
+
+    restored = World((32, 16), BLOCK_SIZE, item_lifetime=10.)
+    restore_world(restored, load_snapshot(save_snapshot(world)))
+
+    restored_item, = restored.get_things_in_categories("item")
+    assert abs(restored.get_item_age(restored_item) - 7.) < 1e-3
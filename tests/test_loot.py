@@ -0,0 +1,91 @@
+"""
+Tests for the simple loot physics of dropped items
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from block import create_block
+from dropped_item import DroppedItem
+from item import BlockItem
+from loot import SimpleLoot
+from player import Player
+from world import World
+
+BLOCK_SIZE = 32
+
+
+def build_floor_world(**kwargs):
+    """(World) Returns a 10x10 world with a floor of blocks along row 8"""
+    world = World((10, 10), BLOCK_SIZE, **kwargs)
+    world.add_blocks((create_block('dirt'), column, 8) for column in range(10))
+    return world
+
+
+@pytest.mark.parametrize('loot', [None, SimpleLoot])
+def test_spatial_hash_world_builds(loot):
+    world = World((10, 10), BLOCK_SIZE, broadphase="spatial_hash",
+                  loot_physics=loot() if loot is not None else None)
+
+    assert world.get_broadphase() == "spatial_hash"
+    world.advance(1 / 60, None)
+
+
+def test_items_land_on_blocks_and_rest():
+    world = build_floor_world(loot_physics=SimpleLoot())
+    item = DroppedItem(BlockItem('dirt'))
+    world.add_item(item, 100, 20)
+
+    for _ in range(120):
+        world.advance(1 / 60, None)
+
+    assert item.get_position() == (100, 8 * BLOCK_SIZE - 4)
+    assert world.is_sleeping(item)
+
+
+def test_removing_block_wakes_items():
+    world = build_floor_world(loot_physics=SimpleLoot())
+    item = DroppedItem(BlockItem('dirt'))
+    world.add_item(item, 100, 20)
+
+    for _ in range(120):
+        world.advance(1 / 60, None)
+
+    world.remove_block(world.get_block(100, 8 * BLOCK_SIZE + 1))
+    assert not world.is_sleeping(item)
+
+    for _ in range(120):
+        world.advance(1 / 60, None)
+
+    assert item.get_position() == (100, 10 * BLOCK_SIZE - 4)
+
+
+def test_items_are_found_by_queries():
+    world = build_floor_world(loot_physics=SimpleLoot())
+    item = DroppedItem(BlockItem('dirt'))
+    world.add_item(item, 100, 20)
+
+    assert world.get_items(100, 20, 1) == [item]
+    assert item in world.get_things(101, 21)
+    assert world.get_items(200, 20, 1) == []
+
+
+def test_player_overlap_calls_begin_once():
+    world = build_floor_world(loot_physics=SimpleLoot())
+    touched = []
+    world.add_collision_handler("player", "item", on_begin=lambda player, item, data, arbiter: touched.append(item))
+
+    player = Player()
+    world.add_player(player, 100, 8 * BLOCK_SIZE - 20)
+
+    item = DroppedItem(BlockItem('dirt'))
+    world.add_item(item, 100, 8 * BLOCK_SIZE - 20)
+
+    for _ in range(30):
+        world.advance(1 / 60, None)
+
+    assert touched == [item]
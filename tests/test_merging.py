@@ -0,0 +1,59 @@
+"""
+Tests for dropping items in stacked piles & merging resting piles
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from dropped_item import DroppedItem
+from item import create_item
+from world import World
+
+BLOCK_SIZE = 32
+MERGE_RADIUS = 12
+
+
+def add_pile(world, item_id, quantity, x, y=100):
+    """(DroppedItem) Adds a pile of 'quantity' of an item to 'world' at ('x', 'y')"""
+    item = DroppedItem(create_item(item_id), quantity)
+    world.add_item(item, x, y)
+    return item
+
+
+def test_nearby_piles_of_the_same_item_merge():
+    world = World((20, 10), BLOCK_SIZE, item_merge_radius=None)
+    first = add_pile(world, 'dirt', 1, 100)
+    second = add_pile(world, 'dirt', 2, 105)
+    third = add_pile(world, 'dirt', 3, 110)
+    apple = add_pile(world, 'apple', 1, 104)
+    far = add_pile(world, 'dirt', 1, 300)
+
+    assert world.merge_items(MERGE_RADIUS) == 2
+
+    items = set(world.get_things_in_categories("item"))
+    assert items == {first, apple, far}
+    assert first.get_quantity() == 6
+    assert apple.get_quantity() == far.get_quantity() == 1
+    assert world.get_item_stats()['merged'] == 2
+
+
+def test_merging_stops_at_the_max_stack_size():
+    world = World((20, 10), BLOCK_SIZE, item_merge_radius=None)
+    first = add_pile(world, 'dirt', 40, 100)
+    second = add_pile(world, 'dirt', 40, 105)
+
+    assert world.merge_items(MERGE_RADIUS) == 0
+
+    max_stack = first.get_item().get_max_stack_size()
+    assert sorted((first.get_quantity(), second.get_quantity())) == [80 - max_stack, max_stack]
+
+
+def test_moving_piles_dont_merge():
+    world = World((20, 10), BLOCK_SIZE, item_merge_radius=None)
+    add_pile(world, 'dirt', 1, 100)
+    add_pile(world, 'dirt', 1, 105).set_velocity((0, 50))
+
+    assert world.merge_items(MERGE_RADIUS) == 0
+    assert len(list(world.get_things_in_categories("item"))) == 2
@@ -0,0 +1,70 @@
+"""
+Tests for merging the collision hulls of blocks into larger rectangles
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pymunk
+
+from block import create_block
+from meshing import greedy_mesh
+from world import World
+
+BLOCK_SIZE = 32
+TILE_SIZE = 4
+
+
+def get_hulls(world):
+    """(list<pymunk.Poly>) Returns the merged collision hulls of the blocks in 'world'"""
+    world.advance(1 / 60, None)
+    return world.get_terrain_hulls()
+
+
+def test_hulls_take_the_friction_of_their_blocks():
+    world = World((8, 8), BLOCK_SIZE, mesh_tile_size=TILE_SIZE)
+    world.add_blocks(((create_block('dirt'), column, 6) for column in range(4)), friction=.25)
+    world.add_blocks(((create_block('dirt'), column, 7) for column in range(4)), friction=.75)
+
+    hulls = get_hulls(world)
+
+    assert sorted(hull.friction for hull in hulls) == [.25, .75]
+    assert all(hull.object is None for hull in hulls)
+    assert world.get_thing(BLOCK_SIZE / 2, 6.5 * BLOCK_SIZE) is world.get_block_at_cell(0, 6)
+
+
+def test_greedy_mesh_covers_solid_cells_with_rectangles():
+    solid = {(0, 0), (1, 0), (2, 0),
+             (0, 1), (1, 1), (2, 1),
+             (0, 2), (3, 2)}
+
+    rectangles = greedy_mesh(lambda column, row: (column, row) in solid, 0, 0, 4, 4)
+
+    assert rectangles == [(0, 0, 3, 2), (0, 2, 1, 1), (3, 2, 1, 1)]
+
+
+def test_greedy_mesh_stays_within_its_region():
+    rectangles = greedy_mesh(lambda column, row: True, 2, 1, 5, 3)
+
+    assert rectangles == [(2, 1, 3, 2)]
+
+
+def test_removing_a_block_rebuilds_only_its_tile():
+    world = World((8, 8), BLOCK_SIZE, mesh_tile_size=TILE_SIZE)
+    world.add_blocks((create_block('dirt'), column, row) for column in range(8) for row in range(4, 8))
+
+    left, right = get_hulls(world)
+    assert [hull.bb for hull in (left, right)] == [
+        pymunk.BB(0, 4 * BLOCK_SIZE, 4 * BLOCK_SIZE, 8 * BLOCK_SIZE),
+        pymunk.BB(4 * BLOCK_SIZE, 4 * BLOCK_SIZE, 8 * BLOCK_SIZE, 8 * BLOCK_SIZE)]
+
+    world.remove_block(world.get_block_at_cell(5, 4))
+    hulls = get_hulls(world)
+
+    assert hulls[0] is left
+    assert right not in hulls
+    assert world.count_terrain_hulls() == 4
+    assert world.get_thing(5.5 * BLOCK_SIZE, 4.5 * BLOCK_SIZE) is None
+    assert world.get_block(5.5 * BLOCK_SIZE, 5.5 * BLOCK_SIZE) is world.get_block_at_cell(5, 5)
@@ -0,0 +1,82 @@
+"""
+Tests for stepping birds from the arrays of a mob population
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import random
+
+import pytest
+
+from mob import Bird
+from player import Player
+from population import MobPopulation
+from scheduler import MobScheduler
+from world import World
+
+BLOCK_SIZE = 32
+
+
+def build_bird_world(birds, population=None):
+    """(World, list<Bird>) Returns a 10x10 world holding 'birds (int)' birds in 'population'
+    (defaults to a new MobPopulation)"""
+    if population is None:
+        population = MobPopulation(seed=0)
+    world = World((10, 10), BLOCK_SIZE, mob_scheduler=population)
+
+    rng = random.Random(0)
+    mobs = [Bird("friendly_bird", (12, 12), rng=rng) for _ in range(birds)]
+    for i, mob in enumerate(mobs):
+        world.add_mob(mob, 40 + 60 * i, 100)
+
+    return world, mobs
+
+
+def test_sleeping_birds_are_not_steered():
+    world, (sleeper, flyer) = build_bird_world(2)
+    population = world.get_mob_scheduler()
+
+    world.advance(1 / 60, None)
+    sleeper.get_shape().body.sleep()
+
+    # a bird falling asleep is noticed by its next flap
+    for _ in range(60):
+        world.advance(1 / 60, None)
+    steps = population.get_state(sleeper, 'steps')
+    velocity = tuple(sleeper.get_shape().body.velocity)
+
+    for _ in range(120):
+        world.advance(1 / 60, None)
+
+    assert world.is_sleeping(sleeper)
+    assert population.get_state(sleeper, 'steps') == steps
+    assert tuple(sleeper.get_shape().body.velocity) == velocity
+    assert population.get_state(flyer, 'steps') > steps
+
+
+def test_population_steps_birds_a_scheduler_finds_due():
+    scheduler = MobScheduler(((5, 1), (20, 4)))
+    world, (near, *_, far) = build_bird_world(5, MobPopulation(seed=0, scheduler=scheduler))
+    world.add_player(Player(), 30, 100)
+    population = world.get_mob_scheduler()
+
+    ticks = 20
+    for _ in range(ticks):
+        world.advance(1 / 60, None)
+
+    assert population.get_scheduler() is scheduler
+    assert population.get_state(near, 'steps') == ticks
+    assert 0 < population.get_state(far, 'steps') < ticks
+    assert population.get_state(far, 'age') == pytest.approx(population.get_state(near, 'age'),
+                                                            abs=4 / 60)
+
+    world.remove_mob(far)
+    assert scheduler.get_stats()['mobs'] == 4
+
+
+def test_population_rejects_a_budgeted_scheduler():
+    with pytest.raises(ValueError):
+        MobPopulation(scheduler=MobScheduler(budget=1))
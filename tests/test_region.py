@@ -0,0 +1,140 @@
+"""
+Tests for storing chunks in region files & streaming them back into a game
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from block import create_block
+from headless import HeadlessGame
+from region import RegionStore
+from streaming import ChunkStreamer
+
+GRID_SIZE = (128, 64)
+CHUNK_SIZE = 16
+
+
+def find_block_near_player(game):
+    """(tuple<int, int>) Returns the (column, row) of the topmost block under the player"""
+    world = game.get_world()
+    column, _ = world.xy_to_grid(*game.get_player().get_position())
+    return column, world.get_surface_row(column)
+
+
+def start_game(directory, streamed):
+    """(HeadlessGame) Returns a game reading its chunks from a store in 'directory', after a tick"""
+    store = RegionStore(str(directory), CHUNK_SIZE)
+    if streamed:
+        store = ChunkStreamer(store)
+
+    game = HeadlessGame(seed=7, grid_size=GRID_SIZE, chunk_size=CHUNK_SIZE, chunk_store=store)
+    game.tick()
+    return game
+
+
+def get_store(game):
+    """(RegionStore) Returns the region store of a game's world"""
+    store = game.get_world().get_chunk_store()
+    return store.get_store() if isinstance(store, ChunkStreamer) else store
+
+
+@pytest.mark.parametrize('streamed', [False, True])
+def test_edits_survive_a_new_game(tmp_path, streamed):
+    game = start_game(tmp_path, streamed)
+    world = game.get_world()
+
+    column, row = find_block_near_player(game)
+    world.remove_block(world.get_block_at_cell(column, row))
+    world.add_block_to_grid(create_block('stone'), column, row - 3)
+    get_store(game).save(world)
+    world.get_chunk_store().close()
+
+    game = start_game(tmp_path, streamed)
+    world = game.get_world()
+
+    assert world.get_block_at_cell(column, row) is None
+    assert world.get_block_at_cell(column, row - 3).get_block_id() == ('stone',)
+
+    if streamed:
+        stats = world.get_chunk_store().get_stats()
+        assert stats['hits'] + stats['misses'] > 0
+
+    world.get_chunk_store().close()
+
+
+def test_unstored_chunks_are_generated(tmp_path):
+    game = start_game(tmp_path, False)
+    world = game.get_world()
+
+    column, row = find_block_near_player(game)
+    assert world.get_block_at_cell(column, row) is not None
+
+
+def test_saves_only_edited_chunks(tmp_path):
+    game = start_game(tmp_path, False)
+    world = game.get_world()
+    store = get_store(game)
+
+    store.save(world)
+    assert store.save(world) == 0
+
+    column, row = find_block_near_player(game)
+    block = world.get_block_at_cell(column, row)
+    block.set_hitpoints(block.get_hitpoints() / 2)
+    assert store.save(world) == 1
+
+    world.remove_block(block)
+    assert store.save(world) == 1
+    assert store.save(world) == 0
+
+    store.close()
+
+
+def test_damage_survives_a_new_game(tmp_path):
+    game = start_game(tmp_path, False)
+    world = game.get_world()
+
+    column, row = find_block_near_player(game)
+    block = world.get_block_at_cell(column, row)
+    block.set_hitpoints(block.get_max_hitpoints() / 2)
+    get_store(game).save(world)
+    get_store(game).close()
+
+    game = start_game(tmp_path, False)
+    block = game.get_world().get_block_at_cell(column, row)
+
+    assert block.get_hitpoints() == block.get_max_hitpoints() / 2
+
+    get_store(game).close()
+
+
+def test_restoring_a_snapshot_replaces_stored_chunks(tmp_path):
+    game = start_game(tmp_path, False)
+    world = game.get_world()
+
+    column, row = find_block_near_player(game)
+    data = game.save()
+
+    # edited & stored after the snapshot was taken
+    world.remove_block(world.get_block_at_cell(column, row))
+    get_store(game).save(world)
+    get_store(game).close()
+
+    store = RegionStore(str(tmp_path), CHUNK_SIZE)
+    restored = HeadlessGame(snapshot=data, chunk_size=CHUNK_SIZE, chunk_store=store)
+    restored.tick()
+    world = restored.get_world()
+
+    assert world.get_block_at_cell(column, row) is not None
+
+    # the restored blocks replace the stored ones when the store is next saved
+    assert store.save(world) > 0
+    store.close()
+
+    game = start_game(tmp_path, False)
+    assert game.get_world().get_block_at_cell(column, row) is not None
+    get_store(game).close()
@@ -0,0 +1,89 @@
+"""
+Tests for recording headless games & replaying them deterministically
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import io
+
+import pytest
+
+from headless import HeadlessGame
+from replay import InputRecorder, Replay
+
+GRID_SIZE = (64, 32)
+TICKS = 90
+
+
+def get_inputs(game, tick):
+    """(list<tuple>) Returns the inputs with which to tick 'game' at 'tick', mining & placing
+    blocks near the player as it walks"""
+    x, y = game.get_player().get_position()
+
+    if tick % 30 == 10:
+        return [('target', x + 40, y + 40), ('mine',), ('mine',), ('mine',)]
+    if tick % 30 == 20:
+        return [('select', 0), ('target', x - 40, y - 40), ('use',)]
+    if tick % 4 == 0:
+        return [('move', 1, 0)]
+    if tick % 25 == 0:
+        return [('jump',)]
+    return []
+
+
+def record_game(generated=True, keyframe_interval=30):
+    """(tuple<HeadlessGame, bytes>) Returns a game played for TICKS ticks & its recording"""
+    game = HeadlessGame(seed=11, grid_size=GRID_SIZE, generated=generated)
+    stream = io.BytesIO()
+    recorder = InputRecorder(stream, keyframe_interval=keyframe_interval)
+    recorder.start(game)
+
+    for tick in range(TICKS):
+        game.tick(get_inputs(game, tick))
+
+    recorder.stop(game)
+    return game, stream.getvalue()
+
+
+@pytest.mark.parametrize('generated', [True, False])
+def test_replay_from_seed_is_identical(generated):
+    game, data = record_game(generated)
+
+    replay = Replay(data)
+    replayed = replay.create_game(0)
+    replay.play(replayed)
+
+    assert replayed.get_ticks() == game.get_ticks() == replay.get_end_tick()
+    assert replayed.save() == game.save()
+
+
+def test_seek_from_keyframe_matches_game():
+    game, data = record_game()
+
+    replay = Replay(data)
+    assert replay.get_keyframe_ticks()
+
+    seeked = replay.seek(replay.get_end_tick())
+
+    assert seeked.get_ticks() == game.get_ticks()
+    assert seeked.get_player().get_position() == pytest.approx(game.get_player().get_position())
+    stack, expected = seeked.get_hot_bar()[0, 0], game.get_hot_bar()[0, 0]
+    assert stack.get_item().get_id() == expected.get_item().get_id()
+    assert stack.get_quantity() == expected.get_quantity()
+
+
+def test_seek_before_start_is_rejected():
+    game = HeadlessGame(seed=11, grid_size=GRID_SIZE)
+    game.tick()
+
+    stream = io.BytesIO()
+    recorder = InputRecorder(stream)
+    recorder.start(game)
+    game.tick()
+    recorder.stop(game)
+
+    with pytest.raises(ValueError):
+        Replay(stream.getvalue()).create_game(0)
@@ -0,0 +1,63 @@
+"""
+Tests for running headless games across worker processes
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import math
+
+import pytest
+
+from runner import WorldRunner
+
+GRID_SIZE = (64, 32)
+
+
+def test_bad_inputs_are_reported_without_stopping_games():
+    with WorldRunner(2, processes=1, grid_size=GRID_SIZE) as runner:
+        runner.wait_until_ready()
+        runner.submit_input(0, [('select', 'x'), ('explode',), ('move', 1, 0)])
+        runner.submit_input(1, [('move', 1, 0)])
+
+        before = runner.fetch_state(1).tick
+        while runner.fetch_state(1).tick < before + 5:
+            pass
+
+        errors = runner.fetch_errors()
+        assert list(errors) == [0]
+        assert len(errors[0]) == 2
+        assert runner.fetch_state(0).tick > 0
+        assert runner.fetch_errors() == {}
+
+
+def test_unknown_games_are_rejected():
+    with WorldRunner(2, processes=1, grid_size=GRID_SIZE) as runner:
+        with pytest.raises(KeyError):
+            runner.fetch_state(2)
+        with pytest.raises(KeyError):
+            runner.submit_input(-1, [('jump',)])
+
+        assert runner.fetch_state(1).tick >= 0
+
+
+def test_games_without_players_have_a_state():
+    with WorldRunner(1, processes=1, grid_size=GRID_SIZE, spawn_player=False) as runner:
+        state = runner.fetch_state(0)
+
+    assert math.isnan(state.x) and math.isnan(state.health)
+    assert state.things > 0
+
+
+def test_late_workers_drop_ticks_beyond_the_cap():
+    with WorldRunner(1, processes=1, tick_rate=100000, max_ticks_per_frame=2,
+                     grid_size=GRID_SIZE) as runner:
+        runner.wait_until_ready()
+        ticks, seconds, dropped = runner.fetch_stats()[0]
+        while seconds < .5:
+            ticks, seconds, dropped = runner.fetch_stats()[0]
+
+    assert dropped > 0
+    assert ticks + dropped == pytest.approx(seconds * 100000, rel=.1)
@@ -0,0 +1,63 @@
+"""
+Tests for scheduling mob updates by their distance to the nearest player
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import random
+
+import pytest
+
+from mob import Bird
+from player import Player
+from scheduler import MobScheduler
+from world import World
+
+BLOCK_SIZE = 32
+TIME_STEP = 1 / 60
+TICKS = 20
+
+# Birds within 3 cells of a player are stepped every tick, & within 10 every other tick
+LEVELS = ((3, 1), (10, 2))
+
+
+def build_world(with_player=True):
+    """(World, list<Bird>) Returns a 40x10 world with birds 2, 6 & 30 cells from its player"""
+    world = World((40, 10), BLOCK_SIZE, time_step=TIME_STEP, mob_scheduler=MobScheduler(LEVELS))
+
+    if with_player:
+        world.add_player(Player(), BLOCK_SIZE, 3 * BLOCK_SIZE)
+
+    rng = random.Random(0)
+    birds = [Bird("friendly_bird", (12, 12), rng=rng) for _ in range(3)]
+    for bird, cells in zip(birds, (2, 6, 30)):
+        world.add_mob(bird, (1 + cells) * BLOCK_SIZE, 3 * BLOCK_SIZE)
+
+    return world, birds
+
+
+def test_mobs_are_stepped_by_distance():
+    world, (near, middle, far) = build_world()
+
+    for _ in range(TICKS):
+        world.advance(TIME_STEP, None)
+
+    assert near.get_steps() == TICKS
+    assert middle.get_steps() == pytest.approx(TICKS / 2, abs=1)
+    assert far.get_steps() == 0
+
+    # a mob stepped less often is stepped with the time since it was last stepped
+    assert middle.get_age() == pytest.approx(near.get_age(), abs=2 * TIME_STEP)
+
+
+def test_mobs_are_frozen_without_players():
+    world, birds = build_world(with_player=False)
+
+    for _ in range(TICKS):
+        world.advance(TIME_STEP, None)
+
+    assert [bird.get_steps() for bird in birds] == [0, 0, 0]
+
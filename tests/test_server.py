@@ -0,0 +1,95 @@
+"""
+Tests for the validation & isolation of client inputs on the game server
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from headless import HeadlessGame, BLOCK_SIZE
+from server import GameServer, ClientConnection, is_valid_input
+
+GRID_SIZE = (64, 32)
+
+
+class ClosableWriter:
+    """Stands in for the stream of a client that is never written to"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def connect(server):
+    """(ClientConnection) Returns a client connected to 'server', without a network connection"""
+    client = ClientConnection(server.get_game().add_player(), ClosableWriter())
+    server._clients.append(client)
+    return client
+
+
+@pytest.mark.parametrize('game_input, valid', [
+    (('move', 1, 0), True),
+    (('move', 2, 0), False),
+    (('target', 300., 100.), True),
+    (('target', 300., 2000.), False),
+    (('target', -1., 100.), False),
+    (('target', 300., 1e9), False),
+    (('target', float('nan'), 100.), False),
+    (('select', 5), True),
+    (('select', 10), False),
+    (('use', 1), False),
+])
+def test_is_valid_input(game_input, valid):
+    assert is_valid_input(game_input, (GRID_SIZE[0] * BLOCK_SIZE, GRID_SIZE[1] * BLOCK_SIZE)) is valid
+
+
+@pytest.mark.parametrize('inputs', [
+    [('select', 5), ('target', 300., 100.), ('use',)],
+    [('select', 0), ('target', -500., -500.), ('use',)],
+])
+def test_bad_inputs_dont_stop_the_game(inputs):
+    server = GameServer(HeadlessGame(seed=1, grid_size=GRID_SIZE, spawn_player=False))
+    client = connect(server)
+    other = connect(server)
+
+    client.receive_inputs(1, inputs)
+    server.tick()
+    server.tick()
+
+    assert other in server.get_clients()
+    assert server.get_game().get_ticks() == 2
+
+
+def test_failing_client_is_disconnected():
+    server = GameServer(HeadlessGame(seed=1, grid_size=GRID_SIZE, spawn_player=False))
+    client = connect(server)
+    other = connect(server)
+
+    client.receive_inputs(1, [('explode',)])
+    server.tick()
+
+    assert server.get_clients() == [other]
+    assert client.get_writer().closed
+
+
+def test_placing_into_a_full_cell_keeps_the_rest_of_the_inputs():
+    server = GameServer(HeadlessGame(seed=1, grid_size=GRID_SIZE, spawn_player=False))
+    client = connect(server)
+    controller = client.get_controller()
+    world = server.get_game().get_world()
+
+    column, _ = world.xy_to_grid(*controller.get_player().get_position())
+    x, y = world.grid_to_xy_centre(column, world.get_surface_row(column))
+    selected = controller.get_hot_bar()[0, 0].get_quantity()
+
+    client.receive_inputs(1, [('select', 0), ('target', x, y), ('use',), ('move', 1, 0)])
+    server.tick()
+
+    assert server.get_clients() == [client]
+    assert controller.get_hot_bar()[0, 0].get_quantity() == selected
+    assert controller.get_player().get_velocity().x > 0
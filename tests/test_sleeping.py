@@ -0,0 +1,74 @@
+"""
+Tests for putting resting bodies to sleep & waking them
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+from block import create_block
+from dropped_item import DroppedItem
+from item import create_item
+from player import Player
+from world import World
+
+BLOCK_SIZE = 32
+TIME_STEP = 1 / 60
+
+
+def build_settled_world(**kwargs):
+    """(World, DroppedItem) Returns a world with a floor along row 8 & an apple that has had
+    time to land on it"""
+    world = World((10, 10), BLOCK_SIZE, time_step=TIME_STEP, **kwargs)
+    world.add_blocks((create_block('dirt'), column, 8) for column in range(10))
+
+    item = DroppedItem(create_item('apple'))
+    world.add_item(item, 100, 200)
+    advance(world, 120)
+
+    return world, item
+
+
+def advance(world, steps):
+    """Advances 'world' by a number of time steps"""
+    for _ in range(steps):
+        world.advance(TIME_STEP, None)
+
+
+def test_resting_items_fall_asleep():
+    world, item = build_settled_world()
+
+    assert world.is_sleeping(item)
+    assert world.count_sleeping("item") == 1
+
+
+def test_sleeping_can_be_turned_off():
+    world, item = build_settled_world(sleep_time_threshold=None)
+
+    assert not world.is_sleeping(item)
+    assert world.count_sleeping() == 0
+
+
+def test_removing_the_block_below_wakes_items():
+    world, item = build_settled_world()
+    _, y = item.get_position()
+
+    column, row = world.xy_to_grid(*item.get_position())
+    world.remove_block(world.get_block_at_cell(column, row + 1))
+
+    assert not world.is_sleeping(item)
+    advance(world, 10)
+    assert item.get_position()[1] > y
+
+
+def test_moving_players_wake_items_they_touch():
+    world, item = build_settled_world()
+    x, y = item.get_position()
+
+    player = Player()
+    world.add_player(player, x - 40, y - 8)
+    player.set_velocity((200, 0))
+    advance(world, 15)
+
+    assert item.get_position()[0] > x
@@ -0,0 +1,69 @@
+"""
+Tests for saving worlds as snapshots & restoring them
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pytest
+
+from dropped_item import DroppedItem
+from headless import HeadlessGame
+from item import create_item
+from snapshot import save_snapshot, load_snapshot, restore_world
+from world import World
+
+GRID_SIZE = (64, 32)
+
+
+def describe_world(world):
+    """Returns the blocks, with their hitpoints, & the things in a world, for comparison"""
+    blocks = {world.get_block_cell(block): (block.get_block_id(), block.get_hitpoints())
+              for block in world.get_things_in_categories("block")}
+    things = sorted((category, type(thing).__name__, tuple(round(value, 3) for value in thing.get_position()))
+                    for category in ("item", "mob")
+                    for thing in world.get_things_in_categories(category))
+    return blocks, things
+
+
+@pytest.mark.parametrize('chunk_size', [None, 16])
+def test_restored_game_saves_identically(chunk_size):
+    options = {} if chunk_size is None else {'chunk_size': chunk_size}
+    game = HeadlessGame(seed=2, grid_size=GRID_SIZE, **options)
+    world = game.get_world()
+    # activates the chunks around the player
+    game.tick()
+
+    column, _ = world.xy_to_grid(*game.get_player().get_position())
+    block = world.get_block_at_cell(column, world.get_surface_row(column))
+    block.set_hitpoints(block.get_max_hitpoints() / 4)
+    world.add_item(DroppedItem(create_item('apple'), 3), 200, 50)
+
+    for _ in range(10):
+        game.tick([('move', 1, 0)])
+
+    data = game.save()
+    restored = HeadlessGame(snapshot=data, **options)
+
+    assert restored.get_ticks() == game.get_ticks()
+    assert restored.save() == data
+
+    # activates the restored chunks around the player, as in the original game
+    game.tick()
+    restored.tick()
+    assert describe_world(restored.get_world()) == describe_world(world)
+
+
+def test_restore_rejects_other_grid_size():
+    world = World(GRID_SIZE, 32)
+    data = save_snapshot(world)
+
+    with pytest.raises(ValueError):
+        restore_world(World((32, 32), 32), load_snapshot(data))
+
+
+def test_load_rejects_other_data():
+    with pytest.raises(ValueError):
+        load_snapshot(b'not a snapshot' * 4)
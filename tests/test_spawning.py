@@ -0,0 +1,80 @@
+"""
+Tests for spawning & despawning mobs around players
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import math
+import random
+
+from block import create_block
+from player import Player
+from spawning import MobSpawner
+from world import World
+
+BLOCK_SIZE = 32
+GRID_SIZE = (200, 20)
+FLOOR_ROW = 15
+
+
+def build_world(**spawner_options):
+    """(World, Player, MobSpawner) Returns a world with a flat floor, a player on it at column
+    20, & a spawner that checks on every tick"""
+    spawner = MobSpawner(rng=random.Random(0), interval=1, **spawner_options)
+    world = World(GRID_SIZE, BLOCK_SIZE, mob_spawner=spawner)
+    columns, rows = GRID_SIZE
+    world.add_blocks((create_block('dirt'), column, row)
+                     for column in range(columns) for row in range(FLOOR_ROW, rows))
+
+    player = Player()
+    world.add_player(player, *world.grid_to_xy_centre(20, FLOOR_ROW - 2))
+    return world, player, spawner
+
+
+def test_mobs_spawn_on_the_surface_away_from_the_player():
+    world, player, spawner = build_world(density=.5)
+    world.advance(1 / 60, None)
+
+    mobs = list(world.get_things_in_categories("mob"))
+    assert len(mobs) == spawner.get_stats()['spawned'] > 0
+
+    column, row = world.xy_to_grid(*player.get_position())
+    for mob in mobs:
+        mob_column, mob_row = world.xy_to_grid(*mob.get_position())
+        assert mob_row == FLOOR_ROW - 1
+        assert 8 <= math.hypot(mob_column - column, mob_row - row) <= 24
+
+
+def test_far_mobs_are_despawned_and_reused():
+    world, player, spawner = build_world(density=.5)
+    for _ in range(10):
+        world.advance(1 / 60, None)
+
+    spawned = spawner.get_stats()['spawned']
+    player.get_shape().body.position = world.grid_to_xy_centre(180, FLOOR_ROW - 2)
+
+    for _ in range(10):
+        world.advance(1 / 60, None)
+
+    stats = spawner.get_stats()
+    assert stats['despawned_far'] == spawned
+    assert stats['reused'] > 0
+    assert stats['created'] + stats['reused'] == stats['spawned']
+
+    x, y = player.get_position()
+    assert all(math.hypot(mob.get_position()[0] - x, mob.get_position()[1] - y) < 48 * BLOCK_SIZE
+               for mob in world.get_things_in_categories("mob"))
+
+
+def test_nothing_spawns_without_players():
+    spawner = MobSpawner(rng=random.Random(0), interval=1)
+    world = World(GRID_SIZE, BLOCK_SIZE, mob_spawner=spawner)
+    world.add_blocks((create_block('dirt'), column, FLOOR_ROW) for column in range(GRID_SIZE[0]))
+
+    for _ in range(10):
+        world.advance(1 / 60, None)
+
+    assert spawner.get_stats()['spawned'] == 0
@@ -0,0 +1,72 @@
+"""
+Tests for generating terrain & loading it into worlds
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import numpy as np
+import pytest
+
+from player import Player
+from terrain import TerrainGenerator, load_terrain, get_surface_rows
+from world import World
+
+BLOCK_SIZE = 32
+GRID_SIZE = (96, 48)
+
+
+def get_block_ids(world):
+    """(dict<tuple<int, int>: tuple>) Returns the block id of the block in each filled cell of 'world'"""
+    columns, rows = world.get_grid_size()
+    return {(column, row): block.get_block_id()
+            for column in range(columns) for row in range(rows)
+            for block in [world.get_block_at_cell(column, row)] if block is not None}
+
+
+def test_the_same_seed_generates_the_same_terrain():
+    codes = TerrainGenerator(3).generate(GRID_SIZE)
+
+    assert codes.shape == GRID_SIZE
+    assert np.array_equal(codes, TerrainGenerator(3).generate(GRID_SIZE))
+    assert np.array_equal(get_surface_rows(codes), get_surface_rows(TerrainGenerator(3).generate(GRID_SIZE)))
+    assert not np.array_equal(codes, TerrainGenerator(4).generate(GRID_SIZE))
+
+
+def test_surface_rows_match_the_world():
+    generator = TerrainGenerator(3)
+    codes = generator.generate(GRID_SIZE)
+
+    world = World(GRID_SIZE, BLOCK_SIZE)
+    load_terrain(world, codes, generator.get_block_ids())
+
+    assert [world.get_surface_row(column) for column in range(GRID_SIZE[0])] == \
+        get_surface_rows(codes).tolist()
+
+
+@pytest.mark.parametrize('active', (False, True))
+def test_chunked_loading_equals_a_full_load(active):
+    generator = TerrainGenerator(3)
+    codes = generator.generate(GRID_SIZE)
+
+    full = World(GRID_SIZE, BLOCK_SIZE)
+    load_terrain(full, codes, generator.get_block_ids())
+
+    # with a radius covering the grid, every chunk is active once a player is added
+    chunked = World(GRID_SIZE, BLOCK_SIZE, chunk_size=16, activation_radius=max(GRID_SIZE))
+    player = Player()
+
+    if active:
+        chunked.add_player(player, BLOCK_SIZE, BLOCK_SIZE)
+        chunked.update_active_chunks()
+
+    load_terrain(chunked, codes, generator.get_block_ids())
+
+    if not active:
+        chunked.add_player(player, BLOCK_SIZE, BLOCK_SIZE)
+        chunked.update_active_chunks()
+
+    assert all(chunk.is_active() for chunk in chunked.get_chunks())
+    assert get_block_ids(chunked) == get_block_ids(full)
@@ -0,0 +1,79 @@
+"""
+Tests for advancing a world by a fixed time step
+"""
+
+__author__ = "Benjamin Martin and Paul Haley"
+__version__ = "1.1.0"
+__date__ = "26/04/2019"
+__copyright__ = "The University of Queensland, 2019"
+
+import pymunk
+import pytest
+
+from world import World
+
+BLOCK_SIZE = 32
+TIME_STEP = 1 / 60
+
+
+class FakeClock:
+    """A clock whose time only passes when told to"""
+
+    def __init__(self):
+        self.time = 0.
+
+    def __call__(self):
+        return self.time
+
+
+def build_world(**kwargs):
+    """(World, FakeClock) Returns a 10x10 world with a fixed time step, & the clock it keeps
+    time by"""
+    clock = FakeClock()
+    world = World((10, 10), BLOCK_SIZE, time_step=TIME_STEP, clock=clock, **kwargs)
+    return world, clock
+
+
+def test_time_is_accumulated_until_a_whole_step_has_passed():
+    world, clock = build_world()
+
+    clock.time = TIME_STEP / 2
+    assert world.step(None) == 0
+    assert world.get_step_alpha() == pytest.approx(.5)
+
+    clock.time = 2.75 * TIME_STEP
+    assert world.step(None) == 2
+    assert world.get_time() == pytest.approx(2 * TIME_STEP)
+    assert world.get_step_alpha() == pytest.approx(.75)
+
+
+def test_each_step_is_taken_in_sub_steps(monkeypatch):
+    world, clock = build_world(sub_steps=4)
+
+    deltas = []
+    space_step = pymunk.Space.step
+
+    def record_step(space, dt):
+        deltas.append(dt)
+        space_step(space, dt)
+
+    monkeypatch.setattr(pymunk.Space, 'step', record_step)
+
+    clock.time = 2 * TIME_STEP
+    world.step(None)
+
+    assert deltas == pytest.approx([TIME_STEP / 4] * 8)
+
+
+def test_steps_beyond_the_most_per_frame_are_dropped():
+    world, clock = build_world(max_steps_per_frame=3)
+
+    clock.time = 10.5 * TIME_STEP
+    assert world.step(None) == 3
+    assert world.get_dropped_steps() == 7
+    assert world.get_time() == pytest.approx(3 * TIME_STEP)
+    assert world.get_step_alpha() == pytest.approx(.5)
+
+    clock.time = 11.5 * TIME_STEP
+    assert world.step(None) == 1
+    assert world.get_dropped_steps() == 7
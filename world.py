@@ -7,15 +7,19 @@ __version__ = "1.1.0"
 __date__ = "26/04/2019"
 __copyright__ = "The University of Queensland, 2019"
 
+import heapq
+import itertools
 import pymunk
 import time
-from typing import Tuple, Iterable
+from typing import Tuple, Iterable, List
 
 from physical_thing import BoundaryWall, PhysicalThing
 from player import Player
 from dropped_item import DroppedItem
-from block import Block
+from block import Block, create_block
 from mob import Mob
+from meshing import greedy_mesh
+from chunk import BlockPalette, Chunk
 
 # The intention with the following constants is to express a finite range of values that
 # can effectively be treated as their own type in this code. We have used collections of
@@ -44,9 +48,76 @@ PHYSICAL_THING_CATEGORIES = {
     "mob": 2 ** 5
 }
 
+# Pairs of categories of things whose shapes collide with each other, for worlds that opt in to
+# fewer collisions (see World's collision_matrix parameter); shapes of any other pair pass
+# through each other, without being given to the narrowphase (see World.collides). By default,
+# every category collides with every other.
+#   - walls & blocks are static, so never collide with each other anyway
+#   - items only need to land on terrain & to touch players (to be picked up)
+#   - mobs don't need to bump into items or into each other
+REDUCED_COLLISION_MATRIX = (
+    ("wall", "player"), ("wall", "item"), ("wall", "mob"),
+    ("block", "player"), ("block", "item"), ("block", "mob"),
+    ("player", "player"), ("player", "item"), ("player", "mob"),
+)
+
+# Category reserved for queries, which every shape's mask includes, so that things are found by
+# point/rectangle queries even if they collide with nothing
+QUERY_CATEGORY = 2 ** 31
+
+# Categories of things that are stored in an inactive chunk when they are within it
+CHUNKED_CATEGORIES = ("item", "mob")
+
+# Broadphases (i.e. spatial indices used to find potentially colliding shapes) supported by pymunk
+#   - 'tree': bounding box tree, which suits shapes of widely varying sizes (the default)
+#   - 'spatial_hash': spatial hash, which suits many shapes of about the same size
+BROADPHASES = ("tree", "spatial_hash")
+
+# Minimum number of cells in a spatial hash, & the number of cells per shape in the world
+# (pymunk recommends a number of cells about 10x the number of shapes)
+SPATIAL_HASH_MIN_COUNT = 1000
+SPATIAL_HASH_CELLS_PER_SHAPE = 10
+
+# Number of time steps between checks for things that have moved into inactive chunks
+CHUNK_SWEEP_INTERVAL = 30
+
+# Most detached item bodies & shapes of each size kept for reuse by new items
+ITEM_POOL_SIZE = 256
+
+# Resting items (moving slower than the rest speed, in pixels per second) of the same kind
+# within the merge radius (in pixels) of each other are merged every merge interval (in steps)
+ITEM_MERGE_RADIUS = 12
+ITEM_MERGE_INTERVAL = 30
+ITEM_REST_SPEED = 4
+
+# Time for which a dropped item stays in the world, in seconds
+ITEM_LIFETIME = 300
+
+# Most items simulated at once, in the whole world & in any one chunk; beyond these, the
+# oldest are removed
+MAX_ITEMS = 1024
+MAX_ITEMS_PER_CHUNK = 128
+
+# Number of time steps between checks of the number of items in each chunk
+ITEM_CAP_INTERVAL = 30
+
+# Bodies moving slower than the idle speed (in pixels per second) for the sleep time (in
+# seconds) are put to sleep, and aren't simulated until something wakes them
+SLEEP_TIME_THRESHOLD = .5
+IDLE_SPEED_THRESHOLD = 10
+
+# Categories of things that are woken when a neighbouring block is removed or a player touches them
+WAKEABLE_CATEGORIES = ("item", "mob")
+
 # Names for each collision event recognised by pymunk (can have a callback attached)
 COLLISION_HANDLER_CALLBACKS = {'begin', 'separate', 'pre_solve', 'post_solve'}
 
+# (dx, dy) offsets of neighbouring grid cells
+#   - Cardinal neighbours are above, right, below & left (in that order)
+#   - Surrounding neighbours also include the diagonals, clockwise from top-left
+CARDINAL_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+SURROUNDING_OFFSETS = ((-1, -1), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0))
+
 
 class World:
     """Game world that contains things in physical space.
@@ -63,10 +134,21 @@ class World:
         - position/point/coordinates
         - velocity/speed
         - acceleration/gravity
+
+    The grid can optionally be divided into square chunks, which are only active when they are
+    within an activation radius of a player. The contents of an inactive chunk are stored
+    compactly in the chunk (see chunk.Chunk) instead of being simulated; its blocks are not
+    returned by get_block, and things placed into it are stored rather than simulated.
     """
 
     def __init__(self, grid_size, cell_expanse, gravity=(0, 300), boundary_thickness=50,
-                 collision_types=None, thing_categories=None):
+                 collision_types=None, thing_categories=None, time_step=None, sub_steps=1,
+                 max_steps_per_frame=5, mesh_tile_size=None, chunk_size=None, activation_radius=2,
+                 broadphase="tree", chunk_store=None, clock=time.time, mob_scheduler=None,
+                 mob_spawner=None, item_pool_size=ITEM_POOL_SIZE, item_merge_radius=ITEM_MERGE_RADIUS,
+                 item_lifetime=ITEM_LIFETIME, max_items=MAX_ITEMS, max_items_per_chunk=MAX_ITEMS_PER_CHUNK,
+                 sleep_time_threshold=SLEEP_TIME_THRESHOLD, idle_speed_threshold=IDLE_SPEED_THRESHOLD,
+                 loot_physics=None, collision_matrix=None, collision_census_interval=None):
         """Creates a new world with four boundary walls
 
         Parameters:
@@ -80,6 +162,62 @@ class World:
             thing_categories (dict<str: int>):
                     Mapping of thing categories to unique powers of 2
                     Defaults to PHYSZICAL_THING_CATEGORIES constant
+            time_step (float): The fixed time step (in seconds) by which to advance the world,
+                               or None to advance by the (variable) time since the last step
+            sub_steps (int): The number of physics sub-steps to take per time step
+            max_steps_per_frame (int): The maximum number of fixed time steps to take in a single
+                                       call to step; any time beyond this is dropped
+            mesh_tile_size (int): If not None, the collision hulls of blocks are merged into
+                                  larger rectangles within square tiles of this many cells
+                                  (see _update_terrain_mesh); otherwise each block has its own
+            chunk_size (int): If not None, the grid is divided into square chunks of this many
+                              cells; otherwise the entire grid is always active
+            activation_radius (int): The distance, in chunks, from a player within which chunks
+                                     are active; chunks are deactivated once they are more than
+                                     one chunk further away
+            broadphase (str): The broadphase used by the physics engine, one of BROADPHASES
+                              (see use_spatial_hash)
+            chunk_store (region.RegionStore): If not None, the blocks of each chunk are read from
+                                              this store when the chunk is first needed, rather
+                                              than starting empty (requires chunk_size); may also
+                                              be a streaming.ChunkStreamer
+            clock (callable<float>): Returns the current time in seconds, from which step
+                                     measures the time passed; replace to control time
+                                     (e.g. for deterministic replays)
+            mob_scheduler (scheduler.MobScheduler): If not None, mobs are stepped only when this
+                                                    schedules them (e.g. less often when far
+                                                    from every player), rather than on every
+                                                    time step; or a population.MobPopulation,
+                                                    which steps mobs together & can itself be
+                                                    given a MobScheduler
+            mob_spawner (spawning.MobSpawner): If not None, keeps a density of mobs around
+                                               players, spawning & despawning them as players
+                                               move
+            item_pool_size (int): The most bodies & shapes of removed items of each size to
+                                  keep for reuse by items added later (see remove_item)
+            item_merge_radius (float): If not None, resting items of the same kind within this
+                                       distance of each other are periodically merged into
+                                       one (see merge_items)
+            item_lifetime (float): If not None, items are removed once they have been in the
+                                   world for this long, in seconds (see get_item_age)
+            max_items (int): If not None, the oldest items are removed whenever more than this
+                             many are simulated
+            max_items_per_chunk (int): If not None, the oldest items in each chunk are
+                                       periodically removed while any chunk has more than
+                                       this many (requires chunk_size)
+            sleep_time_threshold (float): If not None, bodies that have been idle for this long,
+                                          in seconds, are put to sleep (see is_sleeping)
+            idle_speed_threshold (float): The speed, in pixels per second, below which a body
+                                          is considered idle
+            loot_physics (loot.SimpleLoot): If not None, items are moved by this instead of
+                                            having bodies & shapes in the physical space
+            collision_matrix (iterable<tuple<str, str>>):
+                    Pairs of thing categories whose shapes collide with each other (e.g.
+                    REDUCED_COLLISION_MATRIX), or None for every category to collide with
+                    every other
+            collision_census_interval (int): If not None, the overlapping pairs of shapes are
+                                             counted every this many time steps (see
+                                             census_contact_pairs)
 
         """
         if collision_types is None:
@@ -89,19 +227,144 @@ class World:
         if thing_categories is None:
             thing_categories = PHYSICAL_THING_CATEGORIES
         self._thing_categories = thing_categories
+        self._category_names = {value: key for key, value in thing_categories.items()}
+
+        # Categories each category collides with, as a mask, and the filter of the shapes of
+        # each combination of categories (see _get_shape_filter); categories that don't collide
+        # with themselves are given a group of their own, so that pairs of their shapes are
+        # rejected on the group alone
+        if collision_matrix is None:
+            collision_matrix = itertools.combinations_with_replacement(thing_categories, 2)
+        self._collision_matrix = {frozenset(pair) for pair in collision_matrix}
+
+        self._collision_masks = {}
+        self._collision_groups = {}
+        for group, (category, value) in enumerate(thing_categories.items(), 1):
+            mask = QUERY_CATEGORY
+            for other, other_value in thing_categories.items():
+                if self.collides(category, other):
+                    mask |= other_value
+
+            self._collision_masks[value] = mask
+            self._collision_groups[value] = 0 if self.collides(category, category) else group
+
+        self._shape_filters = {}
+
+        # Number of overlapping pairs of shapes in each (category a, category b) pair, at the
+        # last census & over every census (see census_contact_pairs)
+        self._collision_census_interval = collision_census_interval
+        self._steps_since_census = 0
+        self._contact_censuses = 0
+        self._last_contact_pairs = {}
+        self._total_contact_pairs = {}
+
+        # Registry of things in this world; dicts are used as insertion-ordered sets so that
+        # iteration order (and hence simulation) is repeatable
+        #   - _things maps each thing to its category name (or None if it has no single category)
+        #   - _things_by_category maps each category name to the things in that category
+        #   - _steppers contains every thing that does something when stepped
+        self._things = {}
+        self._things_by_category = {category: {} for category in thing_categories}
+        self._steppers = {}
+        self._mob_scheduler = mob_scheduler
+        self._mob_spawner = mob_spawner
+        # set before any shapes are counted (see _estimate_shape_count), but only attached
+        # once the grid exists
+        self._loot = loot_physics
+
+        # Data & callbacks of each collision handler, by (collision type a, collision type b),
+        # for things that aren't in the physical space (see loot.SimpleLoot)
+        self._collision_handlers = {}
+        # Detached bodies & shapes of removed items, by their (width, height) size, ready to be
+        # given to new items, with counts of items that were & weren't given one
+        self._item_pools = {}
+        self._item_pool_size = item_pool_size
+        self._item_pool_hits = 0
+        self._item_pool_misses = 0
+
+        self._item_merge_radius = item_merge_radius
+        self._steps_since_merge = 0
+        self._merged_items = 0
+
+        # Time (see get_time) at which each item in the world or an inactive chunk was dropped,
+        # and a heap of (time dropped, sequence, item), so that the oldest items are found
+        # without checking every item; entries for items since removed or re-timed are skipped
+        self._time = 0.
+        self._item_births = {}
+        self._item_heap = []
+        self._item_sequence = itertools.count()
+        self._item_lifetime = item_lifetime
+        self._max_items = max_items
+        self._max_items_per_chunk = max_items_per_chunk
+        self._steps_since_cap = 0
+        self._expired_items = 0
+        self._evicted_items = 0
+
+        if broadphase not in BROADPHASES:
+            raise KeyError(f"No broadphase defined for {broadphase!r}")
 
         self._space = pymunk.Space()
 
         self._space.gravity = gravity
 
+        if sleep_time_threshold is not None:
+            self._space.sleep_time_threshold = sleep_time_threshold
+            self._space.idle_speed_threshold = idle_speed_threshold
+
         self._grid_size = grid_size
         self._cell_expanse = cell_expanse
 
         self._pixel_size = tuple(grid * cell_expanse for grid in grid_size)
 
+        # Dense index of the block in each grid cell, indexed by [column][row] (None if empty),
+        # with the reverse mapping of each block to its (column, row) cell
+        columns, rows = grid_size
+        self._block_index = [[None] * rows for _ in range(columns)]
+        self._block_cells = {}
+        # Callables notified of the cells of blocks added to & removed from the grid
+        self._block_listeners = []
+
+        # Merged collision hulls of each (column, row) mesh tile, and the tiles that need to be
+        # rebuilt before the next physics step
+        self._mesh_tile_size = mesh_tile_size
+        self._mesh_hulls = {}
+        self._dirty_mesh_tiles = set()
+
+        # Every chunk by its (column, row) position, in chunks; all chunks start inactive
+        self._block_palette = BlockPalette()
+        self._chunk_size = chunk_size
+        self._chunk_store = chunk_store
+        self._activation_radius = activation_radius
+        self._chunks = {}
+        self._active_chunks = {}
+        self._player_chunks = None
+        self._steps_since_sweep = 0
+
+        if chunk_size is not None:
+            for column in range((columns + chunk_size - 1) // chunk_size):
+                for row in range((rows + chunk_size - 1) // chunk_size):
+                    self._chunks[column, row] = Chunk(column, row, chunk_size, loaded=chunk_store is None)
+
         self._create_boundaries(boundary_thickness)
 
-        self._last_time = time.time()
+        # Number of shapes the spatial hash was last sized for, or None if using the tree
+        self._spatial_hash_shapes = None
+        if broadphase == "spatial_hash":
+            self.use_spatial_hash()
+
+        self._time_step = time_step
+        self._sub_steps = sub_steps
+        self._max_steps_per_frame = max_steps_per_frame
+
+        # Time that has passed, but has not yet been simulated (fixed time step only)
+        self._accumulator = 0.
+        self._dropped_steps = 0
+
+        self._clock = clock
+        self._last_time = clock()
+
+        if loot_physics is not None:
+            loot_physics.attach(self)
 
     def _create_boundaries(self, thickness):
         """Create boundary walls of given 'thickness'"""
@@ -121,10 +384,41 @@ class World:
 
             shape.friction = 1.
             shape.collision_type = self._collision_types['wall']
-            shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["wall"])
+            shape.filter = self._get_shape_filter(self._thing_categories["wall"])
             shape.object = wall
 
             self._space.add(shape)
+            self._register(wall, "wall")
+
+    def _register(self, thing: PhysicalThing, category):
+        """Registers a thing that has been added to the world
+
+        Parameters:
+            thing (PhysicalThing): The thing to register
+            category (str): The name of the thing's category, or None if it has no single category
+        """
+        self._things[thing] = category
+
+        if category is not None:
+            self._things_by_category[category][thing] = None
+
+        # Things that inherit the do-nothing step method never need to be stepped
+        if category == "mob" and self._mob_scheduler is not None:
+            self._mob_scheduler.add_mob(thing)
+        elif type(thing).step is not PhysicalThing.step:
+            self._steppers[thing] = None
+
+    def _unregister(self, thing: PhysicalThing):
+        """Unregisters a thing that has been removed from the world"""
+        category = self._things.pop(thing, None)
+
+        if category is not None:
+            self._things_by_category[category].pop(thing, None)
+
+        self._steppers.pop(thing, None)
+
+        if category == "mob" and self._mob_scheduler is not None:
+            self._mob_scheduler.remove_mob(thing)
 
     def set_gravity(self, gravity_x, gravity_y):
         """Sets the gravity of the world
@@ -135,6 +429,11 @@ class World:
         """
         self._space.gravity = (gravity_x, gravity_y)
 
+    def get_gravity(self) -> Tuple[float, float]:
+        """(tuple<float, float>) Returns the (x, y) gravity of the world"""
+        gravity = self._space.gravity
+        return gravity.x, gravity.y
+
     def get_pixel_size(self):
         """Returns the (width, height) size of the world"""
         return self._pixel_size
@@ -147,28 +446,180 @@ class World:
         """Returns the expanse (width/height) of each grid cell"""
         return self._cell_expanse
 
+    def get_broadphase(self) -> str:
+        """(str) Returns the broadphase used by the physics engine, one of BROADPHASES"""
+        return "tree" if self._spatial_hash_shapes is None else "spatial_hash"
+
+    def _estimate_shape_count(self) -> int:
+        """(int) Returns the approximate number of shapes in the physical space"""
+        shapes = len(self._things) + self.count_terrain_hulls()
+
+        if self._mesh_tile_size is not None:
+            shapes -= len(self._things_by_category["block"])
+
+        if self._loot is not None:
+            shapes -= self._loot.count_items()
+
+        return shapes
+
+    def use_spatial_hash(self, dim: float = None, count: int = None):
+        """Switches the physics engine's broadphase to a spatial hash
+
+        Since blocks fill exactly one grid cell & other things are usually smaller, hash cells
+        default to the size of a grid cell. Unless a count is given, the spatial hash is resized
+        automatically as the number of shapes in the world grows (see advance).
+
+        Parameters:
+            dim (float): The width/height of each hash cell; defaults to the cell expanse
+            count (int): The minimum number of cells in the hash table; defaults to
+                         SPATIAL_HASH_CELLS_PER_SHAPE times the number of shapes in the world
+        """
+        if dim is None:
+            dim = self._cell_expanse
+
+        shapes = self._estimate_shape_count()
+
+        if count is None:
+            count = max(SPATIAL_HASH_MIN_COUNT, SPATIAL_HASH_CELLS_PER_SHAPE * shapes)
+            self._spatial_hash_shapes = max(shapes, SPATIAL_HASH_MIN_COUNT // SPATIAL_HASH_CELLS_PER_SHAPE)
+        else:
+            # never resize a hash with an explicit count
+            self._spatial_hash_shapes = float("inf")
+
+        self._space.use_spatial_hash(dim, count)
+
+    def get_time(self) -> float:
+        """(float) Returns the time simulated since the world was created, in seconds"""
+        return self._time
+
+    def get_time_step(self):
+        """(float) Returns the fixed time step of the world, or None if it is variable"""
+        return self._time_step
+
+    def get_dropped_steps(self) -> int:
+        """(int) Returns the number of fixed time steps that have been dropped because the
+        world fell too far behind real time"""
+        return self._dropped_steps
+
+    def get_step_alpha(self) -> float:
+        """(float) Returns the fraction of a fixed time step that has passed, but has not yet been
+        simulated, which can be used to interpolate between the last two physics states
+
+        Always 0 if the world does not use a fixed time step"""
+        if self._time_step is None:
+            return 0.
+        return self._accumulator / self._time_step
+
     def step(self, game_data):
-        """Steps the game world forward by one time step
+        """Steps the game world forward by the time that has passed since the last step
+
+        If the world has a fixed time step, the time passed is accumulated and the world is
+        advanced in as many whole time steps as fit (at most max_steps_per_frame; any further
+        whole steps are dropped, rather than falling further behind). Otherwise, the world is
+        advanced by exactly the time passed.
+
+        See advance for what happens on each time step
+
+        Parameters:
+            game_data (app.GameData): Arbitrary data to be passed on to all things
+
+        Return:
+            int: The number of time steps taken
+        """
+        now = self._clock()
+        time_delta = now - self._last_time
+        self._last_time = now
+
+        if self._time_step is None:
+            self.advance(time_delta, game_data)
+            return 1
+
+        self._accumulator += time_delta
+        steps = int(self._accumulator // self._time_step)
+
+        if steps > self._max_steps_per_frame:
+            dropped = steps - self._max_steps_per_frame
+            self._dropped_steps += dropped
+            self._accumulator -= dropped * self._time_step
+            steps = self._max_steps_per_frame
+
+        for _ in range(steps):
+            self.advance(self._time_step, game_data)
+            self._accumulator -= self._time_step
+
+        return steps
+
+    def advance(self, time_delta, game_data):
+        """Advances the game world forward by a single time step of 'time_delta'
 
         1. Advances all things in the game world forward by one time step
-            step method is called on each thing, with:
-                - time_delta: the time (in seconds) since the last step
+            step method is called on each thing that isn't sleeping (see is_sleeping), with:
+                - time_delta: the time (in seconds) of the step
                 - game_data: the game_data parameter supplied to this method
-        2. Applies/resolves physics
+           (or, if there is a mob scheduler, on each mob that it schedules for this step)
+           then, if there is a mob spawner, mobs are spawned & despawned around players,
+           and every ITEM_MERGE_INTERVAL steps, resting items are merged (see merge_items)
+           then items that have outlived the item lifetime, or that are the oldest in a chunk
+           with too many, are removed
+        2. Applies/resolves physics, in sub_steps equal parts
+        3. If there is loot physics, moves items & finds those touching players (see loot.SimpleLoot)
 
         Parameters:
+            time_delta (float): The time (in seconds) to advance by
             game_data (app.GameData): Arbitrary data to be passed on to all things
         """
-        now = time.time()
-        time_delta = now - self._last_time
-        for shape in self._space.shapes:
-            thing = shape.object
+        self._time += time_delta
 
-            if thing:
+        if self._chunk_size is not None:
+            self.update_active_chunks()
+
+        self._wake_player_contacts()
+
+        # copied, since things may add/remove things when stepped
+        for thing in list(self._steppers):
+            # sleeping things are at rest, so have nothing to do
+            if not thing.get_shape().body.is_sleeping:
                 thing.step(time_delta, game_data)
 
-        self._space.step(time_delta)
-        self._last_time = now
+        if self._mob_scheduler is not None:
+            self._mob_scheduler.step(self, time_delta, game_data)
+
+        if self._mob_spawner is not None:
+            self._mob_spawner.step(self, time_delta, game_data)
+
+        if self._item_merge_radius is not None:
+            self._steps_since_merge += 1
+            if self._steps_since_merge >= ITEM_MERGE_INTERVAL:
+                self._steps_since_merge = 0
+                self.merge_items(self._item_merge_radius)
+
+        if self._item_lifetime is not None:
+            self._expire_items()
+
+        if self._max_items_per_chunk is not None and self._chunk_size is not None:
+            self._steps_since_cap += 1
+            if self._steps_since_cap >= ITEM_CAP_INTERVAL:
+                self._steps_since_cap = 0
+                self._cap_chunk_items()
+
+        self._update_terrain_mesh()
+
+        # resize the spatial hash once the number of shapes has doubled since it was last sized
+        if self._spatial_hash_shapes is not None and self._estimate_shape_count() > 2 * self._spatial_hash_shapes:
+            self.use_spatial_hash()
+
+        sub_delta = time_delta / self._sub_steps
+        for _ in range(self._sub_steps):
+            self._space.step(sub_delta)
+
+        if self._loot is not None:
+            self._loot.step(self, time_delta)
+
+        if self._collision_census_interval is not None:
+            self._steps_since_census += 1
+            if self._steps_since_census >= self._collision_census_interval:
+                self._steps_since_census = 0
+                self.census_contact_pairs()
 
     def xy_to_grid(self, x: float, y: float) -> Tuple[int, int]:
         """Converts pixel position (xy) to grid position"""
@@ -195,6 +646,9 @@ class World:
                               on_begin=None, on_separate=None, on_pre_solve=None, on_post_solve=None):
         """Adds a collision handler to the game world
 
+        If the terrain is meshed, a block's side of a collision is None, since a hull may cover
+        many blocks (see _update_terrain_mesh)
+
         Parameters:
             collision_type_a (str): A collision type in
         """
@@ -204,11 +658,115 @@ class World:
         handler.data['data'] = data
 
         local_variables = locals()
+        callbacks = {}
 
         for key in COLLISION_HANDLER_CALLBACKS:
             callback = local_variables[f"on_{key}"]
             if callback:
                 setattr(handler, key, self._wrap_callback(callback))
+                callbacks[key] = callback
+
+        self._collision_handlers[collision_type_a, collision_type_b] = data, callbacks
+
+    def collides(self, category_a: str, category_b: str) -> bool:
+        """(bool) Returns True iff things in 'category_a' collide with things in 'category_b',
+        according to the collision matrix (see REDUCED_COLLISION_MATRIX)"""
+        return frozenset((category_a, category_b)) in self._collision_matrix
+
+    def _get_shape_filter(self, categories: int) -> pymunk.ShapeFilter:
+        """(pymunk.ShapeFilter) Returns the filter of shapes in 'categories', a bitwise combination
+        of the values of self._thing_categories, which collide with every category that any of
+        those categories collides with"""
+        shape_filter = self._shape_filters.get(categories)
+
+        if shape_filter is None:
+            mask = QUERY_CATEGORY
+            for value, category_mask in self._collision_masks.items():
+                if categories & value:
+                    mask |= category_mask
+
+            shape_filter = self._shape_filters[categories] = pymunk.ShapeFilter(
+                group=self._collision_groups.get(categories, 0), categories=categories, mask=mask)
+
+        return shape_filter
+
+    def census_contact_pairs(self) -> dict:
+        """Counts the pairs of shapes in the physical space whose bounding boxes overlap, by
+        the categories of the things they belong to, adding them to the counts of every census
+        (see get_collision_stats)
+
+        Only pairs with at least one shape on a dynamic body are counted, since static shapes
+        never collide with each other. These are the pairs the broadphase would give to the
+        narrowphase if every category collided with every other; those of pairs of categories
+        that don't collide (see collides) are removed by the collision matrix.
+
+        Return:
+            dict<tuple<str, str>: int>: The number of overlapping pairs of shapes of each
+                                        (category a, category b) pair, in the order of
+                                        thing_categories, with None for unknown categories
+        """
+        order = {category: index for index, category in enumerate(self._thing_categories)}
+        query_filter = pymunk.ShapeFilter()
+        dynamic = pymunk.Body.DYNAMIC
+        names = self._category_names
+
+        pairs = {}
+        for body in self._space.bodies:
+            for shape in body.shapes:
+                category = names.get(shape.filter.categories)
+
+                for other in self._space.bb_query(shape.bb, query_filter):
+                    # pairs of dynamic shapes are found from both shapes, but counted once
+                    if other is shape or (other.body.body_type == dynamic and id(other) < id(shape)):
+                        continue
+
+                    pair = tuple(sorted((category, names.get(other.filter.categories)),
+                                        key=lambda name: order.get(name, len(order))))
+                    pairs[pair] = pairs.get(pair, 0) + 1
+
+        self._contact_censuses += 1
+        self._last_contact_pairs = pairs
+        for pair, count in pairs.items():
+            self._total_contact_pairs[pair] = self._total_contact_pairs.get(pair, 0) + count
+
+        return pairs
+
+    def get_collision_stats(self) -> dict:
+        """Returns the counts of overlapping pairs of shapes found by censuses (see
+        census_contact_pairs), for each pair of categories found in any census
+
+        Return:
+            dict<tuple<str, str>: dict<str: *>>: Mapping of (category a, category b) pairs to:
+                - 'collides': whether the pair collides (see collides)
+                - 'last': the number of overlapping pairs found by the last census
+                - 'total': the total number of overlapping pairs found by every census
+                - 'removed': the mean number of overlapping pairs per census that the collision
+                             matrix keeps from the narrowphase (0 if the pair collides)
+        """
+        censuses = self._contact_censuses
+        stats = {}
+
+        for pair, total in self._total_contact_pairs.items():
+            collides = self.collides(*pair)
+
+            stats[pair] = {
+                'collides': collides,
+                'last': self._last_contact_pairs.get(pair, 0),
+                'total': total,
+                'removed': 0 if collides else total / censuses,
+            }
+
+        return stats
+
+    def get_collision_handler(self, collision_type_a, collision_type_b):
+        """Returns the collision handler added for a pair of collision types
+
+        Return:
+            tuple<*, dict<str: callable>>: The handler's data, & its callbacks by name (e.g.
+                                           'begin'; see COLLISION_HANDLER_CALLBACKS), or None if
+                                           no handler was added
+        """
+        return self._collision_handlers.get((collision_type_a, collision_type_b))
 
     def get_all_things(self) -> Iterable[PhysicalThing]:
         """Yields all physical things in this world, including boundary walls
@@ -216,11 +774,41 @@ class World:
         Yield:
             PhysicalThing
         """
-        for shape in self._space.shapes:
-            thing = shape.object
+        yield from self._things
+
+    def get_things_in_categories(self, *categories) -> Iterable[PhysicalThing]:
+        """Yields all physical things in this world that are in any of the given categories
+
+        Parameters:
+            categories (*str): The names of the categories (i.e. keys of thing_categories)
+
+        Yield:
+            PhysicalThing
+        """
+        for category in categories:
+            yield from self._things_by_category[category]
+
+    def count_things(self, category=None) -> int:
+        """(int) Returns the number of things in the given category, or in total if category is None"""
+        if category is None:
+            return len(self._things)
+        return len(self._things_by_category[category])
+
+    def get_mob_scheduler(self):
+        """(scheduler.MobScheduler) Returns the scheduler of mob steps, or None if mobs are stepped every time step"""
+        return self._mob_scheduler
+
+    def get_loot_physics(self):
+        """(loot.SimpleLoot) Returns the physics moving items, or None if items have bodies"""
+        return self._loot
+
+    def get_mob_spawner(self):
+        """(spawning.MobSpawner) Returns the spawner of mobs around players, or None if there is none"""
+        return self._mob_spawner
 
-            if thing:
-                yield thing
+    def count_steppers(self) -> int:
+        """(int) Returns the number of things that are stepped on each time step"""
+        return len(self._steppers)
 
     def add_thing(self, thing: PhysicalThing, x: float, y: float, size: Tuple[float, float], collision_type=None,
                   categories=None, mass: float = 1, friction: float = 1):
@@ -236,33 +824,66 @@ class World:
                               value of self._physical_thing_categories
             mass (float): The mass of the thing
             friction (float): The friction of the thing
-        """
-        width, height = size
-
-        left = -width // 2
-        right = left + width
-        top = -height // 2
-        bottom = top + height
 
-        body = pymunk.Body(mass, pymunk.inf)
-        body.position = x, y
-        shape = pymunk.Poly(body, [(left, top), (left, bottom), (right, bottom), (right, top)])
+        If the thing has been removed from a world, & its shape is the same size, its body &
+        shape are reused rather than allocating new ones (e.g. for pooled mobs; see spawning.py)
+        """
+        vertices = self._get_box_vertices(size)
+
+        shape = thing.get_shape()
+        # pymunk doesn't forget the space of a removed shape, but does that of its body
+        if (shape is not None and shape.body.space is None and shape.object is thing
+                and set(map(tuple, shape.get_vertices())) == set(vertices)):
+            # the thing was removed from a world, so its body & shape are recycled
+            body = shape.body
+            body.mass = mass
+            body.velocity = 0, 0
+            body.position = x, y
+        else:
+            body = pymunk.Body(mass, pymunk.inf)
+            body.position = x, y
+            shape = pymunk.Poly(body, vertices)
 
         shape.object = thing
         if collision_type is not None:
             shape.collision_type = collision_type
 
         if categories is not None:
-            shape.filter = pymunk.ShapeFilter(categories=categories)
+            shape.filter = self._get_shape_filter(categories)
 
         shape.friction = friction
 
         thing.set_shape(shape)
         self._space.add(body, shape)
+        self._register(thing, self._category_names.get(categories))
+
+    @staticmethod
+    def _get_box_vertices(size: Tuple[float, float]):
+        """(list<tuple<float, float>>) Returns the vertices of a box of 'size', centred on (0, 0)"""
+        width, height = size
+
+        left = -width // 2
+        right = left + width
+        top = -height // 2
+        bottom = top + height
+
+        return [(left, top), (left, bottom), (right, bottom), (right, top)]
 
     def remove_thing(self, thing: PhysicalThing):
         """Removes a thing from the world"""
-        self._space.remove(thing.get_shape())
+        if self._loot is not None and self._loot.has_item(thing):
+            self._loot.remove_item(thing)
+            self._unregister(thing)
+            return
+
+        shape = thing.get_shape()
+
+        if shape.body is self._space.static_body:
+            self._space.remove(shape)
+        else:
+            self._space.remove(shape, shape.body)
+
+        self._unregister(thing)
 
     def add_player(self, player: Player, x: float, y: float, mass: float = 50, friction: float = .5):
         """Adds a player to game world at the position ('x', 'y')"""
@@ -275,15 +896,16 @@ class World:
         shape.friction = friction
         shape.collision_type = self._collision_types['player']
         shape.object = player
-        shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["player"])
+        shape.filter = self._get_shape_filter(self._thing_categories["player"])
 
         player.set_shape(shape)
 
         self._space.add(body, shape)
+        self._register(player, "player")
 
     def remove_player(self, player: Player):
         """Removes the player from the game world"""
-        self._space.remove(player.get_shape())
+        self.remove_thing(player)
 
     def add_block_to_grid(self, block: Block, column: int, row: int, friction: float = 1.):
         """Adds a block to the game world at the grid cell centred at ('column', 'row')
@@ -293,23 +915,88 @@ class World:
             column (int): The column of the grid cell at which to place the block
             row (int): The row of the grid cell at which to place the block
             friction (float): The friction on the surface of the block
+
+        Raises:
+            ValueError if the cell is not on the grid
         """
+        self.add_blocks([(block, column, row)], friction=friction)
 
-        left = column * self._cell_expanse
-        right = (column + 1) * self._cell_expanse
-        top = row * self._cell_expanse
-        bottom = (row + 1) * self._cell_expanse
+    def add_blocks(self, blocks: Iterable[Tuple[Block, int, int]], friction: float = 1.):
+        """Adds many blocks to the game world at once
 
-        shape = pymunk.Poly(self._space.static_body, [(left, top), (left, bottom), (right, bottom), (right, top)])
-        shape.object = block
-        shape.group = 2
+        Equivalent to calling add_block_to_grid for each block, except that all of their shapes
+        are built first & then added to the physical space in a single call
 
-        shape.friction = friction
-        shape.collision_type = self._collision_types['block']
-        shape.filter = pymunk.ShapeFilter(categories=self._thing_categories["block"])
+        Parameters:
+            blocks (iterable<tuple<Block, int, int>>): The (block, column, row) of each block to add
+            friction (float): The friction on the surface of the blocks
+
+        Raises:
+            ValueError if any cell is not on the grid, in which case no blocks are added
+        """
+        blocks = list(blocks)
+
+        for block, column, row in blocks:
+            if not self.is_cell_on_grid(column, row):
+                raise ValueError(f"Cell {(column, row)} is not on the {self._grid_size} grid")
+
+        expanse = self._cell_expanse
+        static_body = self._space.static_body
+        collision_type = self._collision_types['block']
+        shape_filter = self._get_shape_filter(self._thing_categories["block"])
+        meshed = self._mesh_tile_size is not None
+        palette = self._block_palette
+
+        shapes = []
+        cells = []
+
+        for block, column, row in blocks:
+            if self._chunk_size is not None:
+                chunk = self.get_chunk_at_cell(column, row)
+                if not chunk.is_active():
+                    self.load_chunk(chunk)
+                    hitpoints = block.get_hitpoints()
+                    chunk.set_block(column, row, palette.encode(block.get_block_id()),
+                                    hitpoints if hitpoints != block.get_max_hitpoints() else None)
+                    continue
+
+                chunk.set_dirty(True)
+                block.set_chunk(chunk)
+
+            left = column * expanse
+            right = (column + 1) * expanse
+            top = row * expanse
+            bottom = (row + 1) * expanse
+
+            shape = pymunk.Poly(static_body, [(left, top), (left, bottom), (right, bottom), (right, top)])
+            shape.object = block
+            shape.group = 2
+
+            shape.friction = friction
+            shape.collision_type = collision_type
+            shape.filter = shape_filter
+
+            block.set_shape(shape)
 
-        block.set_shape(shape)
-        self._space.add(shape)
+            if meshed:
+                # the block's own shape is kept out of the space, but still describes its cell
+                shape.cache_bb()
+                self._invalidate_terrain_mesh(column, row)
+            else:
+                shapes.append(shape)
+
+            self._register(block, "block")
+
+            self._block_index[column][row] = block
+            self._block_cells[block] = column, row
+            cells.append((column, row))
+
+        if shapes:
+            self._space.add(*shapes)
+
+        if cells:
+            for listener in self._block_listeners:
+                listener(cells, [])
 
     def add_block(self, block: Block, x: float, y: float, *args, **kwargs):
         """Adds a block to the game world at the grid cell that contains ('x', 'y')
@@ -324,19 +1011,375 @@ class World:
         return self.add_block_to_grid(block, *self.xy_to_grid(x, y), *args, **kwargs)
 
     def get_block(self, x, y):
-        """(Block) Returns a block on the point ('x', 'y'), or None if there is no block there
+        """(Block) Returns a block on the point ('x', 'y'), or None if there is no block there"""
+        return self.get_block_at_cell(*self.xy_to_grid(x, y))
+
+    def is_cell_on_grid(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the cell at ('column', 'row') is on the grid"""
+        columns, rows = self._grid_size
+        return 0 <= column < columns and 0 <= row < rows
+
+    def get_block_at_cell(self, column: int, row: int):
+        """(Block) Returns the block in the grid cell at ('column', 'row'), or None if the cell
+        is empty or not on the grid"""
+        if self.is_cell_on_grid(column, row):
+            return self._block_index[column][row]
+
+    def get_surface_row(self, column: int) -> int:
+        """(int) Returns the row of the topmost block in 'column' of the grid, or the number of rows
+        if the column is empty (see terrain.get_surface_rows)"""
+        cells = self._block_index[column]
+        return next((row for row, block in enumerate(cells) if block is not None), len(cells))
+
+    def get_block_cell(self, block: Block) -> Tuple[int, int]:
+        """(tuple<int, int>) Returns the (column, row) of the grid cell containing 'block'
+
+        Raises:
+            KeyError if the block is not in this world
+        """
+        return self._block_cells[block]
+
+    def get_blocks_at_cells(self, cells: Iterable[Tuple[int, int]]) -> [Block]:
+        """(list<Block>) Returns the block in each of the grid cells at 'cells', with None for
+        each cell that is empty or not on the grid
 
-        Note: It is technically possible for multiple blocks to overlap, in which case
-              this method will return one of those. This should never happen, though.
+        Parameters:
+            cells (iterable<tuple<int, int>>): The (column, row) position of each cell
         """
-        blocks = self._space.point_query((x, y), 0, pymunk.ShapeFilter(mask=self._thing_categories["block"]))
+        columns, rows = self._grid_size
+        index = self._block_index
+
+        return [index[column][row] if 0 <= column < columns and 0 <= row < rows else None
+                for column, row in cells]
 
-        if blocks:
-            return blocks[0].shape.object
+    def get_neighbouring_blocks(self, column: int, row: int, offsets=CARDINAL_OFFSETS) -> [Block]:
+        """(list<Block>) Returns the blocks neighbouring the grid cell at ('column', 'row'), in
+        the same order as 'offsets', with None for each neighbour that is empty or not on the grid
+
+        Parameters:
+            column (int): The column of the grid cell
+            row (int): The row of the grid cell
+            offsets (iterable<tuple<int, int>>): The (dx, dy) offset of each neighbour
+                                                 Defaults to CARDINAL_OFFSETS
+        """
+        return self.get_blocks_at_cells((column + dx, row + dy) for dx, dy in offsets)
 
     def remove_block(self, block: Block):
         """Removes a block from the game world"""
-        self.remove_thing(block)
+        self.remove_blocks([block])
+
+    def remove_blocks(self, blocks: Iterable[Block]):
+        """Removes many blocks from the game world at once, removing all of their shapes from
+        the physical space in a single call"""
+        shapes = []
+        cells = []
+
+        for block in blocks:
+            column, row = self._block_cells.pop(block)
+            self._block_index[column][row] = None
+            self._unregister(block)
+            cells.append((column, row))
+
+            if self._chunk_size is not None:
+                self.get_chunk_at_cell(column, row).set_dirty(True)
+                block.set_chunk(None)
+
+            if self._mesh_tile_size is None:
+                shapes.append(block.get_shape())
+            else:
+                self._invalidate_terrain_mesh(column, row)
+
+        if shapes:
+            self._space.remove(*shapes)
+
+        if cells:
+            self._wake_cells(cells)
+
+            for listener in self._block_listeners:
+                listener([], cells)
+
+    def add_block_listener(self, listener):
+        """Adds a listener to be notified whenever blocks are added to or removed from the grid
+
+        Blocks stored in inactive chunks are not in the grid, so a chunk's blocks are notified
+        as added when it is activated & as removed when it is deactivated
+
+        Parameters:
+            listener (callable<list<tuple<int, int>>, list<tuple<int, int>>>):
+                    Called with the (column, row) cells of the blocks added & of those removed
+        """
+        self._block_listeners.append(listener)
+
+    def remove_block_listener(self, listener):
+        """Removes a listener added by add_block_listener"""
+        self._block_listeners.remove(listener)
+
+    def get_block_palette(self) -> BlockPalette:
+        """(BlockPalette) Returns the palette used to encode blocks in inactive chunks"""
+        return self._block_palette
+
+    def get_chunk_size(self) -> int:
+        """(int) Returns the width/height of each chunk in grid cells, or None if the grid is not chunked"""
+        return self._chunk_size
+
+    def get_chunk_store(self):
+        """(region.RegionStore) Returns the store from which chunks are read, or None"""
+        return self._chunk_store
+
+    def load_chunk(self, chunk: Chunk):
+        """Reads the blocks of an inactive chunk from the chunk store, if they have not already been read"""
+        if not chunk.is_loaded():
+            self._chunk_store.read_chunk(chunk, self._block_palette)
+            chunk.set_loaded(True)
+
+    def get_chunk(self, column: int, row: int) -> Chunk:
+        """(Chunk) Returns the chunk at ('column', 'row'), in chunks, or None if there is no such chunk"""
+        return self._chunks.get((column, row))
+
+    def get_chunk_at_cell(self, column: int, row: int) -> Chunk:
+        """(Chunk) Returns the chunk containing the grid cell at ('column', 'row'), or None if
+        there is no such chunk"""
+        return self._chunks.get((column // self._chunk_size, row // self._chunk_size))
+
+    def get_chunks(self) -> Iterable[Chunk]:
+        """Yields every chunk in this world
+
+        Yield:
+            Chunk
+        """
+        yield from self._chunks.values()
+
+    def get_active_chunks(self) -> Iterable[Chunk]:
+        """Yields every active chunk in this world
+
+        Yield:
+            Chunk
+        """
+        yield from self._active_chunks
+
+    def is_cell_active(self, column: int, row: int) -> bool:
+        """(bool) Returns True iff the grid cell at ('column', 'row') is on the grid & is simulated"""
+        if not self.is_cell_on_grid(column, row):
+            return False
+        return self._chunk_size is None or self.get_chunk_at_cell(column, row).is_active()
+
+    def get_activation_radius(self) -> int:
+        """(int) Returns the distance, in chunks, from a player within which chunks are active"""
+        return self._activation_radius
+
+    def get_chunk_position(self, x: float, y: float) -> Tuple[int, int]:
+        """(tuple<int, int>) Returns the (column, row) of the chunk containing the point ('x', 'y'),
+        clamped to the chunks of the grid"""
+        column, row = self.xy_to_grid(x, y)
+        columns, rows = self._grid_size
+
+        column = min(max(column, 0), columns - 1)
+        row = min(max(row, 0), rows - 1)
+
+        return column // self._chunk_size, row // self._chunk_size
+
+    def update_active_chunks(self, force=False):
+        """Activates every chunk within the activation radius of a player, and deactivates every
+        chunk beyond one chunk further than that
+
+        Chunks only change when a player moves into another chunk. Additionally, every
+        CHUNK_SWEEP_INTERVAL calls, things that have moved into an inactive chunk are stored in it.
+
+        Parameters:
+            force (bool): If True, chunks are updated even if no player has changed chunks
+        """
+        if self._chunk_store is not None:
+            self._chunk_store.prefetch(self)
+
+        self._steps_since_sweep += 1
+        if self._steps_since_sweep >= CHUNK_SWEEP_INTERVAL:
+            self._steps_since_sweep = 0
+            self._sweep_inactive_things()
+
+        player_chunks = {self.get_chunk_position(*player.get_position())
+                         for player in self._things_by_category["player"]}
+
+        if player_chunks == self._player_chunks and not force:
+            return
+        self._player_chunks = player_chunks
+
+        wanted = set()
+        kept = set()
+        radius = self._activation_radius
+        for chunk_column, chunk_row in player_chunks:
+            for column in range(chunk_column - radius - 1, chunk_column + radius + 2):
+                for row in range(chunk_row - radius - 1, chunk_row + radius + 2):
+                    kept.add((column, row))
+                    if abs(column - chunk_column) <= radius and abs(row - chunk_row) <= radius:
+                        wanted.add((column, row))
+
+        deactivate = [chunk for chunk in self._active_chunks if chunk.get_position() not in kept]
+        if deactivate:
+            self._deactivate_chunks(deactivate)
+
+        # sorted, so that chunks are always activated in the same order
+        for position in sorted(wanted):
+            chunk = self._chunks.get(position)
+            if chunk is not None and not chunk.is_active():
+                self._activate_chunk(chunk)
+
+    def _activate_chunk(self, chunk: Chunk):
+        """Moves the contents of an inactive chunk into the world"""
+        self.load_chunk(chunk)
+
+        chunk.set_active(True)
+        self._active_chunks[chunk] = None
+
+        palette = self._block_palette
+        blocks = []
+        for column, row, code, hitpoints in chunk.pop_blocks():
+            block = create_block(*palette.decode(code))
+
+            if hitpoints is not None:
+                block.set_hitpoints(hitpoints)
+
+            blocks.append((block, column, row))
+
+        # moving blocks out of the chunk & into the world isn't a change to be stored
+        dirty = chunk.is_dirty()
+        self.add_blocks(blocks)
+        chunk.set_dirty(dirty)
+
+        for thing, category, (x, y), velocity in chunk.pop_things():
+            if category == "item":
+                if self._is_item_expired(thing):
+                    # expired while stored in the chunk
+                    del self._item_births[thing]
+                    self._expired_items += 1
+                    continue
+
+                self.add_item(thing, x, y)
+            else:
+                self.add_mob(thing, x, y)
+
+            thing.set_velocity(velocity)
+
+    def _deactivate_chunks(self, chunks: [Chunk]):
+        """Moves the contents of active chunks out of the world, into the chunks themselves"""
+        palette = self._block_palette
+
+        blocks = []
+        # moving blocks out of the world & into the chunks isn't a change to be stored
+        dirty = {chunk: chunk.is_dirty() for chunk in chunks}
+
+        for chunk in chunks:
+            left, top = chunk.get_origin()
+            size = chunk.get_size()
+            columns, rows = self._grid_size
+
+            for column in range(left, min(left + size, columns)):
+                for row in range(top, min(top + size, rows)):
+                    block = self._block_index[column][row]
+
+                    if block is None:
+                        continue
+
+                    hitpoints = block.get_hitpoints()
+                    chunk.set_block(column, row, palette.encode(block.get_block_id()),
+                                    hitpoints if hitpoints != block.get_max_hitpoints() else None)
+                    blocks.append(block)
+
+            chunk.set_active(False)
+            del self._active_chunks[chunk]
+
+        self.remove_blocks(blocks)
+
+        for chunk, was_dirty in dirty.items():
+            chunk.set_dirty(was_dirty)
+
+        self._sweep_inactive_things()
+
+    def _sweep_inactive_things(self):
+        """Stores every (non-block) thing that is within an inactive chunk in that chunk"""
+        for thing in list(self.get_things_in_categories(*CHUNKED_CATEGORIES)):
+            chunk = self._chunks[self.get_chunk_position(*thing.get_position())]
+
+            if chunk.is_active():
+                continue
+
+            category = self._things[thing]
+            velocity = thing.get_velocity()
+
+            chunk.add_thing(thing, category, thing.get_position(), (velocity.x, velocity.y))
+            self.remove_thing(thing)
+
+    def is_terrain_meshed(self) -> bool:
+        """(bool) Returns True iff the collision hulls of blocks are merged into larger rectangles"""
+        return self._mesh_tile_size is not None
+
+    def count_terrain_hulls(self) -> int:
+        """(int) Returns the number of merged collision hulls for blocks in the world"""
+        return sum(len(hulls) for hulls in self._mesh_hulls.values())
+
+    def get_terrain_hulls(self) -> List[pymunk.Poly]:
+        """(list<pymunk.Poly>) Returns the merged collision hulls for blocks in the world, in the
+        order they were added"""
+        return [hull for tile in sorted(self._mesh_hulls) for hull in self._mesh_hulls[tile]]
+
+    def _invalidate_terrain_mesh(self, column: int, row: int):
+        """Marks the mesh tile containing the grid cell at ('column', 'row') to be rebuilt"""
+        self._dirty_mesh_tiles.add((column // self._mesh_tile_size, row // self._mesh_tile_size))
+
+    def _update_terrain_mesh(self):
+        """Rebuilds the collision hulls of every mesh tile that has changed since the last update
+
+        Within a tile, solid cells are greedily merged into as few rectangles as possible (see
+        meshing.greedy_mesh). Hulls never cross tile boundaries, so mining or placing a block only
+        rebuilds the hulls of the tile containing it. Only blocks added with the same friction
+        are merged, & each hull takes that friction (see add_blocks).
+
+        A hull may cover many blocks, so it has no owner (i.e. its object is None); the block
+        at a point must be found through the block index (see get_block), not from the shape.
+        """
+        if not self._dirty_mesh_tiles:
+            return
+
+        size = self._mesh_tile_size
+        columns, rows = self._grid_size
+        index = self._block_index
+        expanse = self._cell_expanse
+
+        # sorted, so that hulls are always added in the same order
+        for tile in sorted(self._dirty_mesh_tiles):
+            old_hulls = self._mesh_hulls.pop(tile, [])
+            if old_hulls:
+                self._space.remove(*old_hulls)
+
+            tile_column, tile_row = tile
+            left, top = tile_column * size, tile_row * size
+            right, bottom = min(left + size, columns), min(top + size, rows)
+
+            frictions = {index[column][row].get_shape().friction
+                         for column in range(left, right) for row in range(top, bottom)
+                         if index[column][row] is not None}
+
+            hulls = []
+            for friction in sorted(frictions):
+                def is_solid(column, row):
+                    block = index[column][row]
+                    return block is not None and block.get_shape().friction == friction
+
+                for column, row, width, height in greedy_mesh(is_solid, left, top, right, bottom):
+                    x0, y0 = column * expanse, row * expanse
+                    x1, y1 = (column + width) * expanse, (row + height) * expanse
+
+                    hull = pymunk.Poly(self._space.static_body, [(x0, y0), (x0, y1), (x1, y1), (x1, y0)])
+                    hull.object = None
+                    hull.friction = friction
+                    hull.collision_type = self._collision_types['block']
+                    hull.filter = self._get_shape_filter(self._thing_categories["block"])
+                    hulls.append(hull)
+
+            if hulls:
+                self._space.add(*hulls)
+                self._mesh_hulls[tile] = hulls
+
+        self._dirty_mesh_tiles.clear()
 
     def add_item(self, item: DroppedItem, x: float, y: float, size: Tuple[float, float] = (8, 8),
                  mass: float = 2, friction: float = 1.):
@@ -347,14 +1390,256 @@ class World:
                                 Note: this is an instance of DroppedItem, not Item!
 
             - See add_thing for other parameters
-        """
 
-        self.add_thing(item, x, y, size, collision_type=self._collision_types['item'],
-                       categories=self._thing_categories["item"], mass=mass, friction=friction)
+        If the item has never been in a world, it is given a body & shape from the pool of those
+        of removed items, if there is one of the same size (see remove_item)
+
+        If there is loot physics, the item is moved by it instead, and has no body or shape; its
+        mass & friction are ignored
+
+        An item's age (see get_item_age) starts when it is first added; if there are then more
+        than the maximum number of items, the oldest are removed
+        """
+        shape = item.get_shape()
+        if self._loot is not None:
+            self._loot.add_item(item, x, y, size)
+            self._register(item, "item")
+        elif shape is None or shape.body.space is not None or shape.object is not item:
+            pool = self._item_pools.get(tuple(size))
+
+            if pool:
+                shape = pool.pop()
+                shape.object = item
+                item.set_shape(shape)
+                self._item_pool_hits += 1
+            else:
+                self._item_pool_misses += 1
+
+        if self._loot is None:
+            self.add_thing(item, x, y, size, collision_type=self._collision_types['item'],
+                           categories=self._thing_categories["item"], mass=mass, friction=friction)
+
+        if item not in self._item_births:
+            self.set_item_age(item, 0.)
+
+        if self._max_items is not None and len(self._things_by_category["item"]) > self._max_items:
+            self._evict_items(len(self._things_by_category["item"]) - self._max_items)
 
     def remove_item(self, item: DroppedItem):
-        """Removes an item from the world"""
+        """Removes an item from the world, for good
+
+        The item's body & shape are kept in a pool, to be given to an item added later (see
+        add_item), so the item must not be added again once removed; to move an item out of the
+        world temporarily, use remove_thing instead"""
         self.remove_thing(item)
+        self._item_births.pop(item, None)
+
+        shape = item.get_shape()
+        if shape is None:
+            # moved by loot physics, so there is nothing to pool
+            return
+
+        if shape.body.space is not None:
+            # removed during a physics step (e.g. by a collision callback), so the shape stays in
+            # the space, & may be seen by other callbacks, until the end of the step
+            self._space.add_post_step_callback(lambda space, key: self._pool_item_shape(shape), shape)
+        else:
+            self._pool_item_shape(shape)
+
+    def _pool_item_shape(self, shape: pymunk.Shape):
+        """Keeps the detached body & shape of a removed item for reuse, if the pool of those of
+        its size isn't full"""
+        vertices = shape.get_vertices()
+        size = (max(vertex.x for vertex in vertices) - min(vertex.x for vertex in vertices),
+                max(vertex.y for vertex in vertices) - min(vertex.y for vertex in vertices))
+
+        pool = self._item_pools.setdefault(size, [])
+        if len(pool) < self._item_pool_size:
+            shape.object = None
+            pool.append(shape)
+
+    def get_item_age(self, item: DroppedItem) -> float:
+        """(float) Returns the time since 'item' was dropped into the world, in seconds, including
+        any time spent stored in an inactive chunk"""
+        return self._time - self._item_births.get(item, self._time)
+
+    def set_item_age(self, item: DroppedItem, age: float):
+        """Sets the time since 'item' was dropped to 'age' seconds (e.g. when restoring an item);
+        the item must be in the world or stored in one of its chunks"""
+        birth = self._time - age
+        self._item_births[item] = birth
+        heapq.heappush(self._item_heap, (birth, next(self._item_sequence), item))
+
+        # rebuilt once mostly made up of entries to be skipped
+        if len(self._item_heap) > 2 * len(self._item_births) + 64:
+            self._item_heap = [(birth, next(self._item_sequence), item) for item, birth in self._item_births.items()]
+            heapq.heapify(self._item_heap)
+
+    def _is_item_expired(self, item: DroppedItem) -> bool:
+        """(bool) Returns True iff 'item' has outlived the item lifetime"""
+        return self._item_lifetime is not None and self.get_item_age(item) >= self._item_lifetime
+
+    def _expire_items(self):
+        """Removes the items in the world that have outlived the item lifetime
+
+        Items stored in inactive chunks are instead removed when their chunk is activated"""
+        deadline = self._time - self._item_lifetime
+        heap = self._item_heap
+
+        while heap and heap[0][0] <= deadline:
+            birth, _, item = heapq.heappop(heap)
+
+            if self._item_births.get(item) != birth:
+                continue
+
+            if self._things.get(item) == "item":
+                self.remove_item(item)
+                self._expired_items += 1
+
+    def _evict_items(self, excess: int):
+        """Removes the 'excess' oldest items in the world"""
+        heap = self._item_heap
+        # entries of items stored in inactive chunks, which are kept
+        stored = []
+
+        while excess > 0 and heap:
+            entry = heapq.heappop(heap)
+            birth, _, item = entry
+
+            if self._item_births.get(item) != birth:
+                continue
+
+            if self._things.get(item) != "item":
+                stored.append(entry)
+                continue
+
+            self.remove_item(item)
+            self._evicted_items += 1
+            excess -= 1
+
+        for entry in stored:
+            heapq.heappush(heap, entry)
+
+    def _cap_chunk_items(self):
+        """Removes the oldest items in each active chunk with more than the maximum items per chunk"""
+        chunk_items = {}
+        for item in self._things_by_category["item"]:
+            chunk_items.setdefault(self.get_chunk_position(*item.get_position()), []).append(item)
+
+        for items in chunk_items.values():
+            excess = len(items) - self._max_items_per_chunk
+
+            if excess > 0:
+                items.sort(key=self._item_births.__getitem__)
+
+                for item in items[:excess]:
+                    self.remove_item(item)
+
+                self._evicted_items += excess
+
+    def fill_item_pool(self, count: int, size: Tuple[float, float] = (8, 8), mass: float = 2):
+        """Builds bodies & shapes for items ahead of time, until the pool of those of 'size' has
+        'count' (or the most it can keep), so that adding that many items doesn't allocate them
+
+        See add_item for parameters
+        """
+        pool = self._item_pools.setdefault(tuple(size), [])
+        vertices = self._get_box_vertices(size)
+
+        while len(pool) < min(count, self._item_pool_size):
+            pool.append(pymunk.Poly(pymunk.Body(mass, pymunk.inf), vertices))
+
+    def merge_items(self, radius: float) -> int:
+        """Merges each resting item into resting items of the same kind within 'radius' of it,
+        as far as their maximum stack size allows, removing the items that are used up
+
+        Items are resting if they are moving slower than ITEM_REST_SPEED. Items absorb their
+        neighbours in the order they were added to the world, so the result is repeatable.
+
+        Return:
+            int: The number of items removed
+        """
+        rest_speed = ITEM_REST_SPEED ** 2
+        radius_squared = radius ** 2
+
+        # resting items, by the (column, row) of the square of the radius that they are in
+        resting = []
+        buckets = {}
+        for item in self._things_by_category["item"]:
+            if item.get_velocity().get_length_sqrd() > rest_speed:
+                continue
+
+            x, y = item.get_position()
+            cell = int(x // radius), int(y // radius)
+            resting.append((item, x, y, cell))
+            buckets.setdefault(cell, []).append((item, x, y))
+
+        # items used up, as an ordered set
+        merged = {}
+
+        for item, x, y, (column, row) in resting:
+            stack = item.get_stack()
+            if item in merged or not stack.get_space():
+                continue
+
+            neighbours = (neighbour for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                          for neighbour in buckets.get((column + dx, row + dy), ()))
+
+            for other, other_x, other_y in neighbours:
+                if other is item or other in merged or (other_x - x) ** 2 + (other_y - y) ** 2 > radius_squared:
+                    continue
+
+                if stack.absorb(other.get_stack()):
+                    merged[other] = None
+
+                if not stack.get_space():
+                    break
+
+        for item in merged:
+            self.remove_item(item)
+
+        self._merged_items += len(merged)
+        return len(merged)
+
+    def get_item_stats(self) -> dict:
+        """Returns statistics about the items in the world & how they have been removed
+
+        Return:
+            dict<str: int>: Mapping of:
+                - 'items': the number of items simulated
+                - 'stored': the number of items stored in inactive chunks
+                - 'expired': the total number of items removed for outliving the item lifetime
+                - 'evicted': the total number of items removed for exceeding a maximum number
+                - 'merged': the total number of items removed by merging into other items
+        """
+        items = len(self._things_by_category["item"])
+
+        return {
+            'items': items,
+            'stored': len(self._item_births) - items,
+            'expired': self._expired_items,
+            'evicted': self._evicted_items,
+            'merged': self._merged_items,
+        }
+
+    def get_item_pool_stats(self) -> dict:
+        """Returns statistics about the reuse of the bodies & shapes of items
+
+        Return:
+            dict<str: *>: Mapping of:
+                - 'pooled': the number of bodies & shapes in the pool, of any size
+                - 'hits': the number of new items given a body & shape from the pool
+                - 'misses': the number of new items for which a body & shape was built
+                - 'hit_rate': the fraction of new items given a body & shape from the pool
+        """
+        added = self._item_pool_hits + self._item_pool_misses
+
+        return {
+            'pooled': sum(len(pool) for pool in self._item_pools.values()),
+            'hits': self._item_pool_hits,
+            'misses': self._item_pool_misses,
+            'hit_rate': self._item_pool_hits / added if added else 0.,
+        }
 
     def add_mob(self, mob: Mob, x: float, y: float, mass: float = 100, friction: float = 1.):
         """Adds a mob to the game world centred at the position ('x', 'y')
@@ -374,10 +1659,20 @@ class World:
 
     def get_things(self, x: float, y: float) -> [PhysicalThing]:
         """(list<PhysicalThing>) Returns all things on the point ('x', 'y')"""
+        # blocks are found through the block index, since their shapes may be merged
         queries = self._space.point_query((x, y), 0, pymunk.ShapeFilter(
-            mask=pymunk.ShapeFilter.ALL_MASKS ^ self._thing_categories["wall"]))
+            mask=pymunk.ShapeFilter.ALL_MASKS ^ self._thing_categories["wall"] ^ self._thing_categories["block"]))
 
-        return [q.shape.object for q in queries]
+        things = [q.shape.object for q in queries]
+
+        if self._loot is not None:
+            things.extend(self._loot.query(x, y, 0))
+
+        block = self.get_block(x, y)
+        if block:
+            things.insert(0, block)
+
+        return things
 
     def get_thing(self, x: float, y: float) -> PhysicalThing:
         """(PhysicalThing) Returns a thing on the point ('x', 'y'), or None if there is no thing there
@@ -390,11 +1685,64 @@ class World:
 
     def get_items(self, x: float, y: float, max_distance: float) -> [DroppedItem]:
         """(list<DroppedItem>) Returns all items within 'max_distance' from the point ('x', 'y')"""
+        if self._loot is not None:
+            return self._loot.query(x, y, max_distance)
+
         queries = self._space.point_query((x, y), max_distance,
                                           pymunk.ShapeFilter(mask=self._thing_categories["item"]))
 
         return [q.shape.object for q in queries]
 
+    def is_sleeping(self, thing: PhysicalThing) -> bool:
+        """(bool) Returns True iff 'thing' has been at rest long enough to stop being simulated
+
+        Sleeping things are not stepped, and are woken when anything moves them, a player
+        touches them or a block next to them is removed
+
+        Items moved by loot physics are sleeping once they have landed (see loot.SimpleLoot)"""
+        if self._loot is not None and self._loot.has_item(thing):
+            return self._loot.is_resting(thing)
+
+        return thing.get_shape().body.is_sleeping
+
+    def count_sleeping(self, category=None) -> int:
+        """(int) Returns the number of sleeping things, optionally only in 'category'"""
+        things = self._things if category is None else self._things_by_category[category]
+        return sum(1 for thing in things if self.is_sleeping(thing))
+
+    def _wake_things_in(self, bb: pymunk.BB):
+        """Wakes every sleeping thing in WAKEABLE_CATEGORIES whose shape overlaps 'bb'"""
+        mask = 0
+        for category in WAKEABLE_CATEGORIES:
+            mask |= self._thing_categories[category]
+
+        for shape in self._space.bb_query(bb, pymunk.ShapeFilter(mask=mask)):
+            if shape.body.is_sleeping:
+                shape.body.activate()
+
+    def _wake_cells(self, cells: [Tuple[int, int]]):
+        """Wakes every sleeping thing in or next to any of 'cells', as (column, row) pairs"""
+        columns, rows = zip(*cells)
+        expanse = self._cell_expanse
+
+        # one query around all of the cells, since waking a few more things is harmless
+        self._wake_things_in(pymunk.BB((min(columns) - 1) * expanse, (min(rows) - 1) * expanse,
+                                       (max(columns) + 2) * expanse, (max(rows) + 2) * expanse))
+
+    def _wake_player_contacts(self):
+        """Wakes every sleeping thing that a moving player is touching
+
+        Players at rest don't wake things, so that things around an idle player can sleep"""
+        idle_speed = self._space.idle_speed_threshold
+
+        for player in self._things_by_category["player"]:
+            body = player.get_shape().body
+            if body.is_sleeping or body.velocity.get_length() <= idle_speed:
+                continue
+
+            bb = player.get_shape().bb
+            self._wake_things_in(pymunk.BB(bb.left - 1, bb.bottom - 1, bb.right + 1, bb.top + 1))
+
     def get_mobs(self, x: float, y: float, max_distance: float) -> [Mob]:
         """(list<Mob>) Returns all mobs within 'max_distance' from the point ('x', 'y')"""
         queries = self._space.point_query((x, y), max_distance,